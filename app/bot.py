@@ -0,0 +1,68 @@
+import asyncio
+import ssl
+import certifi
+from aiohttp import ClientSession, TCPConnector
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram import Bot, __version__ as aiogram_version
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+from app.config import BOT_TOKEN, BOT_HTTP_LIMIT, BOT_HTTP_TIMEOUT, BOT_HTTP_KEEPALIVE
+from app.middlewares import RequestMetricsMiddleware
+
+
+class KeepAliveAiohttpSession(AiohttpSession):
+    """AiohttpSession whose connector also keeps idle connections for ``keepalive_timeout`` seconds.
+
+    AiohttpSession has no public setting for that, so this session builds its own
+    ClientSession in ``create_session`` (the hook every request goes through) and
+    closes it in ``close``; the rest of AiohttpSession is used as is.
+    """
+
+    def __init__(self, limit: int = 100, keepalive_timeout: float = 15, **kwargs):
+        super().__init__(limit=limit, **kwargs)
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._client: ClientSession | None = None
+
+    async def create_session(self) -> ClientSession:
+        if self._client is None or self._client.closed:
+            self._client = ClientSession(
+                connector=TCPConnector(
+                    ssl=ssl.create_default_context(cafile=certifi.where()),
+                    limit=self.limit,
+                    keepalive_timeout=self.keepalive_timeout,
+                    # Same DNS cache as aiogram's own connector
+                    ttl_dns_cache=3600
+                ),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{aiogram_version}"}
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+            # Let the SSL connections shut down (aiohttp's graceful shutdown advice)
+            await asyncio.sleep(0.25)
+        await super().close()
+
+
+def create_bot() -> Bot:
+    """Create the single application-wide Bot with a pooled keep-alive HTTP session.
+
+    The dispatcher injects this instance into handlers as ``bot``, so handlers
+    must never build their own ``Bot`` objects.
+    """
+    session = KeepAliveAiohttpSession(
+        limit=BOT_HTTP_LIMIT,
+        keepalive_timeout=BOT_HTTP_KEEPALIVE,
+        timeout=BOT_HTTP_TIMEOUT
+    )
+    session.middleware(RequestMetricsMiddleware())
+
+    return Bot(
+        token=BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
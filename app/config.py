@@ -7,3 +7,44 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 ADMIN_ID = os.getenv('ADMIN_ID')
 GROUP_ID = os.getenv('GROUP_ID')
 DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Telegram Bot API HTTP client (one pooled session shared by the whole process)
+BOT_HTTP_LIMIT = int(os.getenv('BOT_HTTP_LIMIT', '100'))
+BOT_HTTP_TIMEOUT = float(os.getenv('BOT_HTTP_TIMEOUT', '30'))
+BOT_HTTP_KEEPALIVE = float(os.getenv('BOT_HTTP_KEEPALIVE', '60'))
+
+# Product catalog cache
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+# Set to 1 when running several bot workers so they invalidate each other's cache via Postgres LISTEN/NOTIFY
+CATALOG_NOTIFY = os.getenv('CATALOG_NOTIFY', '0') == '1'
+
+# Run mode: 'polling' (default) or 'webhook'
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Webhook mode
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '30'))
+WEB_SERVER_HOST = os.getenv('WEB_SERVER_HOST', '0.0.0.0')
+WEB_SERVER_PORT = int(os.getenv('WEB_SERVER_PORT', '8000'))
+
+# Prometheus metrics: in polling mode /metrics and /health are served on WEB_SERVER_HOST:WEB_SERVER_PORT
+# (webhook mode always serves them next to the webhook)
+METRICS_SERVER = os.getenv('METRICS_SERVER', '1') == '1'
+
+# Updates of one user run one at a time (in arrival order); different users run concurrently
+USER_LOCKS_MAXSIZE = int(os.getenv('USER_LOCKS_MAXSIZE', '10000'))
+# Window (seconds) in which ➕/➖ taps on one stepper are coalesced into one update (0 = off)
+STEPPER_DEBOUNCE = float(os.getenv('STEPPER_DEBOUNCE', '0.25'))
+# Polling mode: max updates processed at once (0 = unlimited)
+POLLING_TASKS_LIMIT = int(os.getenv('POLLING_TASKS_LIMIT', '0'))
+
+# FSM storage: 'memory' (default, per process) or 'postgres' (persistent, shared by all workers)
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory')
+FSM_STATE_TTL = float(os.getenv('FSM_STATE_TTL', str(7 * 24 * 3600)))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.5'))
+FSM_READ_CACHE_TTL = float(os.getenv('FSM_READ_CACHE_TTL', '1'))
+
+# Seconds between folds of the appended sales deltas into the statistics aggregates
+SALES_ROLLUP_INTERVAL = float(os.getenv('SALES_ROLLUP_INTERVAL', '5'))
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import CATALOG_CACHE_TTL
+from app.database.models import Branch, DeliveryZone
+from app.utils.geo import GeoGrid, PolygonGrid
+from app.utils.money import to_tiyin
+
+# Payload of the catalog NOTIFY (see catalog_cache.CATALOG_CHANNEL) sent when branches change
+BRANCHES_PAYLOAD = 'branches'
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBranch:
+    """Immutable, session-independent copy of a Branch row."""
+    id: int
+    name: str
+    description: str | None
+    location: str
+    image: str | None
+    latitude: float | None
+    longitude: float | None
+    notify_chat_id: int | None
+
+    @classmethod
+    def from_model(cls, branch: Branch) -> 'CachedBranch':
+        return cls(
+            id=branch.id,
+            name=branch.name,
+            description=branch.description,
+            location=branch.location,
+            image=branch.image,
+            latitude=float(branch.latitude) if branch.latitude is not None else None,
+            longitude=float(branch.longitude) if branch.longitude is not None else None,
+            notify_chat_id=branch.notify_chat_id
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CachedZone:
+    """Delivery zone with its branch; amounts in tiyin."""
+    id: int
+    name: str
+    branch: CachedBranch
+    delivery_fee: int
+    min_order: int
+
+
+class BranchCache:
+    """Read-through in-process cache of the branches and their delivery zones.
+
+    Works like CatalogCache: branches and zones are loaded in two queries,
+    expire after ``ttl`` seconds and are dropped by ``invalidate()``. Every load
+    rebuilds a GeoGrid over the branches with coordinates (nearest pickup point)
+    and a PolygonGrid over the zones (which zone delivers to a point).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._all: tuple[CachedBranch, ...] = ()
+        self._index = GeoGrid(())
+        self._zones = PolygonGrid(())
+        self._loaded_at: float | None = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if self.is_fresh():
+                return
+            generation = self._generation
+            result = await session.execute(select(Branch).order_by(Branch.created_at.desc()))
+            branches = tuple(CachedBranch.from_model(branch) for branch in result.scalars())
+
+            by_id = {branch.id: branch for branch in branches}
+            result = await session.execute(select(DeliveryZone).order_by(DeliveryZone.id))
+            zones = [
+                (
+                    zone.polygon,
+                    CachedZone(zone.id, zone.name, by_id[zone.branch_id], to_tiyin(zone.delivery_fee),
+                               to_tiyin(zone.min_order))
+                )
+                for zone in result.scalars() if zone.branch_id in by_id
+            ]
+
+            self._all = branches
+            self._index = GeoGrid(
+                (branch.latitude, branch.longitude, branch)
+                for branch in branches if branch.latitude is not None
+            )
+            self._zones = PolygonGrid(zones)
+            self._loaded_at = time.monotonic() if generation == self._generation else None
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = None
+
+    async def get_all(self, session: AsyncSession) -> tuple[CachedBranch, ...]:
+        await self.ensure_loaded(session)
+        return self._all
+
+    async def get_nearest(self, session: AsyncSession, latitude: float, longitude: float,
+                          limit: int) -> list[tuple[CachedBranch, float]]:
+        """Up to ``limit`` ``(branch, distance_km)`` pairs, nearest first; branches without
+        coordinates are left out."""
+        await self.ensure_loaded(session)
+        return self._index.nearest(latitude, longitude, limit)
+
+    async def has_zones(self, session: AsyncSession) -> bool:
+        await self.ensure_loaded(session)
+        return len(self._zones) > 0
+
+    async def find_zone(self, session: AsyncSession, latitude: float, longitude: float) -> CachedZone | None:
+        """The zone delivering to the point; where zones overlap, the one with the lowest fee."""
+        await self.ensure_loaded(session)
+        zones = self._zones.containing(latitude, longitude)
+        return min(zones, key=lambda zone: (zone.delivery_fee, zone.id), default=None)
+
+
+branch_cache = BranchCache(ttl=CATALOG_CACHE_TTL)
@@ -1,6 +1,12 @@
-from sqlalchemy import select, delete
+from decimal import Decimal
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database.models import Branch
+from app.database.models import Branch, DeliveryZone
+from app.database.branch_cache import branch_cache, CachedBranch, CachedZone, BRANCHES_PAYLOAD
+from app.database.catalog_cache import CATALOG_CHANNEL
+
+# Branches listed for pickup when the user shares a location
+NEAREST_BRANCHES = 5
 
 
 async def get_all_branches(session: AsyncSession):
@@ -13,21 +19,55 @@ async def get_branch_by_id(session: AsyncSession, branch_id: int) -> Branch | No
     return result.scalar_one_or_none()
 
 
-async def create_branch(session: AsyncSession, name: str, location: str, description: str = None, image: str = None) -> Branch:
+# Pickup selection reads the in-process branch cache (see branch_cache.py);
+# every write invalidates it locally and NOTIFYs other workers on commit.
+async def get_pickup_branches(session: AsyncSession) -> tuple[CachedBranch, ...]:
+    return await branch_cache.get_all(session)
+
+
+async def get_nearest_branches(session: AsyncSession, latitude: float, longitude: float,
+                               limit: int = NEAREST_BRANCHES) -> list[tuple[CachedBranch, float]]:
+    """``(branch, distance_km)`` pairs, nearest first, from the cache's grid index."""
+    return await branch_cache.get_nearest(session, latitude, longitude, limit)
+
+
+async def has_delivery_zones(session: AsyncSession) -> bool:
+    """False until an admin defines the first zone; until then delivery is accepted anywhere."""
+    return await branch_cache.has_zones(session)
+
+
+async def find_delivery_zone(session: AsyncSession, latitude: float, longitude: float) -> CachedZone | None:
+    """The zone (with its branch, fee and minimum order) that delivers to the point, from the
+    cache's polygon index."""
+    return await branch_cache.find_zone(session, latitude, longitude)
+
+
+async def _commit_branch_change(session: AsyncSession):
+    await session.execute(select(func.pg_notify(CATALOG_CHANNEL, BRANCHES_PAYLOAD)))
+    await session.commit()
+    branch_cache.invalidate()
+
+
+async def create_branch(session: AsyncSession, name: str, location: str, description: str = None, image: str = None,
+                        latitude: float = None, longitude: float = None) -> Branch:
     branch = Branch(
         name=name,
         location=location,
         description=description,
-        image=image
+        image=image,
+        latitude=latitude,
+        longitude=longitude
     )
     session.add(branch)
-    await session.commit()
+    await _commit_branch_change(session)
     await session.refresh(branch)
     return branch
 
 
 async def update_branch(session: AsyncSession, branch_id: int, name: str = None, 
-                       location: str = None, description: str = None, image: str = None) -> Branch:
+                       location: str = None, description: str = None, image: str = None,
+                       latitude: float = None, longitude: float = None, notify_chat_id: int = None) -> Branch:
+    """Fields left as None are not changed; ``notify_chat_id=0`` resets the branch to GROUP_ID."""
     branch = await get_branch_by_id(session, branch_id)
     if branch:
         if name is not None:
@@ -38,12 +78,51 @@ async def update_branch(session: AsyncSession, branch_id: int, name: str = None,
             branch.description = description
         if image is not None:
             branch.image = image
-        await session.commit()
+        if latitude is not None and longitude is not None:
+            branch.latitude = latitude
+            branch.longitude = longitude
+        if notify_chat_id is not None:
+            branch.notify_chat_id = notify_chat_id or None
+        await _commit_branch_change(session)
         await session.refresh(branch)
     return branch
 
 
 async def delete_branch(session: AsyncSession, branch_id: int) -> bool:
     result = await session.execute(delete(Branch).where(Branch.id == branch_id))
-    await session.commit()
+    await _commit_branch_change(session)
+    return result.rowcount > 0
+
+
+# DELIVERY ZONES
+async def get_branch_zones(session: AsyncSession, branch_id: int):
+    result = await session.execute(
+        select(DeliveryZone).where(DeliveryZone.branch_id == branch_id).order_by(DeliveryZone.id)
+    )
+    return result.scalars().all()
+
+
+async def get_zone_by_id(session: AsyncSession, zone_id: int) -> DeliveryZone | None:
+    result = await session.execute(select(DeliveryZone).where(DeliveryZone.id == zone_id))
+    return result.scalar_one_or_none()
+
+
+async def create_delivery_zone(session: AsyncSession, branch_id: int, name: str, polygon: list,
+                               delivery_fee: Decimal, min_order: Decimal) -> DeliveryZone:
+    zone = DeliveryZone(
+        branch_id=branch_id,
+        name=name,
+        polygon=polygon,
+        delivery_fee=delivery_fee,
+        min_order=min_order
+    )
+    session.add(zone)
+    await _commit_branch_change(session)
+    await session.refresh(zone)
+    return zone
+
+
+async def delete_delivery_zone(session: AsyncSession, zone_id: int) -> bool:
+    result = await session.execute(delete(DeliveryZone).where(DeliveryZone.id == zone_id))
+    await _commit_branch_change(session)
     return result.rowcount > 0
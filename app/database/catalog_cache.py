@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import CATALOG_CACHE_TTL
+from app.database.models import Product
+
+# Postgres NOTIFY channel used to tell other bot workers that the catalog changed
+CATALOG_CHANNEL = 'catalog_changed'
+
+
+@dataclass(frozen=True, slots=True)
+class CachedProduct:
+    """Immutable, session-independent copy of a Product row."""
+    id: int
+    name: str
+    price: Decimal
+    description: str | None
+    type: str
+    product_image: str | None
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_model(cls, product: Product) -> 'CachedProduct':
+        return cls(
+            id=product.id,
+            name=product.name,
+            price=product.price,
+            description=product.description,
+            type=product.type,
+            product_image=product.product_image,
+            created_at=product.created_at,
+            updated_at=product.updated_at
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ProductPage:
+    """One keyset page of a product listing.
+
+    ``after_id`` is the id of the last product of the previous page (0 for the
+    first page); ``prev_after_id``/``next_after_id`` are the anchors of the
+    neighbouring pages, or None at either end.
+    """
+    products: tuple[CachedProduct, ...]
+    product_type: str | None
+    after_id: int
+    number: int
+    pages: int
+    total: int
+    prev_after_id: int | None
+    next_after_id: int | None
+    version: int
+
+
+class CatalogCache:
+    """Read-through in-process cache of the whole product catalog.
+
+    The catalog is small and changes a few times a day, so it is loaded in one
+    query and indexed by id and by type. Entries expire after ``ttl`` seconds
+    and are dropped immediately by ``invalidate()``. ``version`` changes every
+    time the cached contents may have changed, so renders derived from the
+    catalog can be memoized per version.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._all: tuple[CachedProduct, ...] = ()
+        self._by_id: dict[int, CachedProduct] = {}
+        self._by_type: dict[str, tuple[CachedProduct, ...]] = {}
+        # Position of each product id within each listing (None = all products)
+        self._positions: dict[str | None, dict[int, int]] = {}
+        self._loaded_at: float | None = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if self.is_fresh():
+                return
+            generation = self._generation
+            result = await session.execute(
+                select(Product).order_by(Product.created_at.desc(), Product.id.desc())
+            )
+            products = tuple(CachedProduct.from_model(product) for product in result.scalars())
+
+            by_type: dict[str, list[CachedProduct]] = {}
+            for product in products:
+                by_type.setdefault(product.type, []).append(product)
+
+            self._all = products
+            self._by_id = {product.id: product for product in products}
+            self._by_type = {product_type: tuple(items) for product_type, items in by_type.items()}
+            self._positions = {
+                listing: {product.id: i for i, product in enumerate(items)}
+                for listing, items in [(None, self._all), *self._by_type.items()]
+            }
+            self.version += 1
+            # An invalidation that raced with this load leaves the cache stale, so reload next time
+            self._loaded_at = time.monotonic() if generation == self._generation else None
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = None
+        self.version += 1
+
+    async def get_all(self, session: AsyncSession) -> tuple[CachedProduct, ...]:
+        await self.ensure_loaded(session)
+        return self._all
+
+    async def get_by_type(self, session: AsyncSession, product_type: str) -> tuple[CachedProduct, ...]:
+        await self.ensure_loaded(session)
+        return self._by_type.get(product_type, ())
+
+    def peek(self, product_id: int) -> CachedProduct | None:
+        """The product if the cache is fresh and has it; never touches the database."""
+        return self._by_id.get(product_id) if self.is_fresh() else None
+
+    async def get_by_id(self, session: AsyncSession, product_id: int) -> CachedProduct | None:
+        await self.ensure_loaded(session)
+        return self._by_id.get(product_id)
+
+    async def get_page(self, session: AsyncSession, product_type: str | None, after_id: int,
+                       limit: int) -> ProductPage:
+        """Up to ``limit`` products following ``after_id`` in listing order (all products if
+        ``product_type`` is None). An anchor that no longer exists restarts at the first page."""
+        await self.ensure_loaded(session)
+        items = self._all if product_type is None else self._by_type.get(product_type, ())
+        position = self._positions.get(product_type, {}).get(after_id) if after_id else None
+        start = 0 if position is None else position + 1
+
+        end = start + limit
+        if start == 0:
+            prev_after_id = None
+        else:
+            prev_start = max(0, start - limit)
+            prev_after_id = items[prev_start - 1].id if prev_start else 0
+
+        return ProductPage(
+            products=items[start:end],
+            product_type=product_type,
+            after_id=items[start - 1].id if start else 0,
+            number=-(-start // limit) + 1,
+            pages=max(1, -(-len(items) // limit)),
+            total=len(items),
+            prev_after_id=prev_after_id,
+            next_after_id=items[end - 1].id if end < len(items) else None,
+            version=self.version
+        )
+
+
+catalog_cache = CatalogCache(ttl=CATALOG_CACHE_TTL)
+
+
+async def listen_for_catalog_changes(engine, reconnect_delay: float = 5.0):
+    """Invalidate the local cache whenever another worker NOTIFYs a catalog change
+    (the branch cache if the payload is BRANCHES_PAYLOAD).
+
+    Holds one dedicated database connection for LISTEN and reconnects if it drops.
+    Runs until cancelled.
+    """
+    from app.database.branch_cache import branch_cache, BRANCHES_PAYLOAD
+
+    def on_notify(connection, pid, channel, payload):
+        if payload == BRANCHES_PAYLOAD:
+            branch_cache.invalidate()
+        else:
+            catalog_cache.invalidate()
+
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw_connection = await conn.get_raw_connection()
+                driver_connection = raw_connection.driver_connection
+                await driver_connection.add_listener(CATALOG_CHANNEL, on_notify)
+                # Changes may have happened while we were not listening
+                catalog_cache.invalidate()
+                branch_cache.invalidate()
+                logging.info("Listening for catalog changes on '%s'", CATALOG_CHANNEL)
+                try:
+                    while not driver_connection.is_closed():
+                        await asyncio.sleep(reconnect_delay)
+                finally:
+                    if not driver_connection.is_closed():
+                        await driver_connection.remove_listener(CATALOG_CHANNEL, on_notify)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning("Catalog change listener failed: %s", e)
+        await asyncio.sleep(reconnect_delay)
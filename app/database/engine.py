@@ -1,5 +1,20 @@
 import os
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.utils.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_IDLE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_INVALIDATIONS,
+    DB_STATEMENTS,
+    DB_STATEMENT_DURATION,
+    current_update_stats
+)
 
 # Do NOT import DATABASE_URL from app.config here — read from env to avoid using a wrong value
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -15,9 +30,80 @@ elif DATABASE_URL.startswith("postgresql://"):
 # Helpful log line (visible in Railway deploy logs)
 print("DATABASE_URL used for engine:", DATABASE_URL.split("://", 1)[0] + "://...")
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections before the managed Postgres drops them as idle
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# Prepared statements cached per connection; set to 0 behind PgBouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection.
+
+    Wraps the public ``Pool.connect()``, which the engine calls for every connection
+    it hands out, so no private pool internals are overridden.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={
+        # SQLAlchemy's asyncpg adapter cache and asyncpg's own statement cache
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE
+    }
+)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Pool gauges are read at scrape time
+_pool = engine.sync_engine.pool
+DB_POOL_CHECKED_OUT.set_function(lambda: _pool.checkedout())
+DB_POOL_IDLE.set_function(lambda: _pool.checkedin())
+DB_POOL_OVERFLOW.set_function(lambda: _pool.overflow())
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    DB_POOL_INVALIDATIONS.inc()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Stored on the execution context, so a failed statement leaves nothing behind
+    context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    DB_STATEMENTS.inc()
+    DB_STATEMENT_DURATION.observe(elapsed)
+    stats = current_update_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
 
 async def get_session() -> AsyncSession:
     async with async_session_maker() as session:
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, Mapping, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.database.models import FsmRecord
+
+
+@dataclass
+class _CachedRecord:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    cached_at: float = field(default_factory=time.monotonic)
+
+
+class PostgresStorage(BaseStorage):
+    """FSM storage kept in the ``fsm_states`` table so state survives restarts
+    and is shared by every bot worker.
+
+    Writes go to an in-process write-behind buffer and are flushed as a single
+    batched UPSERT every ``flush_interval`` seconds, so changing state never
+    waits on the database. A record read from the database is served from memory
+    for ``read_cache_ttl`` seconds (one SELECT covers both ``get_state`` and
+    ``get_data`` of an update); records with unflushed writes are always served
+    from memory. Rows untouched for ``state_ttl`` seconds are swept periodically.
+
+    Another worker sees a change after at most ``flush_interval`` +
+    ``read_cache_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        key_builder: Optional[KeyBuilder] = None,
+        state_ttl: float = 7 * 24 * 3600,
+        flush_interval: float = 0.5,
+        read_cache_ttl: float = 1.0,
+        sweep_interval: float = 3600
+    ) -> None:
+        self._session_maker = session_maker
+        self._key_builder = key_builder or DefaultKeyBuilder()
+        self.state_ttl = state_ttl
+        self.flush_interval = flush_interval
+        self.read_cache_ttl = read_cache_ttl
+        self.sweep_interval = sweep_interval
+
+        self._records: Dict[str, _CachedRecord] = {}
+        self._dirty: set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def resolve_state(value: StateType) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, State):
+            return value.state
+        return str(value)
+
+    def _start_background_tasks(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def _load(self, key: StorageKey) -> _CachedRecord:
+        record_key = self._key_builder.build(key)
+        record = self._records.get(record_key)
+        if record is not None and (
+            record_key in self._dirty or time.monotonic() - record.cached_at < self.read_cache_ttl
+        ):
+            return record
+
+        async with self._session_maker() as session:
+            result = await session.execute(
+                select(FsmRecord.state, FsmRecord.data).where(FsmRecord.key == record_key)
+            )
+            row = result.one_or_none()
+
+        # A write may have landed while we were waiting for the database
+        if record_key in self._dirty:
+            return self._records[record_key]
+
+        record = _CachedRecord(state=row.state, data=dict(row.data)) if row else _CachedRecord()
+        self._records[record_key] = record
+        return record
+
+    async def _write(self, key: StorageKey, record: _CachedRecord):
+        record_key = self._key_builder.build(key)
+        record.cached_at = time.monotonic()
+        self._records[record_key] = record
+        self._dirty.add(record_key)
+        self._start_background_tasks()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        current = await self._load(key)
+        await self._write(key, _CachedRecord(state=self.resolve_state(state), data=current.data))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        current = await self._load(key)
+        await self._write(key, _CachedRecord(state=current.state, data=dict(data)))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict((await self._load(key)).data)
+
+    async def flush(self):
+        """Write all buffered changes in one UPSERT (and one DELETE for cleared records)."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            records = {record_key: self._records[record_key] for record_key in dirty}
+
+            upserts = [
+                {'key': record_key, 'state': record.state, 'data': record.data}
+                for record_key, record in records.items()
+                if record.state is not None or record.data
+            ]
+            cleared = [
+                record_key for record_key, record in records.items()
+                if record.state is None and not record.data
+            ]
+
+            try:
+                async with self._session_maker() as session:
+                    if upserts:
+                        stmt = insert(FsmRecord).values(upserts)
+                        await session.execute(
+                            stmt.on_conflict_do_update(
+                                index_elements=[FsmRecord.key],
+                                set_={
+                                    'state': stmt.excluded.state,
+                                    'data': stmt.excluded.data,
+                                    'updated_at': func.now()
+                                }
+                            )
+                        )
+                    if cleared:
+                        await session.execute(delete(FsmRecord).where(FsmRecord.key.in_(cleared)))
+                    await session.commit()
+            except Exception:
+                # Keep the changes buffered (unless overwritten meanwhile) and retry on the next flush
+                self._dirty |= dirty
+                raise
+
+            now = time.monotonic()
+            for record_key, record in records.items():
+                record.cached_at = now
+
+    def _evict_expired(self):
+        # Forget flushed records that are no longer useful as a read cache
+        now = time.monotonic()
+        expired = [
+            record_key for record_key, record in self._records.items()
+            if record_key not in self._dirty and now - record.cached_at >= self.read_cache_ttl
+        ]
+        for record_key in expired:
+            del self._records[record_key]
+
+    async def sweep(self) -> int:
+        """Delete records that have not been updated for ``state_ttl`` seconds."""
+        async with self._session_maker() as session:
+            result = await session.execute(
+                delete(FsmRecord).where(
+                    FsmRecord.updated_at < func.now() - timedelta(seconds=self.state_ttl)
+                )
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.warning("Failed to flush FSM states: %s", e)
+            self._evict_expired()
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logging.info("Removed %d expired FSM states", removed)
+            except Exception as e:
+                logging.warning("Failed to sweep FSM states: %s", e)
+            await asyncio.sleep(self.sweep_interval)
+
+    async def close(self) -> None:
+        for task in (self._flush_task, self._sweep_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(task for task in (self._flush_task, self._sweep_task) if task is not None),
+            return_exceptions=True
+        )
+        self._flush_task = None
+        self._sweep_task = None
+        await self.flush()
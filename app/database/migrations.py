@@ -0,0 +1,37 @@
+import logging
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from app.database.engine import engine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / 'alembic.ini'
+# Revision matching the schema that create_all used to build
+BASELINE_REVISION = '0001'
+
+
+def alembic_config(connection: Connection) -> Config:
+    """Alembic config that runs migrations on an already open connection."""
+    config = Config(str(ALEMBIC_INI))
+    config.attributes['connection'] = connection
+    config.attributes['configure_logger'] = False
+    return config
+
+
+def _upgrade(connection: Connection, revision: str):
+    config = alembic_config(connection)
+
+    # Databases created before migrations existed already have the baseline tables
+    tables = set(inspect(connection).get_table_names())
+    if 'alembic_version' not in tables and 'users' in tables:
+        logging.info("Existing schema without migration history, stamping revision %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, revision)
+
+
+async def run_migrations(revision: str = 'head'):
+    """Upgrade the database schema to ``revision`` (the latest migration by default)."""
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade, revision)
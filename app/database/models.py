@@ -1,5 +1,6 @@
-from datetime import datetime
-from sqlalchemy import BigInteger, String, Integer, Numeric, Text, DateTime, func, ForeignKey
+from datetime import date, datetime
+from sqlalchemy import BigInteger, String, Integer, Numeric, Text, Date, DateTime, func, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -7,6 +8,13 @@ class Base(DeclarativeBase):
     pass
 
 
+# Relationships are declared with lazy="raise": nothing is loaded implicitly, and
+# every query opts into exactly the relationships it needs (joinedload/selectinload).
+#
+# The schema is managed by Alembic (migrations/); indexes declared in __table_args__
+# must have a matching migration.
+
+
 class AbstractBaseModel(Base):
     __abstract__ = True
     
@@ -25,12 +33,15 @@ class User(AbstractBaseModel):
     full_name: Mapped[str] = mapped_column(String(512), nullable=True)
     phone_number: Mapped[str] = mapped_column(String(20), nullable=True)
     
-    orders = relationship("Order", back_populates="user", lazy="selectin")
-    basket_items = relationship("BasketItem", back_populates="user", cascade="all, delete-orphan", lazy="selectin")
+    orders = relationship("Order", back_populates="user", lazy="raise")
+    basket_items = relationship("BasketItem", back_populates="user", cascade="all, delete-orphan", lazy="raise")
 
 
 class Product(AbstractBaseModel):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('ix_products_type_created_at', 'type', 'created_at'),
+    )
     
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
@@ -46,21 +57,51 @@ class Branch(AbstractBaseModel):
     image: Mapped[str] = mapped_column(String(255), nullable=True)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     location: Mapped[str] = mapped_column(String(500), nullable=False)
+    # Map point for the nearest-branch search; NULL for branches added before it
+    latitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=True)
+    longitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=True)
+    # Chat that receives this branch's orders; NULL = the common GROUP_ID
+    notify_chat_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+
+
+class DeliveryZone(AbstractBaseModel):
+    __tablename__ = 'delivery_zones'
+    __table_args__ = (
+        Index('ix_delivery_zones_branch_id', 'branch_id'),
+    )
+    
+    branch_id: Mapped[int] = mapped_column(Integer, ForeignKey('branches.id', ondelete='CASCADE'), nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    # [[lat, lon], ...] vertices of a simple polygon, not closed
+    polygon: Mapped[list] = mapped_column(JSONB, nullable=False)
+    delivery_fee: Mapped[float] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    min_order: Mapped[float] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    
+    branch = relationship("Branch", lazy="raise")
 
 
 class BasketItem(AbstractBaseModel):
     __tablename__ = 'basket_items'
+    __table_args__ = (
+        # Also serves lookups by user_id alone
+        UniqueConstraint('user_id', 'product_id', name='uq_basket_items_user_product'),
+    )
     
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     product_id: Mapped[int] = mapped_column(Integer, ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
     
-    user = relationship("User", back_populates="basket_items", lazy="selectin")
-    product = relationship("Product", lazy="selectin")
+    user = relationship("User", back_populates="basket_items", lazy="raise")
+    product = relationship("Product", lazy="raise")
 
 
 class Order(AbstractBaseModel):
     __tablename__ = 'orders'
+    __table_args__ = (
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_orders_status', 'status'),
+        UniqueConstraint('checkout_key', name='uq_orders_checkout_key'),
+    )
     
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     total_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
@@ -70,14 +111,21 @@ class Order(AbstractBaseModel):
     branch_id: Mapped[int] = mapped_column(Integer, ForeignKey('branches.id', ondelete='SET NULL'), nullable=True)
     delivery_latitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=True)
     delivery_longitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=True)
+    # Included in total_price; NULL for pickup orders
+    delivery_fee: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
+    # sha256 of the user and the confirmation message (see order_requests.checkout_key)
+    checkout_key: Mapped[str] = mapped_column(String(64), nullable=True)
     
-    user = relationship("User", back_populates="orders", lazy="selectin")
-    branch = relationship("Branch", lazy="selectin")
-    order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
+    user = relationship("User", back_populates="orders", lazy="raise")
+    branch = relationship("Branch", lazy="raise")
+    order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="raise")
 
 
 class OrderItem(AbstractBaseModel):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        Index('ix_order_items_order_id', 'order_id'),
+    )
     
     order_id: Mapped[int] = mapped_column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
     product_id: Mapped[int] = mapped_column(Integer, ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
@@ -85,5 +133,70 @@ class OrderItem(AbstractBaseModel):
     product_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     
-    order = relationship("Order", back_populates="order_items", lazy="selectin")
-    product = relationship("Product", lazy="selectin")
+    order = relationship("Order", back_populates="order_items", lazy="raise")
+    product = relationship("Product", lazy="raise")
+
+
+class FsmRecord(Base):
+    __tablename__ = 'fsm_states'
+    
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+
+
+# Sales aggregates for the admin statistics screen, so the screen never scans orders.
+# Checkouts and status changes only append SalesDelta rows in their own transaction;
+# those are folded into the aggregates by a periodic rollup (see stats_requests.py).
+# Amounts are integer tiyin; cancelled orders are excluded everywhere except in
+# SalesByStatus.
+class SalesDaily(Base):
+    __tablename__ = 'sales_daily'
+    
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    delivery_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class SalesByStatus(Base):
+    __tablename__ = 'sales_by_status'
+    
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class SalesByProduct(Base):
+    __tablename__ = 'sales_by_product'
+    
+    # No foreign keys: statistics outlive deleted products and branches
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    quantity: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class SalesByBranch(Base):
+    __tablename__ = 'sales_by_branch'
+    
+    branch_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class SalesDelta(Base):
+    __tablename__ = 'sales_deltas'
+    
+    # Exactly one key is set: status, (day, delivery_type), branch_id or product_id
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), nullable=True)
+    day: Mapped[date] = mapped_column(Date, nullable=True)
+    delivery_type: Mapped[str] = mapped_column(String(50), nullable=True)
+    branch_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    product_name: Mapped[str] = mapped_column(String(255), nullable=True)
+    orders: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    quantity: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
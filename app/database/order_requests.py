@@ -1,69 +1,101 @@
-from sqlalchemy import select, delete
+import hashlib
+from datetime import datetime
+from sqlalchemy import select, delete, insert, update, func, literal, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
-from app.database.models import BasketItem, Order, OrderItem, User, Product
+from app.database.models import BasketItem, Branch, Order, OrderItem, User, Product
+from app.database.stats_requests import CANCELLED, record_new_order, record_status_change
+from app.utils.money import to_tiyin, from_tiyin, sum_lines
+
+# Upper bound for the quantity of one basket line
+MAX_BASKET_QUANTITY = 99
+
+
+class BelowMinimumOrder(Exception):
+    """Raised by ``checkout`` when the basket total is below the delivery zone's minimum (tiyin)."""
+
+    def __init__(self, total: int, minimum: int):
+        super().__init__(f"Basket total {total} is below the minimum order {minimum}")
+        self.total = total
+        self.minimum = minimum
 
 
 # BASKET OPERATIONS
 async def get_basket_items(session: AsyncSession, user_id: int):
     result = await session.execute(
-        select(BasketItem).where(BasketItem.user_id == user_id)
+        select(BasketItem)
+        .options(joinedload(BasketItem.product))
+        .where(BasketItem.user_id == user_id)
+        .order_by(BasketItem.id)
     )
     return result.scalars().all()
 
 
 async def add_to_basket(session: AsyncSession, user_id: int, product_id: int, quantity: int = 1):
-    # Check if item already exists
+    """Set the quantity of a product in the basket, adding the line if needed (one UPSERT)."""
+    stmt = pg_insert(BasketItem).values(user_id=user_id, product_id=product_id, quantity=quantity)
     result = await session.execute(
-        select(BasketItem).where(
-            BasketItem.user_id == user_id,
-            BasketItem.product_id == product_id
-        )
+        stmt.on_conflict_do_update(
+            constraint='uq_basket_items_user_product',
+            set_={'quantity': stmt.excluded.quantity, 'updated_at': func.now()}
+        ).returning(BasketItem)
     )
-    basket_item = result.scalar_one_or_none()
-    
-    if basket_item:
-        basket_item.quantity = quantity
-    else:
-        basket_item = BasketItem(
-            user_id=user_id,
-            product_id=product_id,
-            quantity=quantity
-        )
-        session.add(basket_item)
-    
+    basket_item = result.scalar_one()
     await session.commit()
-    await session.refresh(basket_item)
     return basket_item
 
 
 async def update_basket_quantity(session: AsyncSession, user_id: int, product_id: int, quantity: int):
     if quantity < 1:
-        # Remove from basket
-        await session.execute(
-            delete(BasketItem).where(
-                BasketItem.user_id == user_id,
-                BasketItem.product_id == product_id
-            )
-        )
-        await session.commit()
+        await remove_from_basket(session, user_id, product_id)
         return None
-    
-    result = await session.execute(
-        select(BasketItem).where(
-            BasketItem.user_id == user_id,
-            BasketItem.product_id == product_id
+    return await add_to_basket(session, user_id, product_id, quantity)
+
+
+async def change_basket_quantity(session: AsyncSession, user_id: int, product_id: int, delta: int) -> int | None:
+    """Add ``delta`` to the basket quantity on the server, so concurrent taps never
+    overwrite each other. A line that drops below 1 is removed; quantities stop
+    at MAX_BASKET_QUANTITY.
+
+    Returns the new quantity, or None if the line is gone (or the product no longer exists).
+    """
+    if delta > 0:
+        # INSERT ... SELECT skips products deleted since the basket was rendered
+        stmt = pg_insert(BasketItem).from_select(
+            ['user_id', 'product_id', 'quantity'],
+            select(literal(user_id), Product.id, literal(min(delta, MAX_BASKET_QUANTITY))).where(Product.id == product_id)
         )
-    )
-    basket_item = result.scalar_one_or_none()
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_basket_items_user_product',
+            set_={
+                'quantity': func.least(BasketItem.quantity + stmt.excluded.quantity, MAX_BASKET_QUANTITY),
+                'updated_at': func.now()
+            }
+        ).returning(BasketItem.quantity)
+    else:
+        line = (BasketItem.user_id == user_id, BasketItem.product_id == product_id)
+        # Decrement and delete are mutually exclusive and run as one statement
+        decremented = (
+            update(BasketItem)
+            .where(*line, BasketItem.quantity > -delta)
+            .values(quantity=BasketItem.quantity + delta, updated_at=func.now())
+            .returning(BasketItem.quantity)
+            .cte('decremented')
+        )
+        removed = (
+            delete(BasketItem)
+            .where(*line, BasketItem.quantity <= -delta)
+            .returning(BasketItem.id)
+            .cte('removed')
+        )
+        stmt = select(decremented.c.quantity).add_cte(removed)
     
-    if basket_item:
-        basket_item.quantity = quantity
-        await session.commit()
-        await session.refresh(basket_item)
-        return basket_item
-    return None
+    result = await session.execute(stmt)
+    quantity = result.scalar_one_or_none()
+    await session.commit()
+    return quantity
 
 
 async def remove_from_basket(session: AsyncSession, user_id: int, product_id: int):
@@ -81,38 +113,161 @@ async def clear_basket(session: AsyncSession, user_id: int):
     await session.commit()
 
 
+async def reorder(session: AsyncSession, user_id: int, order_id: int):
+    """Put the items of one of the user's past orders back into the basket in one statement.
+
+    Each product gets at least the ordered quantity (a line already in the basket keeps
+    a larger quantity, so repeating the action changes nothing). Returns one row per
+    ordered product with its snapshot (``product_name``, ``old_price``), the current
+    ``name`` and ``price`` (None if the product was deleted) and the ``basket_quantity``
+    (None if it wasn't added). Empty if the order isn't the user's or has no items.
+    """
+    ordered = (
+        select(
+            OrderItem.product_id,
+            func.max(OrderItem.product_name).label('product_name'),
+            func.max(OrderItem.product_price).label('old_price'),
+            func.sum(OrderItem.quantity).label('quantity')
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(OrderItem.order_id == order_id, Order.user_id == user_id)
+        .group_by(OrderItem.product_id)
+        .cte('ordered')
+    )
+    # Matching against products drops deleted products from the insert
+    stmt = pg_insert(BasketItem).from_select(
+        ['user_id', 'product_id', 'quantity'],
+        select(literal(user_id), Product.id, func.least(ordered.c.quantity, MAX_BASKET_QUANTITY))
+        .where(Product.id == ordered.c.product_id)
+    )
+    added = stmt.on_conflict_do_update(
+        constraint='uq_basket_items_user_product',
+        set_={'quantity': func.greatest(BasketItem.quantity, stmt.excluded.quantity), 'updated_at': func.now()}
+    ).returning(BasketItem.product_id, BasketItem.quantity).cte('added')
+    
+    result = await session.execute(
+        select(
+            ordered.c.product_id,
+            ordered.c.product_name,
+            ordered.c.old_price,
+            Product.name,
+            Product.price,
+            added.c.quantity.label('basket_quantity')
+        )
+        .select_from(ordered)
+        .outerjoin(Product, Product.id == ordered.c.product_id)
+        .outerjoin(added, added.c.product_id == ordered.c.product_id)
+        .order_by(ordered.c.product_id)
+    )
+    lines = result.all()
+    await session.commit()
+    return lines
+
+
 # ORDER OPERATIONS
-async def create_order(session: AsyncSession, user_id: int, total_price: float, delivery_type: str = None, 
-                      branch_id: int = None, latitude: float = None, longitude: float = None, group_message_id: int = None):
-    order = Order(
-        user_id=user_id,
-        total_price=total_price,
-        status='waiting',
-        delivery_type=delivery_type,
-        branch_id=branch_id,
-        delivery_latitude=latitude,
-        delivery_longitude=longitude,
-        group_message_id=group_message_id
+def checkout_key(user_id: int, confirm_message_id: int) -> str:
+    """Idempotency key of a checkout.
+
+    The confirmation message stands for the version of the basket the user agreed
+    to: every prompt is a new message, and the basket itself is gone after the
+    first checkout, so a repeated tap can't be recognised by its contents.
+    """
+    return hashlib.sha256(f"{user_id}:{confirm_message_id}".encode()).hexdigest()
+
+
+async def get_checked_out_order(session: AsyncSession, key: str):
+    """The order stored under ``key`` and its items, or None."""
+    order = await session.scalar(select(Order).where(Order.checkout_key == key))
+    if order is None:
+        return None
+    return order, await get_order_items(session, order.id), False
+
+
+async def checkout(session: AsyncSession, user_id: int, delivery_type: str = None, branch_id: int = None,
+                   latitude: float = None, longitude: float = None, confirm_message_id: int = None,
+                   delivery_fee: int = None, min_order: int = 0):
+    """Turn the user's basket into an order in a single transaction.
+
+    The basket is snapshotted and cleared by one DELETE ... RETURNING, then the
+    order and all of its items are inserted with RETURNING. Either everything
+    is committed or nothing is, so an order can never be left without items
+    or next to an uncleared basket.
+
+    With ``confirm_message_id`` the order is stored under a ``checkout_key``; if
+    an order with that key already exists (a repeated tap on the same
+    confirmation), nothing is changed and that order is returned instead.
+
+    ``delivery_fee`` (tiyin) is stored with the order and added to its total. If the
+    items come to less than ``min_order`` (tiyin), nothing is changed and
+    BelowMinimumOrder is raised.
+
+    Returns ``(order, order_items, created)``, or ``None`` if the basket was empty.
+    """
+    key = checkout_key(user_id, confirm_message_id) if confirm_message_id is not None else None
+    result = await session.execute(
+        delete(BasketItem)
+        .where(BasketItem.user_id == user_id, BasketItem.product_id == Product.id)
+        .returning(BasketItem.id, BasketItem.product_id, BasketItem.quantity, Product.name, Product.price)
     )
-    session.add(order)
+    basket = sorted(result.all(), key=lambda row: row.id)
+    
+    if not basket:
+        await session.rollback()
+        # Emptied by this very checkout a moment ago (e.g. on another worker)?
+        return await get_checked_out_order(session, key) if key else None
+    
+    # Exact integer tiyin arithmetic; stored back as Numeric so'm
+    items_total = sum_lines((to_tiyin(row.price) for row in basket), (row.quantity for row in basket))
+    if items_total < min_order:
+        await session.rollback()
+        raise BelowMinimumOrder(items_total, min_order)
+    total_price = from_tiyin(items_total + (delivery_fee or 0))
+    
+    order = await session.scalar(
+        pg_insert(Order)
+        .values(
+            user_id=user_id,
+            total_price=total_price,
+            status='waiting',
+            delivery_type=delivery_type,
+            branch_id=branch_id,
+            delivery_latitude=latitude,
+            delivery_longitude=longitude,
+            delivery_fee=from_tiyin(delivery_fee) if delivery_fee is not None else None,
+            checkout_key=key
+        )
+        .on_conflict_do_nothing(constraint='uq_orders_checkout_key')
+        .returning(Order)
+    )
+    if order is None:
+        # Already checked out: keep the basket as it was and answer with the existing order
+        await session.rollback()
+        return await get_checked_out_order(session, key)
+    
+    order_items = (await session.scalars(
+        insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True),
+        [
+            {
+                'order_id': order.id,
+                'product_id': row.product_id,
+                'product_name': row.name,
+                'product_price': row.price,
+                'quantity': row.quantity
+            }
+            for row in basket
+        ]
+    )).all()
+    await record_new_order(session, order, order_items)
+    
     await session.commit()
-    await session.refresh(order)
-    return order
+    return order, order_items, True
 
 
-async def create_order_item(session: AsyncSession, order_id: int, product_id: int, 
-                           product_name: str, product_price: float, quantity: int):
-    order_item = OrderItem(
-        order_id=order_id,
-        product_id=product_id,
-        product_name=product_name,
-        product_price=product_price,
-        quantity=quantity
+async def set_order_group_message(session: AsyncSession, order_id: int, group_message_id: int):
+    await session.execute(
+        update(Order).where(Order.id == order_id).values(group_message_id=group_message_id)
     )
-    session.add(order_item)
     await session.commit()
-    await session.refresh(order_item)
-    return order_item
 
 
 async def get_order_by_id(session: AsyncSession, order_id: int):
@@ -120,25 +275,77 @@ async def get_order_by_id(session: AsyncSession, order_id: int):
     return result.scalar_one_or_none()
 
 
-async def get_user_orders(session: AsyncSession, user_id: int):
+async def get_order_history(session: AsyncSession, user_id: int, limit: int = 5,
+                            before: tuple[datetime, int] = None, after: tuple[datetime, int] = None):
+    """One page of a user's orders, newest first: ``(orders, has_newer, has_older)``.
+
+    Keyset pagination on ``(created_at, id)``: ``before`` / ``after`` is the key of the
+    last / first order of the neighbouring page. Each order is a light row (id,
+    total_price, status, delivery_type, created_at, item_count); items are not loaded.
+    """
+    key = tuple_(Order.created_at, Order.id)
+    page = select(
+        Order.id, Order.total_price, Order.status, Order.delivery_type, Order.created_at
+    ).where(Order.user_id == user_id)
+    if after is not None:
+        # Walk towards newer orders, then flip the page back to newest first
+        page = page.where(key > tuple_(*after)).order_by(Order.created_at, Order.id)
+    else:
+        if before is not None:
+            page = page.where(key < tuple_(*before))
+        page = page.order_by(Order.created_at.desc(), Order.id.desc())
+    # One extra row tells whether there is another page in the same direction
+    page = page.limit(limit + 1).subquery()
+    
     result = await session.execute(
-        select(Order).where(Order.user_id == user_id).order_by(Order.created_at.desc())
+        select(page, func.count(OrderItem.id).label('item_count'))
+        .outerjoin(OrderItem, OrderItem.order_id == page.c.id)
+        .group_by(*page.c)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
     )
-    return result.scalars().all()
+    orders = result.all()
+    more = len(orders) > limit
+    if after is not None:
+        return orders[-limit:], more, True
+    return orders[:limit], before is not None, more
+
+
+async def get_user_order(session: AsyncSession, user_id: int, order_id: int):
+    """The order with its branch, or None if it doesn't belong to the user."""
+    result = await session.execute(
+        select(Order)
+        .options(joinedload(Order.branch))
+        .where(Order.id == order_id, Order.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
 
 
 async def update_order_status(session: AsyncSession, order_id: int, status: str):
-    order = await get_order_by_id(session, order_id)
-    if order:
-        order.status = status
-        await session.commit()
-        await session.refresh(order)
+    """Set the status and move the order between the sales aggregates in one transaction."""
+    # Lock the row and read the previous status in the same statement as the update
+    previous = select(Order.id, Order.status).where(Order.id == order_id).with_for_update().cte('previous')
+    row = (await session.execute(
+        update(Order)
+        .where(Order.id == previous.c.id)
+        .values(status=status)
+        .returning(Order, previous.c.status)
+        .execution_options(synchronize_session=False)
+    )).one_or_none()
+    if row is None:
+        await session.rollback()
+        return None
+    
+    order, old_status = row
+    if old_status != status:
+        order_items = await get_order_items(session, order.id) if CANCELLED in (old_status, status) else None
+        await record_status_change(session, order, old_status, order_items)
+    await session.commit()
     return order
 
 
 async def get_order_items(session: AsyncSession, order_id: int):
     result = await session.execute(
-        select(OrderItem).where(OrderItem.order_id == order_id)
+        select(OrderItem).where(OrderItem.order_id == order_id).order_by(OrderItem.id)
     )
     return result.scalars().all()
 
@@ -148,10 +355,42 @@ async def get_user_by_id(session: AsyncSession, user_id: int):
     return result.scalar_one_or_none()
 
 
-async def get_basket_items_with_products(session, user_id: int):
-    result = await session.execute(
-        select(BasketItem)
-        .options(joinedload(BasketItem.product))
-        .where(BasketItem.user_id == user_id)
+# EXPORT
+async def stream_order_export_rows(session: AsyncSession, start: datetime = None, end: datetime = None,
+                                   batch_size: int = 2000):
+    """One row per order item (with its order, customer and branch) for orders created in
+    ``[start, end)``, oldest first.
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so memory use does not
+    depend on the number of orders.
+    """
+    stmt = (
+        select(
+            Order.id,
+            Order.created_at,
+            Order.status,
+            Order.delivery_type,
+            Order.total_price,
+            Branch.name.label('branch_name'),
+            User.tg_id,
+            User.full_name,
+            User.first_name,
+            User.phone_number,
+            OrderItem.product_name,
+            OrderItem.product_price,
+            OrderItem.quantity
+        )
+        .join(User, User.id == Order.user_id)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Branch, Branch.id == Order.branch_id)
+        .order_by(Order.id, OrderItem.id)
+        .execution_options(yield_per=batch_size)
     )
-    return result.scalars().all()
+    if start is not None:
+        stmt = stmt.where(Order.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Order.created_at < end)
+    
+    result = await session.stream(stmt)
+    async for row in result:
+        yield row
@@ -1,26 +1,48 @@
-from sqlalchemy import select, delete
+from decimal import Decimal
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.models import Product
+from app.database.catalog_cache import catalog_cache, CachedProduct, ProductPage, CATALOG_CHANNEL
 
+# Products per catalog page (keeps inline keyboards well below Telegram's markup limits)
+PRODUCTS_PAGE_SIZE = 10
 
+
+# Reads are served from the in-process catalog cache (see catalog_cache.py);
+# every write invalidates it locally and NOTIFYs other workers on commit.
 async def get_all_products(session: AsyncSession):
-    result = await session.execute(select(Product).order_by(Product.created_at.desc()))
-    return result.scalars().all()
+    return await catalog_cache.get_all(session)
 
 
 async def get_products_by_type(session: AsyncSession, product_type: str):
-    result = await session.execute(
-        select(Product).where(Product.type == product_type).order_by(Product.created_at.desc())
-    )
-    return result.scalars().all()
+    return await catalog_cache.get_by_type(session, product_type)
+
+
+async def get_products_page(session: AsyncSession, product_type: str | None = None, after_id: int = 0,
+                            limit: int = PRODUCTS_PAGE_SIZE) -> ProductPage:
+    """Keyset page of products (newest first) after the product ``after_id``; all types if ``product_type`` is None."""
+    return await catalog_cache.get_page(session, product_type, after_id, limit)
+
+
+async def get_product_by_id(session: AsyncSession, product_id: int) -> CachedProduct | None:
+    product = await catalog_cache.get_by_id(session, product_id)
+    if product is None:
+        # Possibly created by another worker since our last load
+        result = await session.execute(select(Product).where(Product.id == product_id))
+        row = result.scalar_one_or_none()
+        if row is not None:
+            catalog_cache.invalidate()
+            product = CachedProduct.from_model(row)
+    return product
 
 
-async def get_product_by_id(session: AsyncSession, product_id: int) -> Product | None:
-    result = await session.execute(select(Product).where(Product.id == product_id))
-    return result.scalar_one_or_none()
+async def _commit_catalog_change(session: AsyncSession):
+    await session.execute(select(func.pg_notify(CATALOG_CHANNEL, '')))
+    await session.commit()
+    catalog_cache.invalidate()
 
 
-async def create_product(session: AsyncSession, name: str, price: float, product_type: str, description: str = None, product_image: str = None) -> Product:
+async def create_product(session: AsyncSession, name: str, price: Decimal, product_type: str, description: str = None, product_image: str = None) -> Product:
     product = Product(
         name=name,
         price=price,
@@ -29,14 +51,14 @@ async def create_product(session: AsyncSession, name: str, price: float, product
         product_image=product_image
     )
     session.add(product)
-    await session.commit()
+    await _commit_catalog_change(session)
     await session.refresh(product)
     return product
 
 
-async def update_product(session: AsyncSession, product_id: int, name: str = None, 
-                        price: float = None, description: str = None, product_type: str = None, product_image: str = None) -> Product:
-    product = await get_product_by_id(session, product_id)
+async def update_product(session: AsyncSession, product_id: int, name: str = None,
+                        price: Decimal = None, description: str = None, product_type: str = None, product_image: str = None) -> Product:
+    product = await session.get(Product, product_id)
     if product:
         if name is not None:
             product.name = name
@@ -48,12 +70,12 @@ async def update_product(session: AsyncSession, product_id: int, name: str = Non
             product.type = product_type
         if product_image is not None:
             product.product_image = product_image
-        await session.commit()
+        await _commit_catalog_change(session)
         await session.refresh(product)
     return product
 
 
 async def delete_product(session: AsyncSession, product_id: int) -> bool:
     result = await session.execute(delete(Product).where(Product.id == product_id))
-    await session.commit()
+    await _commit_catalog_change(session)
     return result.rowcount > 0
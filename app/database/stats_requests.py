@@ -0,0 +1,246 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from sqlalchemy import BigInteger, cast, insert, select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.models import Branch, SalesDaily, SalesByStatus, SalesByProduct, SalesByBranch, SalesDelta
+from app.utils.money import to_tiyin
+
+# Orders with this status don't count as sales (they stay in SalesByStatus only)
+CANCELLED = 'cancelled'
+
+
+@dataclass(frozen=True, slots=True)
+class SalesStats:
+    days: list  # (day, orders, revenue) for every day of the period, oldest first
+    statuses: list  # (status, orders, revenue)
+    delivery_types: list  # (delivery_type, orders, revenue) over all time
+    top_products: list  # (product_name, quantity, revenue)
+    branches: list  # (branch_name, orders, revenue)
+
+
+def _total(column):
+    # SUM(bigint) is numeric in Postgres; keep tiyin amounts as ints
+    return cast(func.sum(column), BigInteger)
+
+
+def _delta(**fields) -> dict:
+    """A sales_deltas row; the key that is set picks the aggregate it goes to."""
+    row = dict.fromkeys(
+        ('status', 'day', 'delivery_type', 'branch_id', 'product_id', 'product_name'), None
+    )
+    row.update(orders=0, quantity=0, revenue=0)
+    row.update(fields)
+    return row
+
+
+def _sales_deltas(order, order_items, sign: int) -> list[dict]:
+    revenue = sign * to_tiyin(order.total_price)
+    deltas = [_delta(
+        day=order.created_at.date(),
+        delivery_type=order.delivery_type or 'unknown',
+        orders=sign,
+        revenue=revenue
+    )]
+    if order.branch_id is not None:
+        deltas.append(_delta(branch_id=order.branch_id, orders=sign, revenue=revenue))
+    deltas += [
+        _delta(
+            product_id=item.product_id,
+            product_name=item.product_name,
+            quantity=sign * item.quantity,
+            revenue=sign * to_tiyin(item.product_price) * item.quantity
+        )
+        for item in sorted(order_items or (), key=lambda item: item.product_id)
+    ]
+    return deltas
+
+
+async def _append(session: AsyncSession, deltas: list[dict]):
+    # A plain INSERT: checkouts and status changes never wait on each other here
+    await session.execute(insert(SalesDelta).values(deltas))
+
+
+async def record_new_order(session: AsyncSession, order, order_items):
+    """Count a just inserted order; call inside the checkout transaction (no commit)."""
+    deltas = [_delta(status=order.status, orders=1, revenue=to_tiyin(order.total_price))]
+    if order.status != CANCELLED:
+        deltas += _sales_deltas(order, order_items, 1)
+    await _append(session, deltas)
+
+
+async def record_status_change(session: AsyncSession, order, old_status: str, order_items=None):
+    """Move an order between statuses; call inside the status update transaction (no commit).
+
+    ``order_items`` are only needed when the order is cancelled or restored.
+    """
+    if old_status == order.status:
+        return
+    revenue = to_tiyin(order.total_price)
+    deltas = [
+        _delta(status=old_status, orders=-1, revenue=-revenue),
+        _delta(status=order.status, orders=1, revenue=revenue)
+    ]
+    if (old_status == CANCELLED) != (order.status == CANCELLED):
+        deltas += _sales_deltas(order, order_items, -1 if order.status == CANCELLED else 1)
+    await _append(session, deltas)
+
+
+# Folds every committed delta into the aggregates in one statement. Only the rollup
+# writes the aggregate rows, one worker at a time (ROLLUP_LOCK), and each table is
+# upserted in key order, so their row locks are always taken in the same order
+ROLLUP_LOCK = 0x5a1e5
+ROLLUP_SQL = """
+WITH moved AS (
+    DELETE FROM sales_deltas RETURNING *
+), by_status AS (
+    INSERT INTO sales_by_status (status, orders, revenue)
+    SELECT status, SUM(orders)::bigint, SUM(revenue)::bigint
+    FROM moved WHERE status IS NOT NULL
+    GROUP BY 1 ORDER BY 1
+    ON CONFLICT (status) DO UPDATE
+    SET orders = sales_by_status.orders + excluded.orders, revenue = sales_by_status.revenue + excluded.revenue
+), daily AS (
+    INSERT INTO sales_daily (day, delivery_type, orders, revenue)
+    SELECT day, delivery_type, SUM(orders)::bigint, SUM(revenue)::bigint
+    FROM moved WHERE day IS NOT NULL
+    GROUP BY 1, 2 ORDER BY 1, 2
+    ON CONFLICT (day, delivery_type) DO UPDATE
+    SET orders = sales_daily.orders + excluded.orders, revenue = sales_daily.revenue + excluded.revenue
+), by_branch AS (
+    INSERT INTO sales_by_branch (branch_id, orders, revenue)
+    SELECT branch_id, SUM(orders)::bigint, SUM(revenue)::bigint
+    FROM moved WHERE branch_id IS NOT NULL
+    GROUP BY 1 ORDER BY 1
+    ON CONFLICT (branch_id) DO UPDATE
+    SET orders = sales_by_branch.orders + excluded.orders, revenue = sales_by_branch.revenue + excluded.revenue
+), by_product AS (
+    INSERT INTO sales_by_product (product_id, product_name, quantity, revenue)
+    SELECT product_id, (array_agg(product_name ORDER BY id DESC))[1], SUM(quantity)::bigint, SUM(revenue)::bigint
+    FROM moved WHERE product_id IS NOT NULL
+    GROUP BY 1 ORDER BY 1
+    ON CONFLICT (product_id) DO UPDATE
+    SET product_name = excluded.product_name,
+        quantity = sales_by_product.quantity + excluded.quantity,
+        revenue = sales_by_product.revenue + excluded.revenue
+)
+SELECT COUNT(*) FROM moved
+"""
+
+
+async def roll_up_sales(session: AsyncSession, wait: bool = True) -> int:
+    """Fold pending sales deltas into the aggregate tables; returns how many were folded.
+
+    With ``wait=False`` nothing is done (0) while another worker is rolling up.
+    """
+    if wait:
+        await session.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK)))
+    elif not await session.scalar(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK))):
+        await session.rollback()
+        return 0
+    folded = await session.scalar(text(ROLLUP_SQL))
+    await session.commit()
+    return folded
+
+
+async def roll_up_sales_periodically(session_maker, interval: float):
+    """Run ``roll_up_sales`` every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_maker() as session:
+                await roll_up_sales(session, wait=False)
+        except Exception as e:
+            logging.warning("Failed to roll up sales deltas: %s", e)
+
+
+async def get_sales_stats(session: AsyncSession, days: int = 7, top: int = 5, top_branches: int = 10) -> SalesStats:
+    """Everything the statistics screen shows, read from the aggregate tables only
+    (after folding in the deltas that are still pending)."""
+    await roll_up_sales(session)
+    # The database's date, like the created_at::date the daily rows are keyed by
+    today = await session.scalar(select(func.current_date()))
+    since = today - timedelta(days=days - 1)
+
+    daily = await session.execute(
+        select(SalesDaily.day, _total(SalesDaily.orders), _total(SalesDaily.revenue))
+        .where(SalesDaily.day >= since)
+        .group_by(SalesDaily.day)
+    )
+    by_day = {day: (orders, revenue) for day, orders, revenue in daily}
+
+    statuses = await session.execute(
+        select(SalesByStatus.status, SalesByStatus.orders, SalesByStatus.revenue)
+        .where(SalesByStatus.orders > 0)
+        .order_by(SalesByStatus.orders.desc())
+    )
+    delivery_types = await session.execute(
+        select(SalesDaily.delivery_type, _total(SalesDaily.orders), _total(SalesDaily.revenue))
+        .group_by(SalesDaily.delivery_type)
+        .order_by(_total(SalesDaily.orders).desc())
+    )
+    top_products = await session.execute(
+        select(SalesByProduct.product_name, SalesByProduct.quantity, SalesByProduct.revenue)
+        .where(SalesByProduct.quantity > 0)
+        .order_by(SalesByProduct.quantity.desc())
+        .limit(top)
+    )
+    branches = await session.execute(
+        select(func.coalesce(Branch.name, "O'chirilgan filial"), SalesByBranch.orders, SalesByBranch.revenue)
+        .outerjoin(Branch, Branch.id == SalesByBranch.branch_id)
+        .where(SalesByBranch.orders > 0)
+        .order_by(SalesByBranch.orders.desc())
+        .limit(top_branches)
+    )
+
+    return SalesStats(
+        days=[
+            (day, *by_day.get(day, (0, 0)))
+            for day in (since + timedelta(days=i) for i in range(days))
+        ],
+        statuses=statuses.all(),
+        delivery_types=delivery_types.all(),
+        top_products=top_products.all(),
+        branches=branches.all()
+    )
+
+
+# Recomputes every aggregate from orders (full scans, for repairs and benchmarks);
+# migration 0004 backfills the tables with the same queries
+REBUILD_SQL = [
+    # Pending deltas are already counted in orders
+    "TRUNCATE sales_deltas, sales_daily, sales_by_status, sales_by_product, sales_by_branch",
+    """
+    INSERT INTO sales_daily (day, delivery_type, orders, revenue)
+    SELECT created_at::date, COALESCE(delivery_type, 'unknown'), COUNT(*), SUM(ROUND(total_price * 100))::bigint
+    FROM orders WHERE status <> 'cancelled'
+    GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO sales_by_status (status, orders, revenue)
+    SELECT status, COUNT(*), SUM(ROUND(total_price * 100))::bigint
+    FROM orders
+    GROUP BY 1
+    """,
+    """
+    INSERT INTO sales_by_product (product_id, product_name, quantity, revenue)
+    SELECT i.product_id, (array_agg(i.product_name ORDER BY i.id DESC))[1],
+           SUM(i.quantity), SUM(ROUND(i.product_price * 100) * i.quantity)::bigint
+    FROM order_items i JOIN orders o ON o.id = i.order_id
+    WHERE o.status <> 'cancelled'
+    GROUP BY 1
+    """,
+    """
+    INSERT INTO sales_by_branch (branch_id, orders, revenue)
+    SELECT branch_id, COUNT(*), SUM(ROUND(total_price * 100))::bigint
+    FROM orders WHERE status <> 'cancelled' AND branch_id IS NOT NULL
+    GROUP BY 1
+    """,
+]
+
+
+async def rebuild_sales_stats(session: AsyncSession):
+    for sql in REBUILD_SQL:
+        await session.execute(text(sql))
+    await session.commit()
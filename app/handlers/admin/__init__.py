@@ -2,8 +2,14 @@ from aiogram import Router
 from .panel import router as panel_router
 from .products import router as products_router
 from .branches import router as branches_router
+from .export import router as export_router
+from .stats import router as stats_router
+from .zones import router as zones_router
 
 router = Router()
 router.include_router(panel_router)
 router.include_router(products_router)
 router.include_router(branches_router)
+router.include_router(export_router)
+router.include_router(stats_router)
+router.include_router(zones_router)
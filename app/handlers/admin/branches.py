@@ -24,15 +24,29 @@ from app.keyboards.inline import (
 router = Router()
 
 
+NO_COORDINATES_HINT = (
+    "ℹ️ Xaritadagi nuqta yo'q: filial eng yaqin filiallar ro'yxatida ko'rinmaydi. "
+    "Uni keyinroq \"📍 Joylashuvni tahrirlash\" orqali yuborishingiz mumkin."
+)
+
+
+def describe_coordinates(branch) -> str:
+    if branch.latitude is None:
+        return "belgilanmagan"
+    return f"{float(branch.latitude):.6f}, {float(branch.longitude):.6f}"
+
+
 class BranchStates(StatesGroup):
     waiting_for_name = State()
     waiting_for_location = State()
+    waiting_for_address = State()
     waiting_for_description = State()
     waiting_for_image = State()
     editing_name = State()
     editing_location = State()
     editing_description = State()
     editing_image = State()
+    editing_chat = State()
 
 
 @router.callback_query(F.data == "admin_branches")
@@ -96,11 +110,14 @@ async def view_branch_detail(callback: CallbackQuery):
     no_desc = "Tavsif yo'q"
     no_img = "Rasm yo'q"
     has_img = "Ha"
+    default_chat = "umumiy guruh"
     
     text = (
         f"🏢 <b>{branch.name}</b>\n\n"
         f"📝 Tavsif: {branch.description or no_desc}\n"
         f"📍 Joylashuv: {branch.location}\n"
+        f"🗺 Xaritada: {describe_coordinates(branch)}\n"
+        f"💬 Buyurtmalar chati: {branch.notify_chat_id or default_chat}\n"
         f"🖼 Rasm: {has_img if branch.image else no_img}\n\n"
         f"📅 Yaratilgan: {branch.created_at.strftime('%Y-%m-%d %H:%M')}\n"
         f"🔄 Yangilangan: {branch.updated_at.strftime('%Y-%m-%d %H:%M')}"
@@ -138,16 +155,49 @@ async def process_branch_name(message: Message, state: FSMContext):
     await state.update_data(name=message.text)
     await message.answer(
         f"✅ Filial nomi: <b>{message.text}</b>\n\n"
-        "Endi joylashuvni kiriting (Google Maps havolasi yoki manzil):"
+        "Endi filial joylashuvini yuboring (📎 → Joylashuv).\n"
+        "Yoki faqat manzilni matn bilan kiriting:"
     )
     await state.set_state(BranchStates.waiting_for_location)
 
 
+@router.message(BranchStates.waiting_for_location, F.location)
+async def process_branch_point(message: Message, state: FSMContext):
+    await state.update_data(latitude=message.location.latitude, longitude=message.location.longitude)
+    
+    # A venue already carries the address
+    if message.venue:
+        await state.update_data(location=f"{message.venue.title}, {message.venue.address}")
+        await message.answer(
+            f"✅ Joylashuv saqlandi: {message.venue.address}\n\n"
+            "Endi filial tavsifini kiriting (yoki o'tkazib yuborish uchun /skip yuboring):"
+        )
+        await state.set_state(BranchStates.waiting_for_description)
+        return
+    
+    await message.answer(
+        "✅ Xaritadagi nuqta saqlandi\n\n"
+        "Endi manzilni matn bilan kiriting (mijozlar ro'yxatda shuni ko'radi):"
+    )
+    await state.set_state(BranchStates.waiting_for_address)
+
+
+@router.message(BranchStates.waiting_for_address)
+async def process_branch_address(message: Message, state: FSMContext):
+    await state.update_data(location=message.text)
+    await message.answer(
+        f"✅ Manzil saqlandi\n\n"
+        "Endi filial tavsifini kiriting (yoki o'tkazib yuborish uchun /skip yuboring):"
+    )
+    await state.set_state(BranchStates.waiting_for_description)
+
+
 @router.message(BranchStates.waiting_for_location)
 async def process_branch_location(message: Message, state: FSMContext):
     await state.update_data(location=message.text)
     await message.answer(
         f"✅ Joylashuv saqlandi\n\n"
+        f"{NO_COORDINATES_HINT}\n\n"
         "Endi filial tavsifini kiriting (yoki o'tkazib yuborish uchun /skip yuboring):"
     )
     await state.set_state(BranchStates.waiting_for_description)
@@ -179,7 +229,9 @@ async def process_branch_image(message: Message, state: FSMContext):
             name=data['name'],
             location=data['location'],
             description=data.get('description'),
-            image=file_id
+            image=file_id,
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude')
         )
     
     no_desc = "Tavsif yo'q"
@@ -210,7 +262,9 @@ async def skip_branch_image(message: Message, state: FSMContext):
             name=data['name'],
             location=data['location'],
             description=data.get('description'),
-            image=None
+            image=None,
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude')
         )
     
     from app.keyboards.inline import get_branches_panel_keyboard
@@ -267,6 +321,7 @@ async def edit_branch_menu(callback: CallbackQuery, state: FSMContext):
             [InlineKeyboardButton(text="📍 Joylashuvni tahrirlash", callback_data=f"edit_branch_location_{branch_id}")],
             [InlineKeyboardButton(text="📄 Tavsifni tahrirlash", callback_data=f"edit_branch_desc_{branch_id}")],
             [InlineKeyboardButton(text="🖼 Rasmni tahrirlash", callback_data=f"edit_branch_image_{branch_id}")],
+            [InlineKeyboardButton(text="💬 Buyurtmalar chatini tahrirlash", callback_data=f"edit_branch_chat_{branch_id}")],
             [InlineKeyboardButton(text="🔙 Ortga", callback_data="admin_edit_branch")]
         ]
     )
@@ -278,6 +333,7 @@ async def edit_branch_menu(callback: CallbackQuery, state: FSMContext):
     text = (
         f"✏️ <b>Tahrirlanmoqda: {branch.name}</b>\n\n"
         f"Joriy joylashuv: {branch.location}\n"
+        f"Xaritada: {describe_coordinates(branch)}\n"
         f"Joriy tavsif: {branch.description or no_desc}\n"
         f"Joriy rasm: {has_img if branch.image else no_img}\n\n"
         "Nimani tahrirlashni xohlaysiz?"
@@ -329,13 +385,36 @@ async def edit_branch_location_start(callback: CallbackQuery, state: FSMContext)
     await state.update_data(branch_id=branch_id)
     await callback.message.edit_text(
         "✏️ <b>Filial joylashuvini tahrirlash</b>\n\n"
-        "Iltimos, yangi joylashuvni kiriting:",
+        "Xaritadagi nuqtani yuboring (📎 → Joylashuv) yoki yangi manzilni matn bilan kiriting:",
         reply_markup=get_cancel_keyboard()
     )
     await state.set_state(BranchStates.editing_location)
     await callback.answer()
 
 
+@router.message(BranchStates.editing_location, F.location)
+async def process_edit_branch_point(message: Message, state: FSMContext):
+    data = await state.get_data()
+    branch_id = data['branch_id']
+    
+    async with async_session_maker() as session:
+        branch = await update_branch(
+            session,
+            branch_id,
+            location=f"{message.venue.title}, {message.venue.address}" if message.venue else None,
+            latitude=message.location.latitude,
+            longitude=message.location.longitude
+        )
+    
+    await message.answer(
+        f"✅ <b>Filial joylashuvi yangilandi!</b>\n\n"
+        f"Manzil: {branch.location}\n"
+        f"Xaritada: {describe_coordinates(branch)}",
+        reply_markup=get_branches_panel_keyboard()
+    )
+    await state.clear()
+
+
 @router.message(BranchStates.editing_location)
 async def process_edit_branch_location(message: Message, state: FSMContext):
     data = await state.get_data()
@@ -434,6 +513,45 @@ async def remove_branch_image(message: Message, state: FSMContext):
     await state.clear()
 
 
+@router.callback_query(F.data.startswith("edit_branch_chat_"))
+async def edit_branch_chat_start(callback: CallbackQuery, state: FSMContext):
+    branch_id = int(callback.data.split("_")[3])
+    await state.update_data(branch_id=branch_id)
+    await callback.message.edit_text(
+        "✏️ <b>Buyurtmalar chatini tahrirlash</b>\n\n"
+        "Shu filial buyurtmalari yuboriladigan guruh ID raqamini kiriting "
+        "(masalan, <code>-1001234567890</code>; bot guruhga qo'shilgan bo'lishi kerak).\n"
+        "Umumiy guruhga qaytarish uchun /skip yuboring:",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(BranchStates.editing_chat)
+    await callback.answer()
+
+
+@router.message(BranchStates.editing_chat, F.text)
+async def process_edit_branch_chat(message: Message, state: FSMContext):
+    try:
+        # 0 resets the branch to the common GROUP_ID
+        chat_id = 0 if message.text == "/skip" else int(message.text.strip())
+    except ValueError:
+        await message.answer("❌ Noto'g'ri ID! Masalan: <code>-1001234567890</code>")
+        return
+    
+    data = await state.get_data()
+    branch_id = data['branch_id']
+    
+    async with async_session_maker() as session:
+        branch = await update_branch(session, branch_id, notify_chat_id=chat_id)
+    
+    await message.answer(
+        f"✅ <b>Buyurtmalar chati yangilandi!</b>\n\n"
+        f"Filial: {branch.name}\n"
+        f"Chat: {branch.notify_chat_id or 'umumiy guruh'}",
+        reply_markup=get_branches_panel_keyboard()
+    )
+    await state.clear()
+
+
 # DELETE BRANCH
 @router.callback_query(F.data == "admin_delete_branch")
 async def start_delete_branch(callback: CallbackQuery):
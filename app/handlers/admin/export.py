@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from aiogram import Router, F, Bot
+from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from app.config import ADMIN_ID
+from app.database.engine import async_session_maker
+from app.database.order_requests import stream_order_export_rows
+from app.keyboards.inline import get_export_period_keyboard, get_export_format_keyboard, get_cancel_keyboard
+from app.utils.order_export import DOCUMENT_SIZE_LIMIT, XLSX_AVAILABLE, write_csv, write_xlsx, zip_file
+
+router = Router()
+
+
+class ExportStates(StatesGroup):
+    waiting_for_range = State()
+
+
+def period_range(period: str) -> tuple[date | None, date | None]:
+    """``[start, end)`` of a preset period; None means unbounded."""
+    today = date.today()
+    if period == "today":
+        return today, None
+    if period in ("7", "30"):
+        return today - timedelta(days=int(period) - 1), None
+    return None, None
+
+
+def describe_range(start: date | None, end: date | None) -> str:
+    if start is None and end is None:
+        return "barcha vaqt"
+    first = start.isoformat() if start else "boshidan"
+    last = (end - timedelta(days=1)).isoformat() if end else date.today().isoformat()
+    return f"{first} — {last}"
+
+
+async def ask_format(message: Message, state: FSMContext, start: date | None, end: date | None, edit: bool):
+    await state.set_state(None)
+    await state.update_data(
+        export_start=start.isoformat() if start else None,
+        export_end=end.isoformat() if end else None
+    )
+    text = (
+        f"📤 <b>Buyurtmalarni eksport qilish</b>\n\n"
+        f"📅 Davr: {describe_range(start, end)}\n\n"
+        "Fayl formatini tanlang:"
+    )
+    keyboard = get_export_format_keyboard(XLSX_AVAILABLE)
+    if edit:
+        await message.edit_text(text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data == "admin_export")
+async def export_menu(callback: CallbackQuery, state: FSMContext):
+    if str(callback.from_user.id) != str(ADMIN_ID):
+        await callback.answer("⛔️ Ruxsat yo'q", show_alert=True)
+        return
+    
+    await state.clear()
+    await callback.message.edit_text(
+        "📤 <b>Buyurtmalarni eksport qilish</b>\n\n"
+        "Qaysi davrdagi buyurtmalar kerak?",
+        reply_markup=get_export_period_keyboard()
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("export_period_"))
+async def choose_export_period(callback: CallbackQuery, state: FSMContext):
+    period = callback.data.removeprefix("export_period_")
+    
+    if period == "custom":
+        await state.set_state(ExportStates.waiting_for_range)
+        await callback.message.edit_text(
+            "📅 Sanalar oralig'ini yuboring (ikkala kun ham kiradi):\n\n"
+            "<code>2026-10-01 2026-10-18</code>",
+            reply_markup=get_cancel_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    start, end = period_range(period)
+    await ask_format(callback.message, state, start, end, edit=True)
+    await callback.answer()
+
+
+@router.message(ExportStates.waiting_for_range, F.text)
+async def process_export_range(message: Message, state: FSMContext):
+    try:
+        first, last = (date.fromisoformat(part) for part in message.text.split())
+    except ValueError:
+        await message.answer(
+            "❌ Noto'g'ri format. Masalan: <code>2026-10-01 2026-10-18</code>",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+    
+    if last < first:
+        first, last = last, first
+    await ask_format(message, state, first, last + timedelta(days=1), edit=False)
+
+
+@router.callback_query(F.data.in_({"export_csv", "export_xlsx"}))
+async def export_orders(callback: CallbackQuery, state: FSMContext, bot: Bot):
+    if str(callback.from_user.id) != str(ADMIN_ID):
+        await callback.answer("⛔️ Ruxsat yo'q", show_alert=True)
+        return
+    
+    data = await state.get_data()
+    # Both keys are set (None = unbounded) once a period is chosen; without them the
+    # button is from an older menu or the state is gone, so nothing is exported
+    if 'export_start' not in data or 'export_end' not in data:
+        await callback.answer("⌛️ Sessiya eskirgan. Davrni qaytadan tanlang.", show_alert=True)
+        await callback.message.edit_text(
+            "📤 <b>Buyurtmalarni eksport qilish</b>\n\n"
+            "Qaysi davrdagi buyurtmalar kerak?",
+            reply_markup=get_export_period_keyboard()
+        )
+        return
+    start = date.fromisoformat(data['export_start']) if data['export_start'] else None
+    end = date.fromisoformat(data['export_end']) if data['export_end'] else None
+    extension = callback.data.removeprefix("export_")
+    
+    await callback.answer()
+    await callback.message.edit_text("⏳ Eksport tayyorlanmoqda, biroz kuting...")
+    
+    filename = f"buyurtmalar_{describe_range(start, end).replace(' — ', '_').replace(' ', '_')}.{extension}"
+    fd, path = tempfile.mkstemp(suffix=f".{extension}")
+    os.close(fd)
+    paths = [path]
+    try:
+        # Rows go from a server-side cursor straight into the file, so memory stays flat
+        async with async_session_maker() as session:
+            rows = stream_order_export_rows(
+                session,
+                datetime.combine(start, datetime.min.time()) if start else None,
+                datetime.combine(end, datetime.min.time()) if end else None
+            )
+            writer = write_csv if extension == "csv" else write_xlsx
+            count = await writer(rows, path)
+        
+        if not count:
+            await callback.message.edit_text(
+                f"📭 {describe_range(start, end)} davrida buyurtmalar yo'q.",
+                reply_markup=get_export_period_keyboard()
+            )
+            return
+        
+        if os.path.getsize(path) > DOCUMENT_SIZE_LIMIT and extension == "csv":
+            path = await asyncio.to_thread(zip_file, path, filename)
+            paths.append(path)
+            filename += ".zip"
+        
+        if os.path.getsize(path) > DOCUMENT_SIZE_LIMIT:
+            await callback.message.edit_text(
+                "❌ Fayl Telegram uchun juda katta (50 MB dan ortiq). Qisqaroq davrni tanlang.",
+                reply_markup=get_export_period_keyboard()
+            )
+            return
+        
+        await bot.send_document(
+            callback.message.chat.id,
+            FSInputFile(path, filename=filename),
+            caption=f"📤 Buyurtmalar: {describe_range(start, end)}\n📦 Qatorlar: {count}"
+        )
+        await callback.message.edit_text("✅ Eksport tayyor!", reply_markup=get_export_period_keyboard())
+    except Exception as e:
+        logging.error("Order export failed: %s", e)
+        await callback.message.edit_text("❌ Eksportda xatolik yuz berdi.", reply_markup=get_export_period_keyboard())
+    finally:
+        for temp_path in paths:
+            os.remove(temp_path)
+        # Every outcome uses up the chosen period; another tap has to choose again
+        await state.clear()
@@ -5,7 +5,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.database.engine import async_session_maker
 from app.database.product_requests import (
-    get_all_products, 
+    get_products_page, 
     get_product_by_id, 
     create_product, 
     update_product, 
@@ -20,6 +20,7 @@ from app.keyboards.inline import (
     get_confirm_delete_keyboard,
     get_cancel_keyboard
 )
+from app.utils.money import format_som, from_tiyin, parse_som, to_tiyin
 
 router = Router()
 
@@ -37,12 +38,17 @@ class ProductStates(StatesGroup):
     editing_image = State()
 
 
-@router.callback_query(F.data == "admin_view_products")
+def page_anchor(data: str, prefix: str) -> int:
+    # "{prefix}" opens the first page, "{prefix}_{after_id}" a later one
+    return int(data[len(prefix) + 1:] or 0)
+
+
+@router.callback_query((F.data == "admin_view_products") | F.data.startswith("admin_view_products_"))
 async def view_all_products(callback: CallbackQuery):
     async with async_session_maker() as session:
-        products = await get_all_products(session)
+        page = await get_products_page(session, after_id=page_anchor(callback.data, "admin_view_products"))
     
-    if not products:
+    if not page.products:
         text = (
             "📦 <b>Mahsulotlar ro'yxati</b>\n\n"
             "Mahsulotlar topilmadi. Birinchi mahsulotingizni qo'shing!"
@@ -51,10 +57,10 @@ async def view_all_products(callback: CallbackQuery):
     else:
         text = (
             f"📦 <b>Mahsulotlar ro'yxati</b>\n\n"
-            f"Jami mahsulotlar: {len(products)}\n"
+            f"Jami mahsulotlar: {page.total}\n"
             "Batafsil ma'lumot olish uchun mahsulotni tanlang:"
         )
-        markup = get_product_list_keyboard(products)
+        markup = get_product_list_keyboard(page)
     
     # Check if current message has photo (no text to edit)
     if callback.message.photo:
@@ -83,7 +89,7 @@ async def view_product_detail(callback: CallbackQuery):
     
     text = (
         f"📦 <b>{product.name}</b>\n\n"
-        f"💰 Narxi: {product.price} so'm\n"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}\n"
         f"🏷 Turi: {product.type}\n"
         f"📝 Tavsif: {product.description or no_desc}\n"
         f"🖼 Rasm: {has_img if product.product_image else no_img}\n\n"
@@ -131,11 +137,9 @@ async def process_product_name(message: Message, state: FSMContext):
 @router.message(ProductStates.waiting_for_price)
 async def process_product_price(message: Message, state: FSMContext):
     try:
-        price = float(message.text)
-        if price <= 0:
-            raise ValueError()
-        
-        await state.update_data(price=price)
+        price = parse_som(message.text)
+        # Stored as integer tiyin: exact and JSON-serializable for the FSM storage
+        await state.update_data(price_tiyin=price)
         
         keyboard = InlineKeyboardMarkup(
             inline_keyboard=[
@@ -146,7 +150,7 @@ async def process_product_price(message: Message, state: FSMContext):
         )
         
         await message.answer(
-            f"✅ Narxi: <b>{price} so'm</b>\n\n"
+            f"✅ Narxi: <b>{format_som(price)}</b>\n\n"
             "Endi mahsulot turini tanlang:",
             reply_markup=keyboard
         )
@@ -191,7 +195,7 @@ async def process_product_image(message: Message, state: FSMContext):
         product = await create_product(
             session,
             name=data['name'],
-            price=data['price'],
+            price=from_tiyin(data['price_tiyin']),
             product_type=data['type'],
             description=data.get('description'),
             product_image=file_id
@@ -200,7 +204,7 @@ async def process_product_image(message: Message, state: FSMContext):
     text = (
         f"✅ <b>Mahsulot muvaffaqiyatli qo'shildi!</b>\n\n"
         f"📦 Nomi: {product.name}\n"
-        f"💰 Narxi: {product.price} so'm\n"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}\n"
         f"🏷 Turi: {product.type}\n"
         f"📝 Tavsif: {product.description or no_desc}"
     )
@@ -221,7 +225,7 @@ async def skip_product_image(message: Message, state: FSMContext):
         product = await create_product(
             session,
             name=data['name'],
-            price=data['price'],
+            price=from_tiyin(data['price_tiyin']),
             product_type=data['type'],
             description=data.get('description'),
             product_image=None
@@ -230,7 +234,7 @@ async def skip_product_image(message: Message, state: FSMContext):
     await message.answer(
         f"✅ <b>Mahsulot muvaffaqiyatli qo'shildi!</b>\n\n"
         f"📦 Nomi: {product.name}\n"
-        f"💰 Narxi: {product.price} so'm\n"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}\n"
         f"🏷 Turi: {product.type}\n"
         f"📝 Tavsif: {product.description or no_desc}",
         reply_markup=get_admin_panel_keyboard()
@@ -239,12 +243,12 @@ async def skip_product_image(message: Message, state: FSMContext):
 
 
 # EDIT PRODUCT
-@router.callback_query(F.data == "admin_edit_product")
+@router.callback_query((F.data == "admin_edit_product") | F.data.startswith("admin_edit_product_"))
 async def start_edit_product(callback: CallbackQuery):
     async with async_session_maker() as session:
-        products = await get_all_products(session)
+        page = await get_products_page(session, after_id=page_anchor(callback.data, "admin_edit_product"))
     
-    if not products:
+    if not page.products:
         await callback.message.edit_text(
             "📦 Tahrirlash uchun mahsulotlar mavjud emas.\n"
             "Avval mahsulotlar qo'shing!",
@@ -254,7 +258,7 @@ async def start_edit_product(callback: CallbackQuery):
         await callback.message.edit_text(
             "✏️ <b>Mahsulotni tahrirlash</b>\n\n"
             "Tahrirlash uchun mahsulotni tanlang:",
-            reply_markup=get_product_edit_keyboard(products)
+            reply_markup=get_product_edit_keyboard(page)
         )
     await callback.answer()
 
@@ -289,7 +293,7 @@ async def edit_product_menu(callback: CallbackQuery, state: FSMContext):
     
     text = (
         f"✏️ <b>Tahrirlanmoqda: {product.name}</b>\n\n"
-        f"Joriy narx: {product.price} so'm\n"
+        f"Joriy narx: {format_som(to_tiyin(product.price))}\n"
         f"Joriy tur: {product.type}\n"
         f"Joriy tavsif: {product.description or no_desc}\n"
         f"Joriy rasm: {has_img if product.product_image else no_img}\n\n"
@@ -351,19 +355,17 @@ async def edit_price_start(callback: CallbackQuery, state: FSMContext):
 @router.message(ProductStates.editing_price)
 async def process_edit_price(message: Message, state: FSMContext):
     try:
-        price = float(message.text)
-        if price <= 0:
-            raise ValueError()
+        price = parse_som(message.text)
         
         data = await state.get_data()
         product_id = data['product_id']
         
         async with async_session_maker() as session:
-            product = await update_product(session, product_id, price=price)
+            product = await update_product(session, product_id, price=from_tiyin(price))
         
         await message.answer(
             f"✅ <b>Mahsulot narxi yangilandi!</b>\n\n"
-            f"Yangi narx: {product.price} so'm",
+            f"Yangi narx: {format_som(to_tiyin(product.price))}",
             reply_markup=get_admin_panel_keyboard()
         )
         await state.clear()
@@ -491,12 +493,12 @@ async def remove_product_image(message: Message, state: FSMContext):
 
 
 # DELETE PRODUCT
-@router.callback_query(F.data == "admin_delete_product")
+@router.callback_query((F.data == "admin_delete_product") | F.data.startswith("admin_delete_product_"))
 async def start_delete_product(callback: CallbackQuery):
     async with async_session_maker() as session:
-        products = await get_all_products(session)
+        page = await get_products_page(session, after_id=page_anchor(callback.data, "admin_delete_product"))
     
-    if not products:
+    if not page.products:
         await callback.message.edit_text(
             "📦 O'chirish uchun mahsulotlar mavjud emas.",
             reply_markup=get_admin_panel_keyboard()
@@ -505,7 +507,7 @@ async def start_delete_product(callback: CallbackQuery):
         await callback.message.edit_text(
             "🗑 <b>Mahsulotni o'chirish</b>\n\n"
             "⚠️ O'chirish uchun mahsulotni tanlang:",
-            reply_markup=get_product_delete_keyboard(products)
+            reply_markup=get_product_delete_keyboard(page)
         )
     await callback.answer()
 
@@ -525,7 +527,7 @@ async def confirm_delete_product(callback: CallbackQuery):
         f"⚠️ <b>O'chirishni tasdiqlash</b>\n\n"
         f"Ushbu mahsulotni o'chirishni xohlaysizmi?\n\n"
         f"📦 Nomi: {product.name}\n"
-        f"💰 Narxi: {product.price} so'm"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}"
     )
     
     # Check if current message has photo (no text to edit)
@@ -0,0 +1,74 @@
+from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery
+from app.config import ADMIN_ID
+from app.database.engine import async_session_maker
+from app.database.stats_requests import SalesStats, get_sales_stats
+from app.keyboards.inline import get_stats_keyboard
+from app.utils.money import format_som
+
+router = Router()
+
+STATUS_LABELS = {'waiting': "⏳ Kutilmoqda", 'delivered': "✅ Yetkazilgan", 'cancelled': "❌ Bekor qilingan"}
+DELIVERY_LABELS = {'delivery': "🚚 Yetkazib berish", 'pickup': "🏢 Olib ketish", 'unknown': "❔ Noma'lum"}
+
+
+def render_sales_stats(stats: SalesStats, days: int) -> str:
+    period_orders = sum(orders for _, orders, _ in stats.days)
+    period_revenue = sum(revenue for _, _, revenue in stats.days)
+    lines = [
+        "📊 <b>Statistika</b>\n",
+        f"💰 <b>Oxirgi {days} kun:</b> {period_orders} ta buyurtma, {format_som(period_revenue)}",
+    ]
+    lines += [
+        f"  {day:%d.%m}: {orders} ta · {format_som(revenue)}"
+        for day, orders, revenue in reversed(stats.days) if orders
+    ]
+    
+    lines.append("\n📋 <b>Holatlar bo'yicha:</b>")
+    lines += [
+        f"  {STATUS_LABELS.get(status, status)}: {orders} ta · {format_som(revenue)}"
+        for status, orders, revenue in stats.statuses
+    ] or ["  Buyurtmalar yo'q"]
+    
+    lines.append("\n🚚 <b>Olib ketish / yetkazib berish:</b>")
+    lines += [
+        f"  {DELIVERY_LABELS.get(delivery_type, delivery_type)}: {orders} ta · {format_som(revenue)}"
+        for delivery_type, orders, revenue in stats.delivery_types
+    ] or ["  Ma'lumot yo'q"]
+    
+    lines.append("\n🏆 <b>Eng ko'p sotilgan mahsulotlar:</b>")
+    lines += [
+        f"  {i}. {name} — {quantity} dona · {format_som(revenue)}"
+        for i, (name, quantity, revenue) in enumerate(stats.top_products, 1)
+    ] or ["  Ma'lumot yo'q"]
+    
+    lines.append("\n🏢 <b>Filiallar bo'yicha:</b>")
+    lines += [
+        f"  {name}: {orders} ta · {format_som(revenue)}"
+        for name, orders, revenue in stats.branches
+    ] or ["  Ma'lumot yo'q"]
+    
+    lines.append("\n<i>Bekor qilingan buyurtmalar faqat holatlar bo'yicha hisoblanadi.</i>")
+    return "\n".join(lines)
+
+
+@router.callback_query((F.data == "admin_stats") | F.data.startswith("admin_stats_"))
+async def show_sales_stats(callback: CallbackQuery):
+    if str(callback.from_user.id) != str(ADMIN_ID):
+        await callback.answer("⛔️ Ruxsat yo'q", show_alert=True)
+        return
+    
+    days = int(callback.data.removeprefix("admin_stats").lstrip("_") or 7)
+    
+    # Served from the sales aggregate tables (pending deltas folded in first), never from orders
+    async with async_session_maker() as session:
+        stats = await get_sales_stats(session, days)
+    
+    try:
+        await callback.message.edit_text(render_sales_stats(stats, days), reply_markup=get_stats_keyboard(days))
+    except TelegramBadRequest as e:
+        # Same period tapped again with no new orders
+        if "message is not modified" not in e.message:
+            raise
+    await callback.answer()
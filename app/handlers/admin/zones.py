@@ -0,0 +1,261 @@
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from app.database.engine import async_session_maker
+from app.database.branch_requests import (
+    get_branch_by_id,
+    get_branch_zones,
+    get_zone_by_id,
+    create_delivery_zone,
+    delete_delivery_zone
+)
+from app.keyboards.inline import (
+    get_zone_list_keyboard,
+    get_zone_detail_keyboard,
+    get_confirm_delete_zone_keyboard,
+    get_cancel_keyboard
+)
+from app.utils.money import format_som, from_tiyin, parse_som, to_tiyin
+
+router = Router()
+
+# Enough for any district outline drawn point by point, and keeps the FSM data small
+MAX_ZONE_POINTS = 100
+
+
+class ZoneStates(StatesGroup):
+    waiting_for_name = State()
+    waiting_for_points = State()
+    waiting_for_fee = State()
+    waiting_for_min_order = State()
+
+
+def parse_amount(text: str) -> int:
+    """Like parse_som, but ``0`` is allowed (free delivery, no minimum)."""
+    return 0 if text.strip() == "0" else parse_som(text)
+
+
+def parse_points(text: str) -> list[list[float]]:
+    """``lat, lon`` per line; raises ValueError on anything else."""
+    points = []
+    for line in text.strip().splitlines():
+        latitude, longitude = (float(part) for part in line.replace(",", " ").split())
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError(f"Coordinates out of range: {line!r}")
+        points.append([latitude, longitude])
+    return points
+
+
+def describe_zone(zone) -> str:
+    fee = to_tiyin(zone.delivery_fee)
+    min_order = to_tiyin(zone.min_order)
+    no_minimum = "yo'q"
+    return (
+        f"🚚 Yetkazib berish: {format_som(fee) if fee else 'bepul'}\n"
+        f"🛒 Minimal buyurtma: {format_som(min_order) if min_order else no_minimum}"
+    )
+
+
+async def show_zone_list(message: Message, branch_id: int, edit: bool):
+    async with async_session_maker() as session:
+        branch = await get_branch_by_id(session, branch_id)
+        zones = await get_branch_zones(session, branch_id) if branch else []
+    
+    if not branch:
+        await message.answer("Filial topilmadi!")
+        return
+    
+    lines = [f"🗺 <b>{branch.name}: yetkazib berish hududlari</b>\n"]
+    lines += [f"<b>{zone.name}</b> · {len(zone.polygon)} nuqta\n{describe_zone(zone)}\n" for zone in zones]
+    if not zones:
+        lines.append(
+            "Hududlar yo'q.\n\n"
+            "Hech bir filialda hudud bo'lmasa, yetkazib berish istalgan manzilga qabul qilinadi. "
+            "Birinchi hudud qo'shilgach, faqat hududlar ichidagi manzillar qabul qilinadi."
+        )
+    text = "\n".join(lines)
+    
+    # The branch detail this comes from may be a photo (no text to edit)
+    if edit and not message.photo:
+        await message.edit_text(text, reply_markup=get_zone_list_keyboard(branch_id, zones))
+    else:
+        if edit:
+            await message.delete()
+        await message.answer(text, reply_markup=get_zone_list_keyboard(branch_id, zones))
+
+
+@router.callback_query(F.data.startswith("branch_zones_"))
+async def branch_zones(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await show_zone_list(callback.message, int(callback.data.split("_")[2]), edit=True)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("zone_view_"))
+async def view_zone(callback: CallbackQuery):
+    zone_id = int(callback.data.split("_")[2])
+    
+    async with async_session_maker() as session:
+        zone = await get_zone_by_id(session, zone_id)
+    
+    if not zone:
+        await callback.answer("Hudud topilmadi!", show_alert=True)
+        return
+    
+    points = "\n".join(f"<code>{lat:.6f}, {lon:.6f}</code>" for lat, lon in zone.polygon)
+    await callback.message.edit_text(
+        f"🗺 <b>{zone.name}</b>\n\n"
+        f"{describe_zone(zone)}\n\n"
+        f"📍 Chegara nuqtalari ({len(zone.polygon)}):\n{points}",
+        reply_markup=get_zone_detail_keyboard(zone.id, zone.branch_id)
+    )
+    await callback.answer()
+
+
+# ADD ZONE
+@router.callback_query(F.data.startswith("zone_add_"))
+async def start_add_zone(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await state.update_data(zone_branch_id=int(callback.data.split("_")[2]), zone_points=[])
+    await callback.message.edit_text(
+        "➕ <b>Yangi yetkazib berish hududi</b>\n\n"
+        "Hudud nomini kiriting (masalan, Chilonzor):",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(ZoneStates.waiting_for_name)
+    await callback.answer()
+
+
+@router.message(ZoneStates.waiting_for_name, F.text)
+async def process_zone_name(message: Message, state: FSMContext):
+    await state.update_data(zone_name=message.text)
+    await message.answer(
+        f"✅ Hudud nomi: <b>{message.text}</b>\n\n"
+        "Endi hudud chegarasini aylana bo'ylab tartib bilan yuboring:\n"
+        "• har bir burchak uchun 📎 → Joylashuv, yoki\n"
+        "• koordinatalarni matn bilan, har qatorda bittadan: <code>41.311081, 69.240562</code>\n\n"
+        "Tugatgach /done yuboring (kamida 3 nuqta).",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(ZoneStates.waiting_for_points)
+
+
+async def add_zone_points(message: Message, state: FSMContext, points: list[list[float]]):
+    data = await state.get_data()
+    zone_points = data.get('zone_points', []) + points
+    if len(zone_points) > MAX_ZONE_POINTS:
+        await message.answer(f"❌ Ko'pi bilan {MAX_ZONE_POINTS} ta nuqta. Soddaroq chegara yuboring.")
+        return
+    await state.update_data(zone_points=zone_points)
+    await message.answer(f"✅ {len(zone_points)} ta nuqta. Keyingisini yuboring yoki /done")
+
+
+@router.message(ZoneStates.waiting_for_points, F.location)
+async def process_zone_point(message: Message, state: FSMContext):
+    await add_zone_points(message, state, [[message.location.latitude, message.location.longitude]])
+
+
+@router.message(ZoneStates.waiting_for_points, F.text == "/done")
+async def finish_zone_points(message: Message, state: FSMContext):
+    data = await state.get_data()
+    if len(data.get('zone_points', [])) < 3:
+        await message.answer("❌ Hudud uchun kamida 3 ta nuqta kerak.")
+        return
+    
+    await message.answer(
+        "✅ Chegara saqlandi\n\n"
+        "Yetkazib berish narxini kiriting (bepul bo'lsa 0):",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(ZoneStates.waiting_for_fee)
+
+
+@router.message(ZoneStates.waiting_for_points, F.text)
+async def process_zone_points_text(message: Message, state: FSMContext):
+    try:
+        points = parse_points(message.text)
+    except ValueError:
+        await message.answer(
+            "❌ Noto'g'ri format. Har qatorda bitta nuqta: <code>41.311081, 69.240562</code>"
+        )
+        return
+    await add_zone_points(message, state, points)
+
+
+@router.message(ZoneStates.waiting_for_fee, F.text)
+async def process_zone_fee(message: Message, state: FSMContext):
+    try:
+        fee = parse_amount(message.text)
+    except ValueError:
+        await message.answer("❌ Noto'g'ri summa! Masalan: 15000 (bepul bo'lsa 0)")
+        return
+    
+    await state.update_data(zone_fee=fee)
+    await message.answer(
+        f"✅ Yetkazib berish: <b>{format_som(fee) if fee else 'bepul'}</b>\n\n"
+        "Minimal buyurtma summasini kiriting (cheklov bo'lmasa 0):",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(ZoneStates.waiting_for_min_order)
+
+
+@router.message(ZoneStates.waiting_for_min_order, F.text)
+async def process_zone_min_order(message: Message, state: FSMContext):
+    try:
+        min_order = parse_amount(message.text)
+    except ValueError:
+        await message.answer("❌ Noto'g'ri summa! Masalan: 50000 (cheklov bo'lmasa 0)")
+        return
+    
+    data = await state.get_data()
+    async with async_session_maker() as session:
+        await create_delivery_zone(
+            session,
+            branch_id=data['zone_branch_id'],
+            name=data['zone_name'],
+            polygon=data['zone_points'],
+            delivery_fee=from_tiyin(data['zone_fee']),
+            min_order=from_tiyin(min_order)
+        )
+    
+    await state.clear()
+    await message.answer(f"✅ <b>\"{data['zone_name']}\" hududi qo'shildi!</b>")
+    await show_zone_list(message, data['zone_branch_id'], edit=False)
+
+
+# DELETE ZONE
+@router.callback_query(F.data.startswith("zone_delete_"))
+async def confirm_delete_zone(callback: CallbackQuery):
+    zone_id = int(callback.data.split("_")[2])
+    
+    async with async_session_maker() as session:
+        zone = await get_zone_by_id(session, zone_id)
+    
+    if not zone:
+        await callback.answer("Hudud topilmadi!", show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        f"⚠️ <b>O'chirishni tasdiqlang</b>\n\n"
+        f"\"{zone.name}\" hududini o'chirishni xohlaysizmi?",
+        reply_markup=get_confirm_delete_zone_keyboard(zone.id, zone.branch_id)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("zone_confirm_delete_"))
+async def process_delete_zone(callback: CallbackQuery):
+    zone_id = int(callback.data.split("_")[3])
+    
+    async with async_session_maker() as session:
+        zone = await get_zone_by_id(session, zone_id)
+        if zone:
+            await delete_delivery_zone(session, zone_id)
+    
+    if not zone:
+        await callback.answer("Hudud topilmadi!", show_alert=True)
+        return
+    
+    await show_zone_list(callback.message, zone.branch_id, edit=True)
+    await callback.answer("✅ Hudud o'chirildi")
@@ -1,50 +1,85 @@
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.database.engine import async_session_maker
+from app.database.catalog_cache import catalog_cache
 from app.database.product_requests import get_product_by_id
+from app.database.order_requests import MAX_BASKET_QUANTITY
+from app.utils.money import format_som, to_tiyin
+from app.utils.signing import sign, verify
 
 router = Router()
 
 
-@router.callback_query(F.data.startswith("add_basket_"))
-async def add_to_basket_view(callback: CallbackQuery):
-    product_id = int(callback.data.split("_")[2])
-    
-    async with async_session_maker() as session:
-        product = await get_product_by_id(session, product_id)
-    
-    if not product:
-        await callback.answer("Mahsulot topilmadi!", show_alert=True)
-        return
-    
-    quantity = 1
-    total_price = float(product.price) * quantity
-    
+async def get_card_product(product_id: int):
+    """Product for rendering a card: from the catalog cache, the database only if it's stale."""
+    product = catalog_cache.peek(product_id)
+    if product is None:
+        async with async_session_maker() as session:
+            product = await get_product_by_id(session, product_id)
+    return product
+
+
+def quantity_editor(product, quantity: int, user_id: int):
+    """Text and ➖/➕ keyboard of the product card while choosing a quantity.
+
+    The stepper buttons carry the displayed quantity; the save button also carries
+    a signature of (user, product, quantity), since that quantity is written as is.
+    """
     text = (
         f"📦 <b>{product.name}</b>\n\n"
-        f"💰 Bir dona narxi: {product.price} so'm\n"
+        f"💰 Bir dona narxi: {format_som(to_tiyin(product.price))}\n"
         f"📊 Miqdori: {quantity}\n"
-        f"💵 Jami: {total_price:.2f} so'm\n\n"
+        f"💵 Jami: {format_som(to_tiyin(product.price) * quantity)}\n\n"
         "Miqdorni sozlang va savatga saqlang:"
     )
     
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
             [
-                InlineKeyboardButton(text="➖", callback_data=f"qty_dec_{product.id}_1"),
+                InlineKeyboardButton(text="➖", callback_data=f"qty_dec_{product.id}_{quantity}"),
                 InlineKeyboardButton(text=f"{quantity}", callback_data="qty_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"qty_inc_{product.id}_1")
+                InlineKeyboardButton(text="➕", callback_data=f"qty_inc_{product.id}_{quantity}")
             ],
-            [InlineKeyboardButton(text="💾 Savatga saqlash", callback_data=f"save_basket_{product.id}_1")],
+            [InlineKeyboardButton(
+                text="💾 Savatga saqlash",
+                callback_data=f"save_basket_{product.id}_{quantity}_{sign(user_id, product.id, quantity)}"
+            )],
             [InlineKeyboardButton(text="🔙 Mahsulotlarga qaytish", callback_data=f"back_to_{product.type}")]
         ]
     )
+    return text, keyboard
+
+
+async def edit_product_card(callback: CallbackQuery, product, text: str, keyboard: InlineKeyboardMarkup):
+    try:
+        if product.product_image:
+            await callback.message.edit_caption(caption=text, reply_markup=keyboard)
+        else:
+            await callback.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # A tap that doesn't change the card; anything else (incl. 429) is a real error
+        if "message is not modified" not in e.message:
+            raise
+
+
+@router.callback_query(F.data.startswith("add_basket_"))
+async def add_to_basket_view(callback: CallbackQuery):
+    product_id = int(callback.data.split("_")[2])
+    product = await get_card_product(product_id)
+    
+    if not product:
+        await callback.answer("Mahsulot topilmadi!", show_alert=True)
+        return
+    
+    text, keyboard = quantity_editor(product, 1, callback.from_user.id)
     
     if product.product_image:
         try:
             await callback.message.edit_caption(caption=text, reply_markup=keyboard)
-        except:
+        except TelegramBadRequest:
+            # The card was sent as text (no caption to edit)
             await callback.message.delete()
             await callback.message.answer_photo(photo=product.product_image, caption=text, reply_markup=keyboard)
     else:
@@ -53,114 +88,40 @@ async def add_to_basket_view(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("qty_inc_"))
-async def increase_quantity(callback: CallbackQuery):
+async def change_editor_quantity(callback: CallbackQuery, delta: int):
+    # qty_{inc|dec}_{product_id}_{quantity shown on the card}; ``delta`` is the net change of a burst of taps
     parts = callback.data.split("_")
     product_id = int(parts[2])
     current_qty = int(parts[3])
-    new_qty = current_qty + 1
+    new_qty = min(max(1, current_qty + delta), MAX_BASKET_QUANTITY)
     
-    async with async_session_maker() as session:
-        product = await get_product_by_id(session, product_id)
+    if new_qty == current_qty:
+        if delta > 0:
+            await callback.answer(f"Bitta mahsulotdan ko'pi bilan {MAX_BASKET_QUANTITY} dona buyurtma qilish mumkin.")
+        else:
+            await callback.answer()
+        return
+    
+    # Rendered from the catalog cache; the database is only written on save_basket_
+    product = await get_card_product(product_id)
     
     if not product:
         await callback.answer("Mahsulot topilmadi!", show_alert=True)
         return
     
-    total_price = float(product.price) * new_qty
-    
-    text = (
-        f"📦 <b>{product.name}</b>\n\n"
-        f"💰 Bir dona narxi: {product.price} so'm\n"
-        f"📊 Miqdori: {new_qty}\n"
-        f"💵 Jami: {total_price:.2f} so'm\n\n"
-        "Miqdorni sozlang va savatga saqlang:"
-    )
-    
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="➖", callback_data=f"qty_dec_{product.id}_{new_qty}"),
-                InlineKeyboardButton(text=f"{new_qty}", callback_data="qty_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"qty_inc_{product.id}_{new_qty}")
-            ],
-            [InlineKeyboardButton(text="💾 Savatga saqlash", callback_data=f"save_basket_{product.id}_{new_qty}")],
-            [InlineKeyboardButton(text="🔙 Mahsulotlarga qaytish", callback_data=f"back_to_{product.type}")]
-        ]
-    )
-    
-    try:
-        if product.product_image:
-            await callback.message.edit_caption(caption=text, reply_markup=keyboard)
-        else:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-    except:
-        pass
-    
+    text, keyboard = quantity_editor(product, new_qty, callback.from_user.id)
+    await edit_product_card(callback, product, text, keyboard)
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("qty_inc_"))
+async def increase_quantity(callback: CallbackQuery, stepper_delta: int = 1):
+    await change_editor_quantity(callback, stepper_delta)
+
+
 @router.callback_query(F.data.startswith("qty_dec_"))
-async def decrease_quantity(callback: CallbackQuery):
-    parts = callback.data.split("_")
-    product_id = int(parts[2])
-    current_qty = int(parts[3])
-    new_qty = max(1, current_qty - 1)
-    
-    async with async_session_maker() as session:
-        product = await get_product_by_id(session, product_id)
-    
-    if not product:
-        await callback.answer("Mahsulot topilmadi!", show_alert=True)
-        return
-    
-    if new_qty < 1:
-        # Return to initial state
-        text = (
-            f"📦 <b>{product.name}</b>\n\n"
-            f"💰 Narxi: {product.price} so'm\n"
-            f"📝 Tavsif: {product.description or 'Tavsif berilmagan'}\n\n"
-            "Bu mahsulotni buyurtma qilish uchun savatga qo'shing!"
-        )
-        
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="🛒 Savatga qo'shish", callback_data=f"add_basket_{product.id}")],
-                [InlineKeyboardButton(text="🔙 Mahsulotlarga qaytish", callback_data=f"back_to_{product.type}")]
-            ]
-        )
-    else:
-        total_price = float(product.price) * new_qty
-        
-        text = (
-            f"📦 <b>{product.name}</b>\n\n"
-            f"💰 Bir dona narxi: {product.price} so'm\n"
-            f"📊 Miqdori: {new_qty}\n"
-            f"💵 Jami: {total_price:.2f} so'm\n\n"
-            "Miqdorni sozlang va savatga saqlang:"
-        )
-        
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(text="➖", callback_data=f"qty_dec_{product.id}_{new_qty}"),
-                    InlineKeyboardButton(text=f"{new_qty}", callback_data="qty_display"),
-                    InlineKeyboardButton(text="➕", callback_data=f"qty_inc_{product.id}_{new_qty}")
-                ],
-                [InlineKeyboardButton(text="💾 Savatga saqlash", callback_data=f"save_basket_{product.id}_{new_qty}")],
-                [InlineKeyboardButton(text="🔙 Mahsulotlarga qaytish", callback_data=f"back_to_{product.type}")]
-            ]
-        )
-    
-    try:
-        if product.product_image:
-            await callback.message.edit_caption(caption=text, reply_markup=keyboard)
-        else:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-    except:
-        pass
-    
-    await callback.answer()
+async def decrease_quantity(callback: CallbackQuery, stepper_delta: int = -1):
+    await change_editor_quantity(callback, stepper_delta)
 
 
 @router.callback_query(F.data.startswith("save_basket_"))
@@ -168,9 +129,15 @@ async def save_to_basket(callback: CallbackQuery):
     from app.database.requests import get_user_by_tg_id
     from app.database.order_requests import add_to_basket
     
+    # save_basket_{product_id}_{quantity}_{signature}
     parts = callback.data.split("_")
     product_id = int(parts[2])
     quantity = int(parts[3])
+    signature = parts[4] if len(parts) > 4 else ""
+    
+    if not 1 <= quantity <= MAX_BASKET_QUANTITY or not verify(signature, callback.from_user.id, product_id, quantity):
+        await callback.answer("Bu tugma eskirgan. Mahsulotni qaytadan oching.", show_alert=True)
+        return
     
     async with async_session_maker() as session:
         product = await get_product_by_id(session, product_id)
@@ -187,7 +154,7 @@ async def save_to_basket(callback: CallbackQuery):
     # Return to product view
     text = (
         f"📦 <b>{product.name}</b>\n\n"
-        f"💰 Narxi: {product.price} so'm\n"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}\n"
         f"📝 Tavsif: {product.description or 'Tavsif berilmagan'}\n\n"
         "Bu mahsulotni buyurtma qilish uchun savatga qo'shing!"
     )
@@ -199,10 +166,4 @@ async def save_to_basket(callback: CallbackQuery):
         ]
     )
     
-    try:
-        if product.product_image:
-            await callback.message.edit_caption(caption=text, reply_markup=keyboard)
-        else:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-    except:
-        pass
+    await edit_product_card(callback, product, text, keyboard)
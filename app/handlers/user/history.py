@@ -0,0 +1,203 @@
+from datetime import datetime
+from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from app.database.engine import async_session_maker
+from app.utils.basket_view import BasketView, SEPARATOR
+from app.utils.money import format_som, to_tiyin
+
+router = Router()
+
+HISTORY_PAGE_SIZE = 5
+STATUS_LABELS = {'waiting': "⏳ Kutilmoqda", 'delivered': "✅ Yetkazilgan", 'cancelled': "❌ Bekor qilingan"}
+DELIVERY_LABELS = {'delivery': "🚚 Yetkazib berish", 'pickup': "🏢 Olib ketish"}
+_CURSOR_TIME = '%Y%m%d%H%M%S%f'
+
+
+# A page is addressed by a cursor: "" for the newest orders, "b<key>" for the orders
+# before an order and "a<key>" for the orders after it, where <key> is its (created_at, id)
+def encode_cursor(direction: str, order) -> str:
+    return f"{direction}{order.created_at.strftime(_CURSOR_TIME)}_{order.id}"
+
+
+def decode_cursor(cursor: str) -> dict:
+    if not cursor:
+        return {}
+    created_at, order_id = cursor[1:].split("_")
+    key = (datetime.strptime(created_at, _CURSOR_TIME), int(order_id))
+    return {'before': key} if cursor[0] == "b" else {'after': key}
+
+
+def page_callback(cursor: str) -> str:
+    return f"orders_page_{cursor}" if cursor else "orders_page"
+
+
+def render_history(orders) -> str:
+    if not orders:
+        return (
+            "📦 <b>Mening buyurtmalarim</b>\n\n"
+            "Sizda hali buyurtmalar yo'q.\n"
+            "Mahsulotlarni savatga qo'shib, birinchi buyurtmangizni bering!"
+        )
+    lines = ["📦 <b>Mening buyurtmalarim</b>\n"]
+    for order in orders:
+        lines.append(
+            f"<b>#{order.id}</b> · {order.created_at:%d.%m.%Y}\n"
+            f"  {STATUS_LABELS.get(order.status, order.status)} · {order.item_count} ta mahsulot · "
+            f"{format_som(to_tiyin(order.total_price))}"
+        )
+    lines.append("\nBatafsil ko'rish uchun buyurtmani tanlang 👇")
+    return "\n".join(lines)
+
+
+def get_history_keyboard(orders, cursor: str, has_newer: bool, has_older: bool) -> InlineKeyboardMarkup | None:
+    if not orders:
+        return None
+    keyboard = [
+        [InlineKeyboardButton(
+            text=f"#{order.id} · {order.created_at:%d.%m.%Y} · {format_som(to_tiyin(order.total_price))}",
+            callback_data=f"order_open_{order.id}_{cursor}"
+        )]
+        for order in orders
+    ]
+    navigation = []
+    if has_newer:
+        navigation.append(InlineKeyboardButton(
+            text="⬅️ Yangiroq", callback_data=page_callback(encode_cursor("a", orders[0]))
+        ))
+    if has_older:
+        navigation.append(InlineKeyboardButton(
+            text="Eskiroq ➡️", callback_data=page_callback(encode_cursor("b", orders[-1]))
+        ))
+    if navigation:
+        keyboard.append(navigation)
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+async def load_history_page(tg_id: int, cursor: str = ""):
+    """``(text, keyboard)`` of a history page, or None if the user isn't registered."""
+    from app.database.requests import get_user_by_tg_id
+    from app.database.order_requests import get_order_history
+    
+    async with async_session_maker() as session:
+        user = await get_user_by_tg_id(session, tg_id)
+        if not user:
+            return None
+        # Only this page's rows (with an item count) are read; items load when an order is opened
+        orders, has_newer, has_older = await get_order_history(
+            session, user.id, HISTORY_PAGE_SIZE, **decode_cursor(cursor)
+        )
+    
+    if cursor and (not orders or not has_newer):
+        # Walked back to the top, or the page is gone: show the newest orders as a full page
+        return await load_history_page(tg_id)
+    return render_history(orders), get_history_keyboard(orders, cursor, has_newer, has_older)
+
+
+@router.message(F.text == "📦 Mening buyurtmalarim")
+async def order_history(message: Message):
+    page = await load_history_page(message.from_user.id)
+    if page is None:
+        await message.answer("Foydalanuvchi topilmadi!")
+        return
+    
+    text, keyboard = page
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query((F.data == "orders_page") | F.data.startswith("orders_page_"))
+async def order_history_page(callback: CallbackQuery):
+    cursor = callback.data.removeprefix("orders_page").lstrip("_")
+    page = await load_history_page(callback.from_user.id, cursor)
+    if page is None:
+        await callback.answer("Foydalanuvchi topilmadi!", show_alert=True)
+        return
+    
+    text, keyboard = page
+    try:
+        await callback.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in e.message:
+            raise
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("order_open_"))
+async def open_order(callback: CallbackQuery):
+    from app.database.requests import get_user_by_tg_id
+    from app.database.order_requests import get_user_order, get_order_items
+    
+    # order_open_{order_id}_{cursor of the page to return to}
+    _, _, order_id, cursor = callback.data.split("_", 3)
+    
+    async with async_session_maker() as session:
+        user = await get_user_by_tg_id(session, callback.from_user.id)
+        order = await get_user_order(session, user.id, int(order_id)) if user else None
+        if order is None:
+            await callback.answer("Buyurtma topilmadi!", show_alert=True)
+            return
+        order_items = await get_order_items(session, order.id)
+    
+    delivery = DELIVERY_LABELS.get(order.delivery_type, "")
+    if order.branch is not None:
+        delivery += f": {order.branch.name}"
+    text = (
+        f"📦 <b>Buyurtma #{order.id}</b>\n\n"
+        f"📅 {order.created_at:%d.%m.%Y %H:%M}\n"
+        f"📊 Holati: {STATUS_LABELS.get(order.status, order.status)}\n"
+        + (f"{delivery}\n" if delivery else "")
+        + f"\n{BasketView.from_order_items(order_items).items_text}{SEPARATOR}"
+        + (f"🚚 Yetkazib berish: {format_som(to_tiyin(order.delivery_fee))}\n" if order.delivery_fee else "")
+        + f"💵 <b>Jami: {format_som(to_tiyin(order.total_price))}</b>"
+    )
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="🔁 Qayta buyurtma", callback_data=f"order_reorder_{order.id}")],
+            [InlineKeyboardButton(text="🔙 Buyurtmalarga qaytish", callback_data=page_callback(cursor))]
+        ]
+    )
+    
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+def render_reorder_notes(lines) -> str:
+    """What changed since the order was placed: deleted products and new prices."""
+    notes = []
+    removed = [line.product_name for line in lines if line.price is None]
+    if removed:
+        notes.append("⚠️ <b>Endi mavjud emas:</b> " + ", ".join(removed))
+    changed = [
+        f"• {line.name}: {format_som(to_tiyin(line.old_price))} → {format_som(to_tiyin(line.price))}"
+        for line in lines
+        if line.price is not None and to_tiyin(line.price) != to_tiyin(line.old_price)
+    ]
+    if changed:
+        notes.append("💱 <b>Narxi o'zgargan:</b>\n" + "\n".join(changed))
+    return "\n\n".join(notes)
+
+
+@router.callback_query(F.data.startswith("order_reorder_"))
+async def reorder_order(callback: CallbackQuery):
+    from app.database.requests import get_user_by_tg_id
+    from app.database.order_requests import reorder
+    from app.handlers.user.orders import load_basket_view
+    
+    order_id = int(callback.data.split("_")[2])
+    
+    async with async_session_maker() as session:
+        user = await get_user_by_tg_id(session, callback.from_user.id)
+        # One statement reads the order, checks it against the catalog and fills the basket
+        lines = await reorder(session, user.id, order_id) if user else []
+        if not lines:
+            await callback.answer("Buyurtma topilmadi!", show_alert=True)
+            return
+        view = await load_basket_view(session, user.id)
+    
+    text = view.text()
+    notes = render_reorder_notes(lines)
+    if notes:
+        text += f"\n\n{SEPARATOR}{notes}"
+    
+    await callback.message.edit_text(text, reply_markup=view.keyboard())
+    await callback.answer("🔁 Buyurtma mahsulotlari savatga qo'shildi")
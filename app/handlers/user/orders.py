@@ -1,173 +1,119 @@
-from aiogram import Router, F
+import logging
+from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from app.database.engine import async_session_maker
+from app.utils.basket_view import BasketView
+from app.utils.checkout_dedup import CompletedCheckout, recent_checkouts
+from app.utils.money import format_som, to_tiyin
+from app.utils.send_queue import SendQueue, Priority
 
 router = Router()
 
 
 class OrderStates(StatesGroup):
     waiting_for_delivery_location = State()
+    waiting_for_pickup_location = State()
 
 
-@router.message(F.text == "📦 Mening buyurtmalarim")
-async def my_orders(message: Message):
-    from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import get_basket_items
+async def notify_group(send_queue: SendQueue, bot: Bot, order_id: int, text: str,
+                       reply_markup: InlineKeyboardMarkup, latitude: float = None, longitude: float = None,
+                       chat_id: int = None):
+    """Post a new order to its branch's chat (the admin group by default) and remember the
+    message id (runs in the background)."""
+    from app.config import GROUP_ID
+    from app.database.order_requests import set_order_group_message
     
-    async with async_session_maker() as session:
-        user = await get_user_by_tg_id(session, message.from_user.id)
-        
-        if not user:
-            await message.answer("Foydalanuvchi topilmadi!")
-            return
-        
-        basket_items = await get_basket_items(session, user.id)
-        
-        if not basket_items:
-            await message.answer(
-                "🛒 <b>Mening savatim</b>\n\n"
-                "Savatingiz bo'sh.\n"
-                "Buyurtma yaratish uchun mahsulotlarni savatga qo'shing!"
-            )
-            return
-        
-        # Calculate total
-        total = 0
-        items_text = ""
-        
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
-        
-        text = (
-            f"🛒 <b>Mening savatim</b>\n\n"
-            f"{items_text}"
-            f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>"
+    chat_id = chat_id or GROUP_ID
+    try:
+        group_message = await send_queue.send(
+            chat_id,
+            lambda: bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup, parse_mode=ParseMode.HTML),
+            Priority.GROUP
         )
         
-        keyboard = []
-        for item in basket_items:
-            keyboard.append([
-                InlineKeyboardButton(text="➖", callback_data=f"basket_dec_{item.product_id}_{item.quantity}"),
-                InlineKeyboardButton(text=f"{item.product.name}: {item.quantity}", callback_data="basket_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"basket_inc_{item.product_id}_{item.quantity}")
-            ])
+        # Update order with group message id
+        async with async_session_maker() as session:
+            await set_order_group_message(session, order_id, group_message.message_id)
         
-        keyboard.append([InlineKeyboardButton(text="✅ Buyurtmani tasdiqlash", callback_data="confirm_order_prompt")])
-        
-        await message.answer(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard))
+        # Send location if available
+        if latitude is not None and longitude is not None:
+            await send_queue.send(
+                chat_id,
+                lambda: bot.send_location(
+                    chat_id=chat_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                    reply_to_message_id=group_message.message_id
+                ),
+                Priority.GROUP
+            )
+    except Exception as e:
+        logging.error("Error sending order #%s to chat %s: %s", order_id, chat_id, e)
 
 
-@router.callback_query(F.data.startswith("basket_inc_"))
-async def basket_increase(callback: CallbackQuery):
+async def load_basket_view(session, user_id: int) -> BasketView:
+    from app.database.order_requests import get_basket_items
+    
+    return BasketView.from_basket_items(await get_basket_items(session, user_id))
+
+
+async def change_quantity(callback: CallbackQuery, delta: int):
     from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import update_basket_quantity, get_basket_items
+    from app.database.order_requests import change_basket_quantity, MAX_BASKET_QUANTITY
     
-    parts = callback.data.split("_")
-    product_id = int(parts[2])
-    current_qty = int(parts[3])
-    new_qty = current_qty + 1
+    # The quantity is changed on the server; older buttons may still carry a stale quantity in parts[3]
+    product_id = int(callback.data.split("_")[2])
     
     async with async_session_maker() as session:
         user = await get_user_by_tg_id(session, callback.from_user.id)
-        await update_basket_quantity(session, user.id, product_id, new_qty)
-        
-        basket_items = await get_basket_items(session, user.id)
-        
-        # Recalculate total
-        total = 0
-        items_text = ""
-        
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
-        
-        text = (
-            f"🛒 <b>Mening savatim</b>\n\n"
-            f"{items_text}"
-            f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>"
-        )
-        
-        keyboard = []
-        for item in basket_items:
-            keyboard.append([
-                InlineKeyboardButton(text="➖", callback_data=f"basket_dec_{item.product_id}_{item.quantity}"),
-                InlineKeyboardButton(text=f"{item.product.name}: {item.quantity}", callback_data="basket_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"basket_inc_{item.product_id}_{item.quantity}")
-            ])
-        
-        keyboard.append([InlineKeyboardButton(text="✅ Buyurtmani tasdiqlash", callback_data="confirm_order_prompt")])
-        
-        await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard))
+        quantity = await change_basket_quantity(session, user.id, product_id, delta)
+        # Rendered from the database, not from the message: other lines may have changed
+        # elsewhere (another worker, a reorder, an older basket message); unchanged lines
+        # come from the line cache
+        view = await load_basket_view(session, user.id)
     
-    await callback.answer()
+    try:
+        await callback.message.edit_text(view.text(), reply_markup=view.keyboard())
+    except TelegramBadRequest as e:
+        # Already at the limit: nothing changed
+        if "message is not modified" not in e.message:
+            raise
+    if delta > 0 and quantity == MAX_BASKET_QUANTITY:
+        await callback.answer(f"Bitta mahsulotdan ko'pi bilan {MAX_BASKET_QUANTITY} dona buyurtma qilish mumkin.")
+    else:
+        await callback.answer()
 
 
-@router.callback_query(F.data.startswith("basket_dec_"))
-async def basket_decrease(callback: CallbackQuery):
+@router.message(F.text == "🛒 Savatim")
+async def my_basket(message: Message):
     from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import update_basket_quantity, get_basket_items
-    
-    parts = callback.data.split("_")
-    product_id = int(parts[2])
-    current_qty = int(parts[3])
-    new_qty = max(0, current_qty - 1)
     
     async with async_session_maker() as session:
-        user = await get_user_by_tg_id(session, callback.from_user.id)
-        await update_basket_quantity(session, user.id, product_id, new_qty)
-        
-        basket_items = await get_basket_items(session, user.id)
+        user = await get_user_by_tg_id(session, message.from_user.id)
         
-        if not basket_items:
-            await callback.message.edit_text(
-                "🛒 <b>Mening savatim</b>\n\n"
-                "Savat bo'sh.\n"
-                "Buyurtma yaratish uchun mahsulotlarni savatga qo'shing!"
-            )
-            await callback.answer()
+        if not user:
+            await message.answer("Foydalanuvchi topilmadi!")
             return
         
-        # Recalculate total
-        total = 0
-        items_text = ""
-        
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
-        
-        text = (
-            f"🛒 <b>Mening savatim</b>\n\n"
-            f"{items_text}"
-            f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>"
-        )
-        
-        keyboard = []
-        for item in basket_items:
-            keyboard.append([
-                InlineKeyboardButton(text="➖", callback_data=f"basket_dec_{item.product_id}_{item.quantity}"),
-                InlineKeyboardButton(text=f"{item.product.name}: {item.quantity}", callback_data="basket_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"basket_inc_{item.product_id}_{item.quantity}")
-            ])
-        
-        keyboard.append([InlineKeyboardButton(text="✅ Buyurtmani tasdiqlash", callback_data="confirm_order_prompt")])
-        
-        await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard))
+        view = await load_basket_view(session, user.id)
     
-    await callback.answer()
+    await message.answer(view.text(), reply_markup=view.keyboard())
+
+
+# ``stepper_delta`` is the net change of a burst of taps (see StepperDebounceMiddleware)
+@router.callback_query(F.data.startswith("basket_inc_"))
+async def basket_increase(callback: CallbackQuery, stepper_delta: int = 1):
+    await change_quantity(callback, stepper_delta)
+
+
+@router.callback_query(F.data.startswith("basket_dec_"))
+async def basket_decrease(callback: CallbackQuery, stepper_delta: int = -1):
+    await change_quantity(callback, stepper_delta)
 
 
 @router.callback_query(F.data == "confirm_order_prompt")
@@ -202,9 +148,41 @@ async def order_delivery_request_location(callback: CallbackQuery, state: FSMCon
 
 @router.message(OrderStates.waiting_for_delivery_location, F.location)
 async def process_delivery_location(message: Message, state: FSMContext):
+    from app.database.requests import get_user_by_tg_id
+    from app.database.branch_requests import find_delivery_zone, has_delivery_zones
+    
     latitude = message.location.latitude
     longitude = message.location.longitude
     
+    # Zones come from the in-process polygon index; the minimum is checked against the basket as stored
+    async with async_session_maker() as session:
+        zone = await find_delivery_zone(session, latitude, longitude)
+        if zone is None and await has_delivery_zones(session):
+            await message.answer(
+                "❌ <b>Bu manzilga yetkazib bera olmaymiz</b>\n\n"
+                "Joylashuv yetkazib berish hududlarimizdan tashqarida.\n"
+                "Boshqa joylashuv yuboring yoki buyurtmani filialdan olib keting.",
+                reply_markup=InlineKeyboardMarkup(
+                    inline_keyboard=[[InlineKeyboardButton(text="🏢 Olib ketish", callback_data="order_pickup")]]
+                )
+            )
+            return
+        
+        user = await get_user_by_tg_id(session, message.from_user.id)
+        view = await load_basket_view(session, user.id)
+    
+    fee = zone.delivery_fee if zone else 0
+    if zone and view.total < zone.min_order:
+        await message.answer(
+            f"⚠️ <b>Minimal buyurtma summasi: {format_som(zone.min_order)}</b>\n\n"
+            f"\"{zone.name}\" hududiga yetkazib berish uchun savatingizda kamida shuncha mahsulot bo'lishi kerak.\n"
+            f"Savatingizda: {format_som(view.total)}",
+            reply_markup=InlineKeyboardMarkup(
+                inline_keyboard=[[InlineKeyboardButton(text="🛒 Savatga qaytish", callback_data="confirm_order_no")]]
+            )
+        )
+        return
+    
     await state.update_data(
         delivery_type='delivery',
         latitude=latitude,
@@ -220,58 +198,113 @@ async def process_delivery_location(message: Message, state: FSMContext):
         ]
     )
     
+    zone_text = (
+        f"🏢 Filial: {zone.branch.name} ({zone.name})\n"
+        f"🚚 Yetkazib berish: {format_som(fee) if fee else 'bepul'}\n"
+    ) if zone else ""
     await message.answer(
         f"📍 <b>Joylashuv qabul qilindi</b>\n\n"
-        f"Latitude: {latitude}\n"
-        f"Longitude: {longitude}\n\n"
+        f"{zone_text}"
+        f"💵 Jami: {format_som(view.total + fee)}\n\n"
         f"❓ Buyurtmangizni tasdiqlaysizmi?",
         reply_markup=keyboard
     )
 
 
+def format_distance(km: float) -> str:
+    if km < 1:
+        return f"{round(km * 1000, -1):.0f} m"
+    return f"{km:.1f} km".replace('.', ',')
+
+
+def get_branch_choice_keyboard(buttons: list[tuple[int, str]], show_all: bool) -> InlineKeyboardMarkup:
+    rows = [[InlineKeyboardButton(text=text, callback_data=f"pickup_branch_{branch_id}")] for branch_id, text in buttons]
+    if show_all:
+        rows.append([InlineKeyboardButton(text="📋 Barcha filiallar", callback_data="pickup_all_branches")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+NO_BRANCHES_TEXT = (
+    "🏢 <b>Filiallar mavjud emas</b>\n\n"
+    "Afsuski, hozirda olish uchun filiallar mavjud emas.\n"
+    "Iltimos, qo'llab-quvvatlash xizmatiga murojaat qiling."
+)
+
+
 @router.callback_query(F.data == "order_pickup")
-async def order_pickup_show_branches(callback: CallbackQuery):
-    from app.database.branch_requests import get_all_branches
+async def order_pickup_request_location(callback: CallbackQuery, state: FSMContext):
+    from app.database.branch_requests import get_pickup_branches
     
     async with async_session_maker() as session:
-        branches = await get_all_branches(session)
+        branches = await get_pickup_branches(session)
     
     if not branches:
-        await callback.message.edit_text(
-            "🏢 <b>Filiallar mavjud emas</b>\n\n"
-            "Afsuski, hozirda olish uchun filiallar mavjud emas.\n"
-            "Iltimos, qo'llab-quvvatlash xizmatiga murojaat qiling."
-        )
+        await callback.message.edit_text(NO_BRANCHES_TEXT)
         await callback.answer()
         return
     
     await callback.message.edit_text(
         "🏢 <b>Olish uchun filialni tanlang</b>\n\n"
-        "Buyurtmangizni olish uchun filialni tanlang:"
+        "Eng yaqin filiallarni ko'rish uchun joylashuvingizni yuboring.\n"
+        "Joylashuvingizni yuborish uchun 📎 qo'shimcha tugmasidan foydalaning.",
+        reply_markup=get_branch_choice_keyboard([], show_all=True)
     )
-    no_desc = "Tavsif yo'q"
-    for branch in branches:
-        text = (
-            f"🏢 <b>{branch.name}</b>\n\n"
-            f"📝 {branch.description or no_desc}\n"
-            f"📍 Joylashuv: {branch.location}"
+    await state.set_state(OrderStates.waiting_for_pickup_location)
+    await callback.answer()
+
+
+@router.message(OrderStates.waiting_for_pickup_location, F.location)
+async def show_nearest_branches(message: Message):
+    from app.database.branch_requests import get_nearest_branches, get_pickup_branches
+    
+    # Served from the in-process branch cache and its grid index; one message instead of one per branch
+    async with async_session_maker() as session:
+        nearest = await get_nearest_branches(session, message.location.latitude, message.location.longitude)
+        if not nearest:
+            branches = await get_pickup_branches(session)
+    
+    if not nearest:
+        # No branch has map coordinates yet
+        if not branches:
+            await message.answer(NO_BRANCHES_TEXT)
+            return
+        await message.answer(
+            "🏢 <b>Olish uchun filialni tanlang</b>",
+            reply_markup=get_branch_choice_keyboard([(b.id, f"{b.name} — {b.location[:40]}") for b in branches], False)
         )
-        
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="📦 Buyurtma berish", callback_data=f"pickup_branch_{branch.id}")]
-            ]
+        return
+    
+    lines = ["🏢 <b>Sizga eng yaqin filiallar</b>\n"]
+    for i, (branch, km) in enumerate(nearest, 1):
+        lines.append(f"{i}. <b>{branch.name}</b> — {format_distance(km)}\n   📍 {branch.location}")
+    lines.append("\nBuyurtmani olish uchun filialni tanlang 👇")
+    
+    await message.answer(
+        "\n".join(lines),
+        reply_markup=get_branch_choice_keyboard(
+            [(branch.id, f"{i}. {branch.name} · {format_distance(km)}") for i, (branch, km) in enumerate(nearest, 1)],
+            show_all=True
         )
-        
-        if branch.image:
-            await callback.message.answer_photo(
-                photo=branch.image,
-                caption=text,
-                reply_markup=keyboard
-            )
-        else:
-            await callback.message.answer(text, reply_markup=keyboard)
+    )
+
+
+@router.callback_query(F.data == "pickup_all_branches")
+async def show_all_branches(callback: CallbackQuery):
+    from app.database.branch_requests import get_pickup_branches
+    
+    async with async_session_maker() as session:
+        branches = await get_pickup_branches(session)
     
+    if not branches:
+        await callback.message.edit_text(NO_BRANCHES_TEXT)
+        await callback.answer()
+        return
+    
+    await callback.message.edit_text(
+        f"🏢 <b>Barcha filiallar</b> ({len(branches)})\n\n"
+        "Buyurtmani olish uchun filialni tanlang 👇",
+        reply_markup=get_branch_choice_keyboard([(b.id, f"{b.name} — {b.location[:40]}") for b in branches], False)
+    )
     await callback.answer()
 
 
@@ -304,98 +337,106 @@ async def confirm_pickup_branch(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "confirm_order_no")
 async def confirm_order_no(callback: CallbackQuery, state: FSMContext):
     from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import get_basket_items
     
     async with async_session_maker() as session:
         user = await get_user_by_tg_id(session, callback.from_user.id)
-        basket_items = await get_basket_items(session, user.id)
-        
-        # Recalculate total
-        total = 0
-        items_text = ""
-        
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
-        
-        text = (
-            f"🛒 <b>Mening savatim</b>\n\n"
-            f"{items_text}"
-            f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>"
-        )
-        
-        keyboard = []
-        for item in basket_items:
-            keyboard.append([
-                InlineKeyboardButton(text="➖", callback_data=f"basket_dec_{item.product_id}_{item.quantity}"),
-                InlineKeyboardButton(text=f"{item.product.name}: {item.quantity}", callback_data="basket_display"),
-                InlineKeyboardButton(text="➕", callback_data=f"basket_inc_{item.product_id}_{item.quantity}")
-            ])
-        
-        keyboard.append([InlineKeyboardButton(text="✅ Buyurtmani tasdiqlash", callback_data="confirm_order_prompt")])
-        
-        await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard))
+        view = await load_basket_view(session, user.id)
     
+    await callback.message.edit_text(view.text(), reply_markup=view.keyboard())
+    await state.clear()
+    await callback.answer()
+
+
+async def answer_repeated_checkout(callback: CallbackQuery) -> bool:
+    """Answer a repeated "✅ Ha" tap from the dedup cache; False if this confirmation wasn't used yet."""
+    completed = recent_checkouts.get(callback.from_user.id, callback.message.message_id)
+    if completed is None:
+        return False
+    await callback.answer(f"Buyurtma #{completed.order_id} allaqachon qabul qilingan.")
+    return True
+
+
+async def finish_checkout(callback: CallbackQuery, state: FSMContext, order_id: int, confirmation: str):
+    recent_checkouts.put(callback.from_user.id, callback.message.message_id, CompletedCheckout(order_id, confirmation))
+    try:
+        await callback.message.edit_text(confirmation)
+    except TelegramBadRequest:
+        # Already showing this confirmation (the repeated tap lost the race on another worker)
+        pass
     await state.clear()
     await callback.answer()
 
 
 @router.callback_query(F.data == "confirm_order_yes_delivery")
-async def confirm_order_yes_delivery(callback: CallbackQuery, state: FSMContext):
+async def confirm_order_yes_delivery(callback: CallbackQuery, state: FSMContext, bot: Bot, send_queue: SendQueue):
     from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import (
-        get_basket_items, 
-        create_order, 
-        create_order_item, 
-        clear_basket
-    )
-    from app.config import GROUP_ID, BOT_TOKEN
-    from aiogram import Bot
+    from app.database.order_requests import checkout, BelowMinimumOrder
+    from app.database.branch_requests import find_delivery_zone, has_delivery_zones
+    
+    if await answer_repeated_checkout(callback):
+        return
     
-    bot = Bot(token=BOT_TOKEN)
     data = await state.get_data()
     
     async with async_session_maker() as session:
         user = await get_user_by_tg_id(session, callback.from_user.id)
-        basket_items = await get_basket_items(session, user.id)
         
-        if not basket_items:
-            await callback.answer("Savatingiz bo'sh!", show_alert=True)
+        # Zones may have changed since the location was checked: take fee, minimum and branch from now
+        zone = None
+        if data.get('latitude') is not None:
+            zone = await find_delivery_zone(session, data['latitude'], data['longitude'])
+        if zone is None and await has_delivery_zones(session):
+            # The zone that accepted the location was deleted or redrawn meanwhile
+            await callback.answer(
+                "❌ Bu manzilga yetkazib bera olmaymiz: joylashuv yetkazib berish hududlarimizdan tashqarida.",
+                show_alert=True
+            )
             return
         
-        # Calculate total
-        total = 0
-        items_text = ""
+        # Create order with delivery details, its items and clear the basket in one transaction
+        try:
+            result = await checkout(
+                session,
+                user.id,
+                delivery_type='delivery',
+                branch_id=zone.branch.id if zone else None,
+                latitude=data.get('latitude'),
+                longitude=data.get('longitude'),
+                confirm_message_id=callback.message.message_id,
+                delivery_fee=zone.delivery_fee if zone else None,
+                min_order=zone.min_order if zone else 0
+            )
+        except BelowMinimumOrder as e:
+            await callback.answer(
+                f"Minimal buyurtma summasi: {format_som(e.minimum)}. Savatingizda: {format_som(e.total)}",
+                show_alert=True
+            )
+            return
         
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
+        if not result:
+            await callback.answer("Savatingiz bo'sh!", show_alert=True)
+            return
         
-        # Create order with delivery details
-        order = await create_order(
-            session, 
-            user.id, 
-            total,
-            delivery_type='delivery',
-            latitude=data.get('latitude'),
-            longitude=data.get('longitude')
+        order, order_items, created = result
+        total = format_som(to_tiyin(order.total_price))
+        fee_text = ""
+        if order.delivery_fee is not None:
+            fee = to_tiyin(order.delivery_fee)
+            fee_text = f"🚚 Yetkazib berish: {format_som(fee) if fee else 'bepul'}\n"
+        confirmation = (
+            f"✅ <b>Buyurtma tasdiqlandi!</b>\n\n"
+            f"Sizning buyurtmangiz #{order.id} muvaffaqiyatli joylashtirildi.\n"
+            f"{fee_text}"
+            f"Jami: {total}\n"
+            f"Yetkazib berish turi: Yetkazib berish\n\n"
+            f"Tez orada joylashuvingizga yetkazib beramiz!"
         )
+        if not created:
+            # Repeated tap that reached the database: the order and its notification already exist
+            await finish_checkout(callback, state, order.id, confirmation)
+            return
         
-        # Create order items
-        for item in basket_items:
-            await create_order_item(
-                session,
-                order.id,
-                item.product_id,
-                item.product.name,
-                float(item.product.price),
-                item.quantity
-            )
+        items_text = BasketView.from_order_items(order_items).items_text
         
         # Send to group with delivery location
         group_text = (
@@ -403,11 +444,13 @@ async def confirm_order_yes_delivery(callback: CallbackQuery, state: FSMContext)
             f"👤 Mijoz: {user.full_name or user.first_name}\n"
             f"📱 Telefon: {user.phone_number or 'Berilmagan'}\n"
             f"🆔 Foydalanuvchi ID: {user.tg_id}\n"
-            f"🚚 Yetkazib berish turi: <b>Yetkazib berish</b>\n\n"
-            f"📦 <b>Buyurtma mahsulotlari:</b>\n"
+            f"🚚 Yetkazib berish turi: <b>Yetkazib berish</b>\n"
+            + (f"🏢 Filial: {zone.branch.name} ({zone.name})\n" if zone else "")
+            + f"\n📦 <b>Buyurtma mahsulotlari:</b>\n"
             f"{items_text}"
             f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>\n"
+            f"{fee_text}"
+            f"💵 <b>Jami: {total}</b>\n"
             f"📊 Holati: {order.status}"
         )
         
@@ -420,102 +463,66 @@ async def confirm_order_yes_delivery(callback: CallbackQuery, state: FSMContext)
             ]
         )
         
-        try:
-            # Send text first
-            group_message = await bot.send_message(
-                chat_id=GROUP_ID,
-                text=group_text,
-                reply_markup=group_keyboard,
-                parse_mode=ParseMode.HTML
-            )
-            
-            # Send location if available
-            latitude = data.get('latitude')
-            longitude = data.get('longitude')
-            if latitude is not None and longitude is not None:
-                await bot.send_location(
-                    chat_id=GROUP_ID,
-                    latitude=latitude,
-                    longitude=longitude,
-                    reply_to_message_id=group_message.message_id
-                )
-            
-            # Update order with group message id
-            order.group_message_id = group_message.message_id
-            await session.commit()
-        except Exception as e:
-            print(f"Error sending to group: {e}")
-        
-        # Clear basket
-        await clear_basket(session, user.id)
+        # Queued so a slow or rate-limited group never delays the customer's confirmation
+        send_queue.spawn(notify_group(
+            send_queue,
+            bot,
+            order.id,
+            group_text,
+            group_keyboard,
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            chat_id=zone.branch.notify_chat_id if zone else None
+        ))
     
-    await callback.message.edit_text(
-        f"✅ <b>Buyurtma tasdiqlandi!</b>\n\n"
-        f"Sizning buyurtmangiz #{order.id} muvaffaqiyatli joylashtirildi.\n"
-        f"Jami: {total:.2f} so'm\n"
-        f"Yetkazib berish turi: Yetkazib berish\n\n"
-        f"Tez orada joylashuvingizga yetkazib beramiz!"
-    )
-    await state.clear()
-    await callback.answer()
-    await bot.session.close()
+    await finish_checkout(callback, state, order.id, confirmation)
 
 
 @router.callback_query(F.data == "confirm_order_yes_pickup")
-async def confirm_order_yes_pickup(callback: CallbackQuery, state: FSMContext):
+async def confirm_order_yes_pickup(callback: CallbackQuery, state: FSMContext, bot: Bot, send_queue: SendQueue):
     from app.database.requests import get_user_by_tg_id
-    from app.database.order_requests import (
-        get_basket_items, 
-        create_order, 
-        create_order_item, 
-        clear_basket
-    )
+    from app.database.order_requests import checkout
     from app.database.branch_requests import get_branch_by_id
-    from app.config import GROUP_ID, BOT_TOKEN
-    from aiogram import Bot
     
-    bot = Bot(token=BOT_TOKEN)
+    if await answer_repeated_checkout(callback):
+        return
+    
     data = await state.get_data()
     branch_id = data.get('branch_id')
     
     async with async_session_maker() as session:
         user = await get_user_by_tg_id(session, callback.from_user.id)
-        basket_items = await get_basket_items(session, user.id)
-        branch = await get_branch_by_id(session, branch_id)
         
-        if not basket_items:
+        # Create order with pickup details, its items and clear the basket in one transaction
+        result = await checkout(
+            session,
+            user.id,
+            delivery_type='pickup',
+            branch_id=branch_id,
+            confirm_message_id=callback.message.message_id
+        )
+        
+        if not result:
             await callback.answer("Savatingiz bo'sh!", show_alert=True)
             return
         
-        # Calculate total
-        total = 0
-        items_text = ""
-        
-        for item in basket_items:
-            product = item.product
-            item_total = float(product.price) * item.quantity
-            total += item_total
-            items_text += f"• {product.name}\n  💰 {product.price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
-        
-        # Create order with pickup details
-        order = await create_order(
-            session, 
-            user.id, 
-            total,
-            delivery_type='pickup',
-            branch_id=branch_id
+        order, order_items, created = result
+        # The order's branch: a repeated tap may arrive after the state was cleared
+        branch = await get_branch_by_id(session, order.branch_id)
+        total = format_som(to_tiyin(order.total_price))
+        confirmation = (
+            f"✅ <b>Buyurtma tasdiqlandi!</b>\n\n"
+            f"Mahsulotingiz haqida ma'lumot filialga yuborildi.\n"
+            f"Ular tez orada siz bilan bog'lanishadi!\n\n"
+            f"📦 Buyurtma #{order.id}\n"
+            f"💵 Jami: {total}\n"
+            f"🏢 Filial: {branch.name}"
         )
+        if not created:
+            await finish_checkout(callback, state, order.id, confirmation)
+            return
         
-        # Create order items
-        for item in basket_items:
-            await create_order_item(
-                session,
-                order.id,
-                item.product_id,
-                item.product.name,
-                float(item.product.price),
-                item.quantity
-            )
+        items_text = BasketView.from_order_items(order_items).items_text
         
         # Send to group with branch info
         group_text = (
@@ -528,7 +535,7 @@ async def confirm_order_yes_pickup(callback: CallbackQuery, state: FSMContext):
             f"📦 <b>Buyurtma mahsulotlari:</b>\n"
             f"{items_text}"
             f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {total:.2f} so'm</b>\n"
+            f"💵 <b>Jami: {total}</b>\n"
             f"📊 Holati: {order.status}"
         )
         
@@ -541,48 +548,22 @@ async def confirm_order_yes_pickup(callback: CallbackQuery, state: FSMContext):
             ]
         )
         
-        try:
-            group_message = await bot.send_message(
-                chat_id=GROUP_ID,
-                text=group_text,
-                reply_markup=group_keyboard,
-                parse_mode=ParseMode.HTML
-            )
-            
-            # Update order with group message id
-            order.group_message_id = group_message.message_id
-            await session.commit()
-        except Exception as e:
-            print(f"Error sending to group: {e}")
-        
-        # Clear basket
-        await clear_basket(session, user.id)
+        # Queued so a slow or rate-limited group never delays the customer's confirmation
+        send_queue.spawn(notify_group(
+            send_queue, bot, order.id, group_text, group_keyboard, chat_id=branch.notify_chat_id
+        ))
     
-    await callback.message.edit_text(
-        f"✅ <b>Buyurtma tasdiqlandi!</b>\n\n"
-        f"Mahsulotingiz haqida ma'lumot filialga yuborildi.\n"
-        f"Ular tez orada siz bilan bog'lanishadi!\n\n"
-        f"📦 Buyurtma #{order.id}\n"
-        f"💵 Jami: {total:.2f} so'm\n"
-        f"🏢 Filial: {branch.name}"
-    )
-    await state.clear()
-    await callback.answer()
-    await bot.session.close()
+    await finish_checkout(callback, state, order.id, confirmation)
 
 
 @router.callback_query(F.data.startswith("order_status_"))
-async def update_order_status_handler(callback: CallbackQuery):
+async def update_order_status_handler(callback: CallbackQuery, bot: Bot, send_queue: SendQueue):
     from app.database.order_requests import update_order_status, get_order_by_id, get_order_items, get_user_by_id
-    from app.config import BOT_TOKEN
-    from aiogram import Bot
     
     parts = callback.data.split("_")
     order_id = int(parts[2])
     new_status = parts[3]
     
-    bot = Bot(token=BOT_TOKEN)
-    
     async with async_session_maker() as session:
         order = await update_order_status(session, order_id, new_status)
         
@@ -594,10 +575,7 @@ async def update_order_status_handler(callback: CallbackQuery):
         order_items = await get_order_items(session, order_id)
         user = await get_user_by_id(session, order.user_id)
         
-        items_text = ""
-        for item in order_items:
-            item_total = float(item.product_price) * item.quantity
-            items_text += f"• {item.product_name}\n  💰 {item.product_price} so'm x {item.quantity} = {item_total:.2f} so'm\n\n"
+        items_text = BasketView.from_order_items(order_items).items_text
         
         # Update group message with HTML parse mode
         group_text = (
@@ -608,7 +586,8 @@ async def update_order_status_handler(callback: CallbackQuery):
             f"📦 <b>Buyurtma mahsulotlari:</b>\n"
             f"{items_text}"
             f"━━━━━━━━━━━━━━━\n"
-            f"💵 <b>Jami: {order.total_price} so'm</b>\n"
+            + (f"🚚 Yetkazib berish: {format_som(to_tiyin(order.delivery_fee))}\n" if order.delivery_fee else "")
+            + f"💵 <b>Jami: {format_som(to_tiyin(order.total_price))}</b>\n"
             f"📊 Holati: <b>{new_status.upper()}</b>"
         )
         
@@ -623,20 +602,20 @@ async def update_order_status_handler(callback: CallbackQuery):
         
         try:
             await callback.message.edit_text(group_text, reply_markup=group_keyboard, parse_mode=ParseMode.HTML)
-        except:
-            pass
-        
-        # Notify user with HTML parse mode
-        try:
-            status_emoji = "❌" if new_status == "cancelled" else "✅"
-            await bot.send_message(
-                chat_id=user.tg_id,
-                text=f"{status_emoji} <b>Buyurtma #{order.id} holati yangilandi</b>\n\n"
-                     f"Buyurtma holati yangilandi: <b>{new_status.upper()}</b>",
-                parse_mode=ParseMode.HTML
-            )
-        except Exception as e:
-            print(f"Error notifying user: {e}")
+        except TelegramBadRequest as e:
+            # The status change is saved either way; the group message may be too old to edit
+            logging.warning("Could not update order #%s in the group: %s", order.id, e.message)
+        
+        # Notify user with HTML parse mode (queued; delivery failures are logged by the queue)
+        status_emoji = "❌" if new_status == "cancelled" else "✅"
+        user_text = (
+            f"{status_emoji} <b>Buyurtma #{order.id} holati yangilandi</b>\n\n"
+            f"Buyurtma holati yangilandi: <b>{new_status.upper()}</b>"
+        )
+        await send_queue.enqueue(
+            user.tg_id,
+            lambda: bot.send_message(chat_id=user.tg_id, text=user_text, parse_mode=ParseMode.HTML),
+            Priority.USER
+        )
     
     await callback.answer(f"Buyurtma holati yangilandi: {new_status}!")
-    await bot.session.close()
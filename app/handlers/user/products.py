@@ -2,69 +2,59 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.database.engine import async_session_maker
-from app.database.product_requests import get_products_by_type, get_product_by_id
+from app.database.product_requests import get_products_page, get_product_by_id
+from app.keyboards.inline import get_catalog_page_keyboard
+from app.utils.money import format_som, to_tiyin
 
 router = Router()
 
+CATEGORY_HEADERS = {
+    "weight_loss": (
+        "🔻 <b>Vazn yo'qotish mahsulotlari</b>\n\n"
+        "Bu toifadagi mahsulotlar tanangizning ortiqcha vaznini yo'qotishga yordam beradi.\n\n"
+    ),
+    "weight_gain": (
+        "🔺 <b>Vazn olish mahsulotlari</b>\n\n"
+        "Bu toifadagi mahsulotlar tanangizga sog'lom vazn va mushak massasini oshirishga yordam beradi.\n\n"
+    ),
+}
 
-@router.message(F.text == "🔻 Vazn yo'qotish")
-async def lose_weight_menu(message: Message):
+
+async def render_category_page(product_type: str, after_id: int = 0):
+    """Text and keyboard of one page of a category (served from the catalog cache)."""
     async with async_session_maker() as session:
-        products = await get_products_by_type(session, "weight_loss")
-    
-    if not products:
-        await message.answer(
-            "🔻 <b>Vazn yo'qotish mahsulotlari</b>\n\n"
-            "Bu toifadagi mahsulotlar tanangizning ortiqcha vaznini yo'qotishga yordam beradi.\n\n"
-            "Hozircha bu toifada mahsulotlar mavjud emas."
-        )
-        return
-    
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"{product.name} - {product.price} so'm",
-                callback_data=f"user_product_{product.id}"
-            )
-        ])
+        page = await get_products_page(session, product_type, after_id)
     
-    await message.answer(
-        "🔻 <b>Vazn yo'qotish mahsulotlari</b>\n\n"
-        "Bu toifadagi mahsulotlar tanangizning ortiqcha vaznini yo'qotishga yordam beradi.\n\n"
-        "Batafsil ma'lumot olish uchun mahsulotni tanlang:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard)
-    )
+    header = CATEGORY_HEADERS.get(product_type, CATEGORY_HEADERS["weight_gain"])
+    if not page.products:
+        return header + "Hozircha bu toifada mahsulotlar mavjud emas.", None
+    return header + "Batafsil ma'lumot olish uchun mahsulotni tanlang:", get_catalog_page_keyboard(page)
+
+
+@router.message(F.text == "🔻 Vazn yo'qotish")
+async def lose_weight_menu(message: Message):
+    text, keyboard = await render_category_page("weight_loss")
+    await message.answer(text, reply_markup=keyboard)
 
 
 @router.message(F.text == "🔺 Vazn olish")
 async def gain_weight_menu(message: Message):
-    async with async_session_maker() as session:
-        products = await get_products_by_type(session, "weight_gain")
-    
-    if not products:
-        await message.answer(
-            "🔺 <b>Vazn olish mahsulotlari</b>\n\n"
-            "Bu toifadagi mahsulotlar tanangizga sog'lom vazn va mushak massasini oshirishga yordam beradi.\n\n"
-            "Hozircha bu toifada mahsulotlar mavjud emas."
-        )
-        return
-    
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"{product.name} - {product.price} so'm",
-                callback_data=f"user_product_{product.id}"
-            )
-        ])
-    
-    await message.answer(
-        "🔺 <b>Vazn olish mahsulotlari</b>\n\n"
-        "Bu toifadagi mahsulotlar tanangizga sog'lom vazn va mushak massasini oshirishga yordam beradi.\n\n"
-        "Batafsil ma'lumot olish uchun mahsulotni tanlang:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard)
-    )
+    text, keyboard = await render_category_page("weight_gain")
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("catalog_") & (F.data != "catalog_page"))
+async def category_page(callback: CallbackQuery):
+    # catalog_{product_type}_{after_id}; the type itself may contain underscores
+    product_type, after_id = callback.data.removeprefix("catalog_").rsplit("_", 1)
+    text, keyboard = await render_category_page(product_type, int(after_id))
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@router.callback_query(F.data == "catalog_page")
+async def catalog_page_counter(callback: CallbackQuery):
+    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("user_product_"))
@@ -80,7 +70,7 @@ async def view_user_product(callback: CallbackQuery):
     
     text = (
         f"📦 <b>{product.name}</b>\n\n"
-        f"💰 Narxi: {product.price} so'm\n"
+        f"💰 Narxi: {format_som(to_tiyin(product.price))}\n"
         f"📝 Tavsif: {product.description or 'Tavsif berilmagan'}\n\n"
         "Bu mahsulotni buyurtma qilish uchun savatga qo'shing!"
     )
@@ -108,38 +98,12 @@ async def view_user_product(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("back_to_"))
 async def back_to_category(callback: CallbackQuery):
     product_type = callback.data.replace("back_to_", "")
-    
-    async with async_session_maker() as session:
-        products = await get_products_by_type(session, product_type)
-    
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"{product.name} - {product.price} so'm",
-                callback_data=f"user_product_{product.id}"
-            )
-        ])
-    
-    if product_type == "weight_loss":
-        title = "🔻 <b>Vazn yo'qotish mahsulotlari</b>\n\n"
-        description = "Bu toifadagi mahsulotlar tanangizning ortiqcha vaznini yo'qotishga yordam beradi.\n\n"
-    else:
-        title = "🔺 <b>Vazn olish mahsulotlari</b>\n\n"
-        description = "Bu toifadagi mahsulotlar tanangizga sog'lom vazn va mushak massasini oshirishga yordam beradi.\n\n"
-    
-    text = title + description + "Batafsil ma'lumot olish uchun mahsulotni tanlang:"
+    text, keyboard = await render_category_page(product_type)
     
     # Check if current message has photo (no text to edit)
     if callback.message.photo:
         await callback.message.delete()
-        await callback.message.answer(
-            text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard)
-        )
+        await callback.message.answer(text, reply_markup=keyboard)
     else:
-        await callback.message.edit_text(
-            text,
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard)
-        )
+        await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
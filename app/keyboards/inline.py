@@ -1,4 +1,5 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from app.utils.money import format_som, to_tiyin
 
 
 def get_admin_panel_keyboard():
@@ -9,51 +10,102 @@ def get_admin_panel_keyboard():
             [InlineKeyboardButton(text="✏️ Mahsulotni tahrirlash", callback_data="admin_edit_product")],
             [InlineKeyboardButton(text="🗑 Mahsulotni o'chirish", callback_data="admin_delete_product")],
             [InlineKeyboardButton(text="🏢 Filiallarni boshqarish", callback_data="admin_branches")],
+            [InlineKeyboardButton(text="📊 Statistika", callback_data="admin_stats")],
+            [InlineKeyboardButton(text="📤 Buyurtmalarni eksport qilish", callback_data="admin_export")],
             [InlineKeyboardButton(text="🔙 Asosiy menyuga qaytish", callback_data="admin_back_main")]
         ]
     )
     return keyboard
 
 
-def get_product_list_keyboard(products):
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"{product.name} - {product.price} so'm", 
-                callback_data=f"product_view_{product.id}"
-            )
-        ])
-    keyboard.append([InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")])
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+# Page markups depend only on the catalog contents, so they are built once per catalog version
+_page_markups: dict[tuple, InlineKeyboardMarkup] = {}
+_page_markups_version: int | None = None
 
 
-def get_product_edit_keyboard(products):
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"{product.name}", 
-                callback_data=f"product_edit_{product.id}"
-            )
-        ])
-    keyboard.append([InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")])
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+def _memoized_page_markup(kind: str, page, build) -> InlineKeyboardMarkup:
+    global _page_markups_version
+    if page.version != _page_markups_version:
+        _page_markups.clear()
+        _page_markups_version = page.version
+    key = (kind, page.product_type, page.after_id)
+    markup = _page_markups.get(key)
+    if markup is None:
+        markup = _page_markups[key] = build()
+    return markup
 
 
-def get_product_delete_keyboard(products):
-    keyboard = []
-    for product in products:
-        keyboard.append([
-            InlineKeyboardButton(
-                text=f"❌ {product.name}", 
-                callback_data=f"product_delete_{product.id}"
-            )
-        ])
-    keyboard.append([InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")])
+def get_page_navigation_row(page, callback_prefix):
+    """◀️ n/N ▶️ row; page callbacks are ``{callback_prefix}_{after_id}``."""
+    if page.pages <= 1:
+        return None
+    row = []
+    if page.prev_after_id is not None:
+        row.append(InlineKeyboardButton(text="◀️", callback_data=f"{callback_prefix}_{page.prev_after_id}"))
+    row.append(InlineKeyboardButton(text=f"{page.number}/{page.pages}", callback_data="catalog_page"))
+    if page.next_after_id is not None:
+        row.append(InlineKeyboardButton(text="▶️", callback_data=f"{callback_prefix}_{page.next_after_id}"))
+    return row
+
+
+def _product_page_keyboard(page, button, callback_prefix, back_button):
+    keyboard = [[button(product)] for product in page.products]
+    navigation = get_page_navigation_row(page, callback_prefix)
+    if navigation:
+        keyboard.append(navigation)
+    if back_button:
+        keyboard.append([back_button])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+def get_catalog_page_keyboard(page):
+    return _memoized_page_markup('catalog', page, lambda: _product_page_keyboard(
+        page,
+        lambda product: InlineKeyboardButton(
+            text=f"{product.name} - {format_som(to_tiyin(product.price))}",
+            callback_data=f"user_product_{product.id}"
+        ),
+        f"catalog_{page.product_type}",
+        None
+    ))
+
+
+def get_product_list_keyboard(page):
+    return _memoized_page_markup('admin_view', page, lambda: _product_page_keyboard(
+        page,
+        lambda product: InlineKeyboardButton(
+            text=f"{product.name} - {format_som(to_tiyin(product.price))}", 
+            callback_data=f"product_view_{product.id}"
+        ),
+        "admin_view_products",
+        InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")
+    ))
+
+
+def get_product_edit_keyboard(page):
+    return _memoized_page_markup('admin_edit', page, lambda: _product_page_keyboard(
+        page,
+        lambda product: InlineKeyboardButton(
+            text=f"{product.name}", 
+            callback_data=f"product_edit_{product.id}"
+        ),
+        "admin_edit_product",
+        InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")
+    ))
+
+
+def get_product_delete_keyboard(page):
+    return _memoized_page_markup('admin_delete', page, lambda: _product_page_keyboard(
+        page,
+        lambda product: InlineKeyboardButton(
+            text=f"❌ {product.name}", 
+            callback_data=f"product_delete_{product.id}"
+        ),
+        "admin_delete_product",
+        InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")
+    ))
+
+
 def get_product_detail_keyboard(product_id):
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -77,6 +129,49 @@ def get_confirm_delete_keyboard(product_id):
     return keyboard
 
 
+def get_stats_keyboard(days: int):
+    periods = [
+        InlineKeyboardButton(text=f"{'• ' if period == days else ''}{period} kun", callback_data=f"admin_stats_{period}")
+        for period in (7, 30)
+    ]
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            periods,
+            [InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")]
+        ]
+    )
+    return keyboard
+
+
+def get_export_period_keyboard():
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="Bugun", callback_data="export_period_today"),
+                InlineKeyboardButton(text="7 kun", callback_data="export_period_7"),
+                InlineKeyboardButton(text="30 kun", callback_data="export_period_30")
+            ],
+            [InlineKeyboardButton(text="📅 Boshqa oraliq", callback_data="export_period_custom")],
+            [InlineKeyboardButton(text="🗂 Hammasi", callback_data="export_period_all")],
+            [InlineKeyboardButton(text="🔙 Admin panelga qaytish", callback_data="admin_panel")]
+        ]
+    )
+    return keyboard
+
+
+def get_export_format_keyboard(xlsx: bool):
+    formats = [InlineKeyboardButton(text="📄 CSV", callback_data="export_csv")]
+    if xlsx:
+        formats.append(InlineKeyboardButton(text="📊 Excel (XLSX)", callback_data="export_xlsx"))
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            formats,
+            [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_export")]
+        ]
+    )
+    return keyboard
+
+
 def get_cancel_keyboard():
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -142,6 +237,7 @@ def get_branch_detail_keyboard(branch_id):
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="✏️ Tahrirlash", callback_data=f"branch_edit_{branch_id}")],
+            [InlineKeyboardButton(text="🗺 Yetkazib berish hududlari", callback_data=f"branch_zones_{branch_id}")],
             [InlineKeyboardButton(text="🗑 O'chirish", callback_data=f"branch_delete_{branch_id}")],
             [InlineKeyboardButton(text="🔙 Filiallarga qaytish", callback_data="admin_view_branches")]
         ]
@@ -159,3 +255,35 @@ def get_confirm_delete_branch_keyboard(branch_id):
         ]
     )
     return keyboard
+
+
+def get_zone_list_keyboard(branch_id, zones):
+    keyboard = [
+        [InlineKeyboardButton(text=f"🗺 {zone.name}", callback_data=f"zone_view_{zone.id}")]
+        for zone in zones
+    ]
+    keyboard.append([InlineKeyboardButton(text="➕ Hudud qo'shish", callback_data=f"zone_add_{branch_id}")])
+    keyboard.append([InlineKeyboardButton(text="🔙 Filialga qaytish", callback_data=f"branch_view_{branch_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def get_zone_detail_keyboard(zone_id, branch_id):
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="🗑 O'chirish", callback_data=f"zone_delete_{zone_id}")],
+            [InlineKeyboardButton(text="🔙 Hududlarga qaytish", callback_data=f"branch_zones_{branch_id}")]
+        ]
+    )
+    return keyboard
+
+
+def get_confirm_delete_zone_keyboard(zone_id, branch_id):
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="✅ Ha, o'chirish", callback_data=f"zone_confirm_delete_{zone_id}"),
+                InlineKeyboardButton(text="❌ Bekor qilish", callback_data=f"branch_zones_{branch_id}")
+            ]
+        ]
+    )
+    return keyboard
@@ -16,7 +16,7 @@ def get_main_menu_keyboard():
     keyboard = ReplyKeyboardMarkup(
         keyboard=[
             [KeyboardButton(text="🔻 Vazn yo'qotish"), KeyboardButton(text="🔺 Vazn olish")],
-            [KeyboardButton(text="📦 Mening buyurtmalarim")]
+            [KeyboardButton(text="🛒 Savatim"), KeyboardButton(text="📦 Mening buyurtmalarim")]
         ],
         resize_keyboard=True
     )
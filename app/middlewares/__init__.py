@@ -0,0 +1,11 @@
+from .metrics import UpdateMetricsMiddleware, HandlerMetricsMiddleware, RequestMetricsMiddleware
+from .ordering import UserEventIsolation
+from .debounce import StepperDebounceMiddleware
+
+__all__ = [
+    'UpdateMetricsMiddleware',
+    'HandlerMetricsMiddleware',
+    'RequestMetricsMiddleware',
+    'UserEventIsolation',
+    'StepperDebounceMiddleware'
+]
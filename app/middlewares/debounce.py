@@ -0,0 +1,88 @@
+import asyncio
+import re
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from app.utils.metrics import STEPPER_TAPS_PER_EDIT
+
+# qty_inc_{product_id}_{quantity} / qty_dec_... (product card) and basket_inc_{product_id} / basket_dec_... (basket)
+STEPPER_CALLBACK = re.compile(r'(qty|basket)_(inc|dec)_(\d+)')
+
+
+class _Burst:
+    __slots__ = ('delta', 'taps', 'flush', 'dispatched')
+
+    def __init__(self, delta: int):
+        self.delta = delta
+        self.taps = 1
+        self.flush = asyncio.Event()
+        self.dispatched = asyncio.Event()
+
+
+class StepperDebounceMiddleware(BaseMiddleware):
+    """Outer ``update`` middleware that coalesces bursts of ➕/➖ taps.
+
+    The first tap on a stepper (per user, message and product) waits ``window``
+    seconds; taps arriving meanwhile are answered at once and only add to its
+    delta. Then the first tap is handled once, with the net change passed to the
+    handler as ``stepper_delta``: one DB write and one edit per burst.
+
+    Must run before aiogram's FSM middleware (which serializes a user's updates),
+    otherwise the taps would queue up behind each other instead of meeting here.
+    Any other update of the same user flushes the user's pending bursts first, so
+    it's still handled after them.
+    """
+
+    def __init__(self, window: float = 0.25):
+        self.window = window
+        self._bursts: dict[tuple, _Burst] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = event.callback_query
+        match = STEPPER_CALLBACK.match(callback.data or '') if callback and callback.message else None
+        if match is None:
+            user = data.get('event_from_user')
+            if user is not None:
+                await self._flush_user(user.id)
+            return await handler(event, data)
+
+        stepper, direction, product_id = match.groups()
+        delta = 1 if direction == 'inc' else -1
+        key = (callback.from_user.id, callback.message.chat.id, callback.message.message_id, stepper, int(product_id))
+
+        burst = self._bursts.get(key)
+        if burst is not None:
+            burst.delta += delta
+            burst.taps += 1
+            await callback.answer()
+            return None
+
+        burst = self._bursts[key] = _Burst(delta)
+        try:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(burst.flush.wait(), self.window)
+        finally:
+            del self._bursts[key]
+            # The handler below queues for the user's lock before anything else can run
+            burst.dispatched.set()
+
+        STEPPER_TAPS_PER_EDIT.labels(stepper).observe(burst.taps)
+        if not burst.delta:
+            # The taps cancelled each other out
+            await callback.answer()
+            return None
+        data['stepper_delta'] = burst.delta
+        return await handler(event, data)
+
+    async def _flush_user(self, user_id: int):
+        pending = [burst for key, burst in self._bursts.items() if key[0] == user_id]
+        for burst in pending:
+            burst.flush.set()
+        for burst in pending:
+            await burst.dispatched.wait()
@@ -0,0 +1,95 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from app.utils.metrics import (
+    UPDATES,
+    UPDATE_DURATION,
+    UPDATE_ERRORS,
+    UPDATE_DB_STATEMENTS,
+    UPDATE_DB_DURATION,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    TELEGRAM_REQUEST_DURATION,
+    TELEGRAM_RATE_LIMITED,
+    TELEGRAM_ERRORS,
+    UpdateStats,
+    current_update_stats
+)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer ``update`` middleware: counts and times every update, including the
+    SQL statements it ran (collected by the engine's cursor hooks)."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        update_type = event.event_type
+        stats = UpdateStats()
+        token = current_update_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            UPDATE_ERRORS.labels(update_type).inc()
+            raise
+        finally:
+            current_update_stats.reset(token)
+            UPDATES.labels(update_type).inc()
+            UPDATE_DURATION.labels(update_type).observe(time.perf_counter() - start)
+            UPDATE_DB_STATEMENTS.labels(update_type).observe(stats.statements)
+            UPDATE_DB_DURATION.labels(update_type).observe(stats.db_seconds)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: latency and errors per handler, labelled by the handler's
+    module (``user.orders``) and function name (``basket_increase``)."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = data['handler'].callback
+        router = getattr(callback, '__module__', 'unknown').removeprefix('app.handlers.')
+        name = getattr(callback, '__name__', type(callback).__name__)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(router, name, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(router, name).observe(time.perf_counter() - start)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: Bot API latency, 429s and errors per method."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            TELEGRAM_RATE_LIMITED.labels(api_method).inc()
+            raise
+        except Exception as e:
+            TELEGRAM_ERRORS.labels(api_method, type(e).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(api_method).observe(time.perf_counter() - start)
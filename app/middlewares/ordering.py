@@ -0,0 +1,70 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+from app.utils.metrics import USER_LOCK_WAIT, USER_LOCKS
+
+
+class _UserLock:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # Updates holding or waiting for the lock; only entries with none are evicted
+        self.users = 0
+
+
+class UserEventIsolation(BaseEventIsolation):
+    """Runs the updates of one Telegram user strictly one after another, in arrival order.
+
+    Plugged into the dispatcher as ``events_isolation``: aiogram's FSM middleware
+    takes the lock before it loads the user's state, so the next update of the same
+    user sees everything the previous one wrote (basket quantity, checkout state).
+    Updates of different users don't share a lock and run concurrently.
+
+    Locks are kept per ``from_user.id`` in LRU order; once more than ``maxsize``
+    are kept, the least recently used idle ones are dropped. Serialization is per
+    process: several webhook workers still need the database constraints.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._locks: OrderedDict[int, _UserLock] = OrderedDict()
+        USER_LOCKS.set_function(lambda: len(self._locks))
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        entry = self._locks.get(key.user_id)
+        if entry is None:
+            entry = self._locks[key.user_id] = _UserLock()
+        else:
+            self._locks.move_to_end(key.user_id)
+
+        entry.users += 1
+        try:
+            start = time.perf_counter()
+            # asyncio.Lock wakes waiters first-in first-out, which keeps the arrival order
+            async with entry.lock:
+                USER_LOCK_WAIT.observe(time.perf_counter() - start)
+                yield
+        finally:
+            entry.users -= 1
+            self._evict()
+
+    def _evict(self):
+        excess = len(self._locks) - self.maxsize
+        if excess <= 0:
+            return
+        idle = []
+        for user_id, entry in self._locks.items():
+            if not entry.users:
+                idle.append(user_id)
+                if len(idle) == excess:
+                    break
+        for user_id in idle:
+            del self._locks[user_id]
+
+    async def close(self) -> None:
+        self._locks.clear()
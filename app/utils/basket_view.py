@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from app.utils.money import format_som, sum_lines, to_tiyin
+
+BASKET_TITLE = "🛒 <b>Mening savatim</b>\n\n"
+EMPTY_BASKET_TEXT = (
+    BASKET_TITLE
+    + "Savatingiz bo'sh.\n"
+    "Buyurtma yaratish uchun mahsulotlarni savatga qo'shing!"
+)
+SEPARATOR = "━━━━━━━━━━━━━━━\n"
+CONFIRM_ROW = (InlineKeyboardButton(text="✅ Buyurtmani tasdiqlash", callback_data="confirm_order_prompt"),)
+
+
+@dataclass(frozen=True, slots=True)
+class BasketLine:
+    product_id: int
+    name: str
+    price: int  # tiyin
+    quantity: int
+
+    @property
+    def total(self) -> int:
+        return self.price * self.quantity
+
+
+@lru_cache(maxsize=4096)
+def line_text(name: str, price: int, quantity: int) -> str:
+    return f"• {name}\n  💰 {format_som(price)} x {quantity} = {format_som(price * quantity)}\n\n"
+
+
+@lru_cache(maxsize=4096)
+def line_buttons(product_id: int, name: str, quantity: int) -> tuple[InlineKeyboardButton, ...]:
+    return (
+        InlineKeyboardButton(text="➖", callback_data=f"basket_dec_{product_id}"),
+        InlineKeyboardButton(text=f"{name}: {quantity}", callback_data="basket_display"),
+        InlineKeyboardButton(text="➕", callback_data=f"basket_inc_{product_id}")
+    )
+
+
+class BasketView:
+    """Renders a basket (or the items of an order) as message text and stepper keyboard.
+
+    Built from a compact snapshot of ``BasketLine``s. The text and buttons of each
+    line are memoized by their contents, so re-rendering a basket after one line
+    changed only formats that line.
+    """
+
+    __slots__ = ('lines', 'total', '_texts')
+
+    def __init__(self, lines: Iterable[BasketLine]):
+        self.lines = tuple(lines)
+        self.total = sum_lines((line.price for line in self.lines), (line.quantity for line in self.lines))
+        self._texts = [line_text(line.name, line.price, line.quantity) for line in self.lines]
+
+    @classmethod
+    def from_basket_items(cls, basket_items) -> 'BasketView':
+        """From BasketItem rows loaded with their product."""
+        return cls(
+            BasketLine(item.product_id, item.product.name, to_tiyin(item.product.price), item.quantity)
+            for item in basket_items
+        )
+
+    @classmethod
+    def from_order_items(cls, order_items) -> 'BasketView':
+        return cls(
+            BasketLine(item.product_id, item.product_name, to_tiyin(item.product_price), item.quantity)
+            for item in order_items
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.lines)
+
+    @property
+    def items_text(self) -> str:
+        return "".join(self._texts)
+
+    def text(self) -> str:
+        if not self.lines:
+            return EMPTY_BASKET_TEXT
+        return f"{BASKET_TITLE}{self.items_text}{SEPARATOR}💵 <b>Jami: {format_som(self.total)}</b>"
+
+    def keyboard(self) -> InlineKeyboardMarkup | None:
+        if not self.lines:
+            return None
+        rows = [list(line_buttons(line.product_id, line.name, line.quantity)) for line in self.lines]
+        rows.append(list(CONFIRM_ROW))
+        return InlineKeyboardMarkup(inline_keyboard=rows)
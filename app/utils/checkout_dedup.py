@@ -0,0 +1,43 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class CompletedCheckout:
+    order_id: int
+    confirmation: str  # the text the confirmation message was edited to
+
+
+class CheckoutDedupCache:
+    """Recently completed checkouts per (user, confirmation message).
+
+    A repeated tap on the same "✅ Ha" button is answered from here without
+    touching the database; the ``checkout_key`` unique constraint on orders
+    covers whatever this misses (restarts, other workers, expired entries).
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._checkouts: OrderedDict[tuple[int, int], tuple[CompletedCheckout, float]] = OrderedDict()
+
+    def get(self, user_id: int, message_id: int) -> CompletedCheckout | None:
+        entry = self._checkouts.get((user_id, message_id))
+        if entry is None:
+            return None
+        checkout, stored_at = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._checkouts[(user_id, message_id)]
+            return None
+        return checkout
+
+    def put(self, user_id: int, message_id: int, checkout: CompletedCheckout):
+        key = (user_id, message_id)
+        self._checkouts[key] = (checkout, time.monotonic())
+        self._checkouts.move_to_end(key)
+        while len(self._checkouts) > self.maxsize:
+            self._checkouts.popitem(last=False)
+
+
+recent_checkouts = CheckoutDedupCache()
@@ -0,0 +1,153 @@
+"""Distances, point-in-polygon, and grid indexes for nearest-point and
+containing-polygon queries over a few hundred places or areas.
+
+Coordinates are WGS84 degrees. Longitudes are not wrapped around ±180°, which
+is fine for a service area the size of a country.
+"""
+import heapq
+import math
+from typing import Any, Iterable, Sequence
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _ring(i: int, j: int, r: int):
+    """Cells at Chebyshev distance ``r`` from cell ``(i, j)``."""
+    if r == 0:
+        yield i, j
+        return
+    for d in range(-r, r + 1):
+        yield i - r, j + d
+        yield i + r, j + d
+    for d in range(-r + 1, r):
+        yield i + d, j - r
+        yield i + d, j + r
+
+
+class GeoGrid:
+    """Immutable K-nearest index: points bucketed into square cells of ``cell`` degrees.
+
+    A query scans rings of cells around its own cell and stops as soon as the
+    K-th nearest candidate is closer than anything an unscanned ring could hold,
+    so it reads a handful of buckets instead of every point. Should the rings
+    grow past the number of points (a query far outside the indexed area), it
+    falls back to checking every point.
+    """
+
+    __slots__ = ('cell', '_points', '_buckets', '_bounds', '_cos_lat')
+
+    def __init__(self, points: Iterable[tuple[float, float, Any]], cell: float = 0.05):
+        self.cell = cell
+        self._points = tuple((float(lat), float(lon), item) for lat, lon, item in points)
+        self._buckets: dict[tuple[int, int], list] = {}
+        for point in self._points:
+            self._buckets.setdefault(self._cell(point[0], point[1]), []).append(point)
+        rows = [i for i, _ in self._buckets] or [0]
+        cols = [j for _, j in self._buckets] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        # A degree of longitude is shortest at the point farthest from the equator
+        self._cos_lat = math.cos(math.radians(max((abs(lat) for lat, _, _ in self._points), default=0)))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell), math.floor(longitude / self.cell)
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> list[tuple[Any, float]]:
+        """Up to ``k`` ``(item, distance_km)`` pairs, nearest first."""
+        if not self._points or k <= 0:
+            return []
+        i, j = self._cell(latitude, longitude)
+        # Anything beyond ring r is at least r cells away along one of the axes
+        ring_km = self.cell * KM_PER_DEGREE * min(self._cos_lat, math.cos(math.radians(latitude)))
+        min_i, max_i, min_j, max_j = self._bounds
+        last_ring = max(abs(i - min_i), abs(i - max_i), abs(j - min_j), abs(j - max_j))
+
+        found = []
+        for r in range(last_ring + 1):
+            if (2 * r + 1) ** 2 > 4 * len(self._points):
+                return self._nearest_by_scan(latitude, longitude, k)
+            for cell in _ring(i, j, r):
+                for lat, lon, item in self._buckets.get(cell, ()):
+                    found.append((distance_km(latitude, longitude, lat, lon), item))
+            if len(found) >= k:
+                found.sort(key=lambda candidate: candidate[0])
+                del found[k:]
+                if found[-1][0] <= r * ring_km:
+                    break
+        found.sort(key=lambda candidate: candidate[0])
+        return [(item, distance) for distance, item in found[:k]]
+
+    def _nearest_by_scan(self, latitude: float, longitude: float, k: int) -> list[tuple[Any, float]]:
+        nearest = heapq.nsmallest(
+            k,
+            ((distance_km(latitude, longitude, lat, lon), item) for lat, lon, item in self._points),
+            key=lambda candidate: candidate[0]
+        )
+        return [(item, distance) for distance, item in nearest]
+
+
+def point_in_polygon(latitude: float, longitude: float, polygon: Sequence[tuple[float, float]]) -> bool:
+    """Ray casting over a simple polygon given as ``(lat, lon)`` vertices (not closed)."""
+    inside = False
+    lat_j, lon_j = polygon[-1]
+    for lat_i, lon_i in polygon:
+        if (lat_i > latitude) != (lat_j > latitude):
+            crossing = lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if longitude < crossing:
+                inside = not inside
+        lat_j, lon_j = lat_i, lon_i
+    return inside
+
+
+class PolygonGrid:
+    """Immutable containing-polygon index: each polygon is listed in every cell of
+    ``cell`` degrees its bounding box touches.
+
+    A query looks up its own cell, drops candidates by bounding box and runs the
+    exact ray casting test on what is left, so its cost depends on how many
+    polygons overlap that one cell, not on how many there are in total.
+    """
+
+    __slots__ = ('cell', '_buckets', '_count')
+
+    def __init__(self, polygons: Iterable[tuple[Sequence[tuple[float, float]], Any]], cell: float = 0.05):
+        self.cell = cell
+        self._buckets: dict[tuple[int, int], list] = {}
+        self._count = 0
+        for polygon, item in polygons:
+            vertices = tuple((float(lat), float(lon)) for lat, lon in polygon)
+            if len(vertices) < 3:
+                continue
+            lats = [lat for lat, _ in vertices]
+            lons = [lon for _, lon in vertices]
+            entry = (min(lats), max(lats), min(lons), max(lons), vertices, item)
+            for i in range(math.floor(entry[0] / cell), math.floor(entry[1] / cell) + 1):
+                for j in range(math.floor(entry[2] / cell), math.floor(entry[3] / cell) + 1):
+                    self._buckets.setdefault((i, j), []).append(entry)
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def containing(self, latitude: float, longitude: float) -> list:
+        """Items of all polygons that contain the point, in the order they were given."""
+        cell = (math.floor(latitude / self.cell), math.floor(longitude / self.cell))
+        return [
+            item
+            for min_lat, max_lat, min_lon, max_lon, vertices, item in self._buckets.get(cell, ())
+            if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+            and point_in_polygon(latitude, longitude, vertices)
+        ]
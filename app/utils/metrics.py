@@ -0,0 +1,83 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus metrics shared by the whole bot process (default registry).
+
+# Database connection pool
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting to check a connection out of the pool (including opening a new one and the pre-ping)',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    'db_pool_checkout_timeouts_total',
+    'Checkouts that gave up after pool_timeout'
+)
+DB_POOL_CHECKED_OUT = Gauge('db_pool_checked_out_connections', 'Connections currently checked out')
+DB_POOL_IDLE = Gauge('db_pool_idle_connections', 'Idle connections kept in the pool')
+DB_POOL_OVERFLOW = Gauge('db_pool_overflow_connections', 'Connections open beyond pool_size (negative while below it)')
+DB_POOL_INVALIDATIONS = Counter(
+    'db_pool_invalidations_total',
+    'Connections discarded as broken (e.g. dropped by the server and caught by pre-ping)'
+)
+
+# Database statements
+DB_STATEMENTS = Counter('db_statements_total', 'SQL statements executed')
+DB_STATEMENT_DURATION = Histogram(
+    'db_statement_duration_seconds',
+    'Time from sending a SQL statement to receiving its result',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+# Updates and handlers
+UPDATES = Counter('bot_updates_total', 'Updates processed', ['type'])
+UPDATE_DURATION = Histogram('bot_update_duration_seconds', 'Time to process an update (debounce hold, wait for the user\'s lock, FSM and handlers)', ['type'])
+UPDATE_ERRORS = Counter('bot_update_errors_total', 'Updates whose processing raised', ['type'])
+UPDATE_DB_STATEMENTS = Histogram(
+    'bot_update_db_statements',
+    'SQL statements executed while processing one update',
+    ['type'],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 25, 50)
+)
+UPDATE_DB_DURATION = Histogram(
+    'bot_update_db_duration_seconds',
+    'Time spent in SQL statements while processing one update',
+    ['type'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+HANDLER_DURATION = Histogram('bot_handler_duration_seconds', 'Handler latency', ['router', 'handler'])
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Exceptions raised by handlers', ['router', 'handler', 'error'])
+USER_LOCK_WAIT = Histogram(
+    'bot_user_lock_wait_seconds',
+    "Time an update waited for the same user's previous updates to finish",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+USER_LOCKS = Gauge('bot_user_locks', 'Per-user update locks currently kept')
+# Coalescing ratio = bot_stepper_taps_per_edit_sum / bot_stepper_taps_per_edit_count
+STEPPER_TAPS_PER_EDIT = Histogram(
+    'bot_stepper_taps_per_edit',
+    'Quantity stepper taps coalesced into one handler run (one DB write and one edit)',
+    ['stepper'],
+    buckets=(1, 2, 3, 4, 6, 8, 12, 20)
+)
+
+# Telegram Bot API
+TELEGRAM_REQUEST_DURATION = Histogram(
+    'telegram_api_request_duration_seconds',
+    'Bot API request latency',
+    ['method'],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+TELEGRAM_RATE_LIMITED = Counter('telegram_api_rate_limited_total', 'Bot API requests rejected with 429', ['method'])
+TELEGRAM_ERRORS = Counter('telegram_api_errors_total', 'Failed Bot API requests', ['method', 'error'])
+
+
+@dataclass(slots=True)
+class UpdateStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# Set by the update metrics middleware; SQL event hooks add to it (greenlets share the task's context)
+current_update_stats: ContextVar[UpdateStats | None] = ContextVar('current_update_stats', default=None)
@@ -0,0 +1,59 @@
+"""Money as integer tiyin (1 so'm = 100 tiyin).
+
+Prices are stored as ``Numeric(10, 2)`` so'm; convert them with ``to_tiyin`` as
+soon as they are read and do all arithmetic on ints, which is exact and sums
+the same everywhere (handlers, checkout, reports).
+"""
+import operator
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Iterable
+
+TIYIN_PER_SOM = 100
+# Numeric(10, 2) holds at most 99 999 999.99 so'm
+MAX_TIYIN = 10 ** 10 - 1
+
+_CENT = Decimal('0.01')
+
+
+def to_tiyin(value: Decimal | int | str) -> int:
+    """Convert an amount in so'm (e.g. a ``Numeric`` column value) to tiyin."""
+    amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * TIYIN_PER_SOM)
+
+
+def from_tiyin(tiyin: int) -> Decimal:
+    """Convert tiyin to a so'm ``Decimal`` with two places, ready for a ``Numeric`` column."""
+    return Decimal(tiyin).scaleb(-2).quantize(_CENT)
+
+
+def sum_lines(prices: Iterable[int], quantities: Iterable[int]) -> int:
+    """Sum of price * quantity over all lines, in tiyin."""
+    return sum(map(operator.mul, prices, quantities))
+
+
+def format_som(tiyin: int) -> str:
+    """Format for display: ``25 000 so'm``, ``1 250,50 so'm``."""
+    som, rest = divmod(abs(tiyin), TIYIN_PER_SOM)
+    text = f"{som:,}".replace(',', ' ')
+    if rest:
+        text += f",{rest:02d}"
+    return f"{'-' if tiyin < 0 else ''}{text} so'm"
+
+
+def parse_som(text: str) -> int:
+    """Parse an amount typed by an admin (``25000``, ``25 000``, ``12.5``, ``12,50``) into tiyin.
+
+    Raises ValueError for anything that is not a positive amount with at most two decimals
+    that fits the price column.
+    """
+    cleaned = text.strip().replace(' ', '').replace('_', '').replace(',', '.')
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text!r}")
+    if not amount.is_finite() or amount.as_tuple().exponent < -2:
+        raise ValueError(f"Invalid amount: {text!r}")
+    tiyin = to_tiyin(amount)
+    if not 0 < tiyin <= MAX_TIYIN:
+        raise ValueError(f"Amount out of range: {text!r}")
+    return tiyin
@@ -0,0 +1,77 @@
+import asyncio
+import csv
+import shutil
+import zipfile
+from typing import AsyncIterable
+from app.utils.money import from_tiyin, to_tiyin
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # in requirements.txt; without it only the CSV export is offered
+    Workbook = None
+
+XLSX_AVAILABLE = Workbook is not None
+# Bots can upload documents up to 50 MB; larger CSV exports are zipped first
+DOCUMENT_SIZE_LIMIT = 50 * 1024 * 1024
+
+EXPORT_COLUMNS = (
+    "Buyurtma", "Sana", "Holati", "Turi", "Filial", "Mijoz", "Telefon", "Telegram ID",
+    "Mahsulot", "Narxi", "Miqdori", "Summa", "Buyurtma jami"
+)
+STATUS_LABELS = {'waiting': "Kutilmoqda", 'cancelled': "Bekor qilingan", 'delivered': "Yetkazilgan"}
+DELIVERY_LABELS = {'delivery': "Yetkazib berish", 'pickup': "Olib ketish"}
+
+
+def export_row(row) -> tuple:
+    """Flat spreadsheet row for one order item (see ``stream_order_export_rows``); amounts in so'm."""
+    return (
+        row.id,
+        row.created_at.strftime('%Y-%m-%d %H:%M'),
+        STATUS_LABELS.get(row.status, row.status),
+        DELIVERY_LABELS.get(row.delivery_type, row.delivery_type or ""),
+        row.branch_name or "",
+        row.full_name or row.first_name or "",
+        row.phone_number or "",
+        row.tg_id,
+        row.product_name,
+        row.product_price,
+        row.quantity,
+        from_tiyin(to_tiyin(row.product_price) * row.quantity),
+        row.total_price
+    )
+
+
+async def write_csv(rows: AsyncIterable, path: str) -> int:
+    """Write rows to ``path`` as they arrive; returns the number of rows written."""
+    count = 0
+    # utf-8-sig so Excel detects the encoding of the Uzbek text
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        async for row in rows:
+            writer.writerow(export_row(row))
+            count += 1
+    return count
+
+
+async def write_xlsx(rows: AsyncIterable, path: str) -> int:
+    """Like ``write_csv``; openpyxl's write-only mode keeps memory flat as well."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Buyurtmalar")
+    sheet.append(EXPORT_COLUMNS)
+    count = 0
+    async for row in rows:
+        sheet.append(export_row(row))
+        count += 1
+    # Assembles the zip container from the rows spooled to disk
+    await asyncio.to_thread(workbook.save, path)
+    return count
+
+
+def zip_file(path: str, arcname: str) -> str:
+    """Deflate ``path`` into ``path + '.zip'`` chunk by chunk (blocking; run it in a thread)."""
+    zip_path = path + '.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with open(path, 'rb') as src, archive.open(arcname, 'w', force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    return zip_path
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+
+class Priority(IntEnum):
+    # Lower value is sent first
+    USER = 0
+    GROUP = 1
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """Full and not blocked, i.e. no different from a new bucket."""
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+def normalize_chat_id(chat_id: int | str) -> int | str:
+    """Numeric ids as int, whether given as int or str (GROUP_ID comes from the
+    environment); only ``@username`` stays a str."""
+    if isinstance(chat_id, str):
+        try:
+            return int(chat_id)
+        except ValueError:
+            return chat_id
+    return chat_id
+
+
+@dataclass
+class _Job:
+    chat_id: int | str
+    call: Callable[[], Awaitable[Any]]
+    priority: Priority
+    future: asyncio.Future
+    attempts: int = 0
+
+
+class SendQueue:
+    """Central scheduler for outbound Bot API calls.
+
+    Calls are queued in priority lanes (user-facing replies before group
+    notifications) and released under a global token bucket and one bucket
+    per chat, so bursts stay inside Telegram's limits instead of failing with
+    429. A 429 pauses only the affected chat for ``retry_after`` seconds and the
+    call is retried; network and server errors are retried with backoff. When
+    ``maxsize`` calls are waiting, ``enqueue`` waits for room (backpressure).
+    Per-chat buckets that have refilled are dropped every ``sweep_interval``
+    seconds, so only chats contacted recently are tracked.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        private_burst: float = 5,
+        group_rate: float = 20 / 60,
+        group_burst: float = 3,
+        maxsize: int = 1000,
+        concurrency: int = 10,
+        max_attempts: int = 5,
+        sweep_interval: float = 60
+    ):
+        self._global = TokenBucket(global_rate, global_rate)
+        self._private_limits = (private_rate, private_burst)
+        self._group_limits = (group_rate, group_burst)
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self._lanes: dict[Priority, deque[_Job]] = {priority: deque() for priority in Priority}
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._size = 0
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._in_flight: set[asyncio.Task] = set()
+        self._background: set[asyncio.Task] = set()
+        self._scheduler: asyncio.Task | None = None
+        self._closing = False
+
+    def start(self):
+        if self._scheduler is None:
+            self._scheduler = asyncio.create_task(self._run())
+
+    def _bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Negative ids (and @channel usernames) are groups and channels
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate, burst = self._group_limits if is_group else self._private_limits
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, burst)
+        return bucket
+
+    async def enqueue(self, chat_id: int | str, call: Callable[[], Awaitable[Any]],
+                      priority: Priority = Priority.USER) -> asyncio.Future:
+        """Queue ``call`` (a zero-argument coroutine function) and return a future with its result."""
+        if self._closing:
+            raise RuntimeError("SendQueue is closed")
+        async with self._space:
+            await self._space.wait_for(lambda: self._size < self.maxsize)
+            self._size += 1
+        future = asyncio.get_running_loop().create_future()
+        # Failures are logged by the queue, so fire-and-forget callers may ignore the future
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # One bucket per chat, however its id was spelled
+        self._push(_Job(chat_id=normalize_chat_id(chat_id), call=call, priority=priority, future=future))
+        return future
+
+    async def send(self, chat_id: int | str, call: Callable[[], Awaitable[Any]],
+                   priority: Priority = Priority.USER) -> Any:
+        """Queue ``call`` and wait for its result."""
+        return await (await self.enqueue(chat_id, call, priority))
+
+    def spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """Run ``coro`` (typically a chain of ``send`` calls) in the background; ``close`` waits for it."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _push(self, job: _Job, front: bool = False):
+        lane = self._lanes[job.priority]
+        if front:
+            lane.appendleft(job)
+        else:
+            lane.append(job)
+        self._wakeup.set()
+
+    def _next_job(self, now: float) -> tuple[_Job | None, float]:
+        """Pick the highest-priority job whose chat may send now, else the shortest wait."""
+        global_delay = self._global.delay(now)
+        shortest = float('inf')
+        for priority in Priority:
+            lane = self._lanes[priority]
+            for job in lane:
+                delay = max(global_delay, self._bucket(job.chat_id).delay(now))
+                if delay <= 0:
+                    lane.remove(job)
+                    return job, 0.0
+                shortest = min(shortest, delay)
+        return None, shortest
+
+    def _sweep_buckets(self, now: float):
+        # A dropped bucket is recreated full on the chat's next call, which is what it was anyway
+        idle = [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.is_idle(now)]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            if now >= self._next_sweep:
+                self._sweep_buckets(now)
+                self._next_sweep = now + self.sweep_interval
+            job, delay = self._next_job(now)
+            if job is None:
+                self._wakeup.clear()
+                timeout = None if delay == float('inf') else delay
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._global.consume()
+            self._bucket(job.chat_id).consume()
+            await self._slots.acquire()
+            task = asyncio.create_task(self._execute(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, job: _Job):
+        job.attempts += 1
+        try:
+            result = await job.call()
+        except TelegramRetryAfter as e:
+            logging.warning("Rate limited in chat %s, retrying in %ss", job.chat_id, e.retry_after)
+            self._bucket(job.chat_id).block(time.monotonic(), e.retry_after)
+            self._retry_or_fail(job, e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            logging.warning("Send to chat %s failed (attempt %d): %s", job.chat_id, job.attempts, e)
+            self._bucket(job.chat_id).block(time.monotonic(), min(2 ** job.attempts, 30))
+            self._retry_or_fail(job, e)
+        except Exception as e:
+            # Not retryable (e.g. TelegramBadRequest): failed on this attempt
+            logging.error("Send to chat %s failed: %s", job.chat_id, e)
+            self._finish(job, exception=e)
+        else:
+            self._finish(job, result=result)
+        finally:
+            self._slots.release()
+
+    def _retry_or_fail(self, job: _Job, error: Exception):
+        if job.attempts < self.max_attempts and not job.future.cancelled():
+            self._push(job, front=True)
+        else:
+            logging.error("Giving up sending to chat %s after %d attempts: %s", job.chat_id, job.attempts, error)
+            self._finish(job, exception=error)
+
+    def _finish(self, job: _Job, result: Any = None, exception: Exception | None = None):
+        if not job.future.done():
+            if exception is not None:
+                job.future.set_exception(exception)
+            else:
+                job.future.set_result(result)
+        self._size -= 1
+        asyncio.create_task(self._notify_space())
+
+    async def _notify_space(self):
+        async with self._space:
+            self._space.notify_all()
+
+    async def close(self, timeout: float = 30):
+        """Stop accepting calls and give queued ones up to ``timeout`` seconds to be sent."""
+        deadline = time.monotonic() + timeout
+        if self._background:
+            await asyncio.wait(set(self._background), timeout=timeout)
+        self._closing = True
+        while self._size and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            await asyncio.gather(self._scheduler, return_exceptions=True)
+            self._scheduler = None
+        for lane in self._lanes.values():
+            while lane:
+                job = lane.popleft()
+                if not job.future.done():
+                    job.future.cancel()
+        if self._size:
+            logging.warning("SendQueue closed with %d unsent calls", self._size)
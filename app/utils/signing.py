@@ -0,0 +1,19 @@
+import hashlib
+import hmac
+from app.config import BOT_TOKEN
+
+# Callback data is sent back by the client and can be forged, so values the bot
+# trusts (like a quantity to save) are signed. The key is derived from the bot
+# token: only this bot can produce valid signatures, and no extra secret is needed.
+_KEY = hashlib.sha256(b"callback-signing:" + (BOT_TOKEN or "").encode()).digest()
+SIGNATURE_LENGTH = 16  # hex chars (64 bits), keeps callback data well under Telegram's 64 bytes
+
+
+def sign(*values) -> str:
+    message = ":".join(str(value) for value in values).encode()
+    return hmac.new(_KEY, message, hashlib.sha256).hexdigest()[:SIGNATURE_LENGTH]
+
+
+def verify(signature: str, *values) -> bool:
+    # Compared as bytes: compare_digest raises TypeError on a str with non-ASCII characters
+    return hmac.compare_digest(signature.encode(), sign(*values).encode())
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import signal
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from app.config import (
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_DRAIN_TIMEOUT,
+    WEB_SERVER_HOST,
+    WEB_SERVER_PORT
+)
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    """Webhook handler that lets in-flight updates finish on shutdown.
+
+    The bot session is closed later, in ``on_cleanup``, so dispatcher shutdown
+    hooks (e.g. flushing the send queue) can still talk to Telegram.
+    """
+
+    async def close(self) -> None:
+        tasks = set(self._background_feed_update_tasks)
+        if tasks:
+            logging.info("Waiting for %d in-flight updates to finish", len(tasks))
+            _, pending = await asyncio.wait(tasks, timeout=WEBHOOK_DRAIN_TIMEOUT)
+            if pending:
+                logging.warning("%d updates did not finish within %ss", len(pending), WEBHOOK_DRAIN_TIMEOUT)
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({'status': 'ok'})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(body=generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
+def create_status_app() -> web.Application:
+    """App with the ``/health`` and ``/metrics`` (Prometheus) endpoints."""
+    app = web.Application()
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+
+async def start_status_server() -> web.AppRunner:
+    """Serve ``/health`` and ``/metrics`` in polling mode; call ``cleanup()`` on the runner to stop."""
+    runner = web.AppRunner(create_status_app())
+    await runner.setup()
+    await web.TCPSite(runner, host=WEB_SERVER_HOST, port=WEB_SERVER_PORT).start()
+    logging.info("Metrics available on %s:%s/metrics", WEB_SERVER_HOST, WEB_SERVER_PORT)
+    return runner
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    app = create_status_app()
+
+    # Registered before setup_application so updates are drained before dispatcher shutdown hooks run
+    DrainingRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    async def close_bot_session(app: web.Application):
+        await bot.session.close()
+
+    app.on_cleanup.append(close_bot_session)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("WEBHOOK_BASE_URL environment variable is not set")
+    if not WEBHOOK_SECRET:
+        logging.warning("WEBHOOK_SECRET is not set, webhook requests will not be authenticated")
+
+    app = create_webhook_app(bot, dp)
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    # Every replica registers the same URL; pending updates are kept so rolling deploys lose nothing
+    await bot.set_webhook(
+        url=WEBHOOK_BASE_URL.rstrip('/') + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types()
+    )
+
+    site = web.TCPSite(runner, host=WEB_SERVER_HOST, port=WEB_SERVER_PORT)
+    await site.start()
+    logging.info("Bot started successfully (webhook on %s:%s%s)", WEB_SERVER_HOST, WEB_SERVER_PORT, WEBHOOK_PATH)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        logging.info("Shutting down webhook server")
+        # Stops accepting requests, drains in-flight updates, runs shutdown hooks, then closes the bot session
+        await runner.cleanup()
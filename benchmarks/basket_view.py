@@ -0,0 +1,68 @@
+"""Render cost of the basket view for baskets of 1 to 50 lines.
+
+    python -m benchmarks.basket_view
+
+Measures a cold render (empty fragment caches), a warm render, and the render
+after a stepper tap (one line changed, the others from the line cache). No
+database or Telegram connection is needed.
+"""
+import argparse
+import json
+import timeit
+from app.utils.basket_view import BasketLine, BasketView, line_buttons, line_text
+
+SIZES = (1, 5, 10, 20, 50)
+
+
+def make_lines(n: int) -> list[BasketLine]:
+    return [BasketLine(i, f"Mahsulot {i}", (15000 + i * 500) * 100, 1 + i % 4) for i in range(1, n + 1)]
+
+
+def render(view: BasketView):
+    view.text()
+    view.keyboard()
+
+
+def cold_render(lines):
+    line_text.cache_clear()
+    line_buttons.cache_clear()
+    render(BasketView(lines))
+
+
+def measure(n: int, number: int) -> dict:
+    lines = make_lines(n)
+    render(BasketView(lines))
+    target = lines[n // 2]
+    patched_lines = [line if line is not target else BasketLine(target.product_id, target.name, target.price, target.quantity + 1)
+                     for line in lines]
+
+    def per_call(stmt) -> float:
+        return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+    return {
+        'lines': n,
+        'cold_render_us': per_call(lambda: cold_render(lines)),
+        'warm_render_us': per_call(lambda: render(BasketView(lines))),
+        'rebuild_after_tap_us': per_call(lambda: render(BasketView(patched_lines))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200, help="calls per timing run")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [measure(n, args.number) for n in SIZES]
+    print(f"{'lines':>5} {'cold µs':>10} {'warm µs':>10} {'after tap µs':>13}")
+    for r in results:
+        print(f"{r['lines']:>5} {r['cold_render_us']:>10.1f} {r['warm_render_us']:>10.1f} "
+              f"{r['rebuild_after_tap_us']:>13.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Delivery zone lookup cost with 50 to 1000 zones.
+
+    python -m benchmarks.delivery_zones
+
+Builds random district-sized polygons (8-40 vertices) over a Tashkent-sized
+area, partly overlapping, and times the lookup ``process_delivery_location``
+does: PolygonGrid.containing plus picking the cheapest zone. For comparison it
+also times testing every polygon. Query points are spread over the whole area
+and a margin around it, so some fall outside every zone. No database or
+Telegram connection is needed.
+"""
+import argparse
+import json
+import math
+import random
+import timeit
+from app.utils.geo import PolygonGrid, point_in_polygon
+
+SIZES = (50, 100, 300, 500, 1000)
+CENTER = (41.31, 69.27)
+# Half-size of the served area in degrees (~45 x 60 km)
+SPREAD = (0.2, 0.27)
+
+
+def make_zones(n: int, rng: random.Random) -> list:
+    zones = []
+    for zone_id in range(n):
+        lat = CENTER[0] + rng.uniform(-SPREAD[0], SPREAD[0])
+        lon = CENTER[1] + rng.uniform(-SPREAD[1], SPREAD[1])
+        radius = rng.uniform(0.01, 0.04)
+        vertices = rng.randint(8, 40)
+        polygon = [
+            (lat + radius * rng.uniform(0.6, 1) * math.sin(2 * math.pi * k / vertices),
+             lon + radius * rng.uniform(0.6, 1) * math.cos(2 * math.pi * k / vertices) / math.cos(math.radians(lat)))
+            for k in range(vertices)
+        ]
+        zones.append((polygon, (rng.randint(0, 5) * 5000, zone_id)))
+    return zones
+
+
+def make_points(count: int, rng: random.Random) -> list[tuple[float, float]]:
+    return [
+        (CENTER[0] + rng.uniform(-1.2, 1.2) * SPREAD[0], CENTER[1] + rng.uniform(-1.2, 1.2) * SPREAD[1])
+        for _ in range(count)
+    ]
+
+
+def measure(n: int, points: int, repeat: int, rng: random.Random) -> dict:
+    zones = make_zones(n, rng)
+    queries = make_points(points, rng)
+    grid = PolygonGrid(zones)
+
+    def indexed():
+        for lat, lon in queries:
+            min(grid.containing(lat, lon), default=None)
+
+    def linear():
+        for lat, lon in queries:
+            min((item for polygon, item in zones if point_in_polygon(lat, lon, polygon)), default=None)
+
+    # Both must agree on every query before their timings mean anything
+    for lat, lon in queries:
+        expected = min((item for polygon, item in zones if point_in_polygon(lat, lon, polygon)), default=None)
+        assert min(grid.containing(lat, lon), default=None) == expected
+
+    served = sum(1 for lat, lon in queries if grid.containing(lat, lon))
+    build = min(timeit.repeat(lambda: PolygonGrid(zones), number=1, repeat=repeat))
+    return {
+        'zones': n,
+        'served_share': served / len(queries),
+        'build_ms': build * 1000,
+        'indexed_lookup_us': min(timeit.repeat(indexed, number=1, repeat=repeat)) / len(queries) * 1e6,
+        'linear_lookup_us': min(timeit.repeat(linear, number=1, repeat=repeat)) / len(queries) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=2000, help="lookups per timing run")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = [measure(n, args.points, args.repeat, rng) for n in SIZES]
+    print(f"{'zones':>5} {'served':>7} {'build ms':>9} {'indexed µs':>11} {'linear µs':>10}")
+    for r in results:
+        print(f"{r['zones']:>5} {r['served_share']:>7.0%} {r['build_ms']:>9.1f} "
+              f"{r['indexed_lookup_us']:>11.1f} {r['linear_lookup_us']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from aiohttp import web
+from aiogram.client.telegram import TelegramAPIServer
+
+# Methods answered with a Message object; everything else gets ``true``
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendLocation', 'sendDocument', 'sendMediaGroup',
+    'editMessageText', 'editMessageCaption', 'editMessageReplyMarkup', 'copyMessage'
+}
+
+
+class FakeBotAPI:
+    """Local stand-in for the Telegram Bot API.
+
+    Accepts every method, answers instantly (plus ``latency`` seconds) with a
+    minimal valid result and counts calls per method. Point a bot at it with
+    ``bot.session.api = fake.api_server``.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8081, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1_000_000)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def api_server(self) -> TelegramAPIServer:
+        return TelegramAPIServer.from_base(f'http://{self.host}:{self.port}')
+
+    def _message(self, params) -> dict:
+        chat_id = params.get('chat_id')
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            chat_id = 1
+        return {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'},
+            'text': params.get('text') or params.get('caption') or ''
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+        params = await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == 'getMe':
+            result = {'id': 123456, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+        elif method in MESSAGE_METHODS:
+            result = self._message(params)
+            if method == 'sendMediaGroup':
+                result = [result]
+        else:
+            result = True
+        return web.Response(text=json.dumps({'ok': True, 'result': result}), content_type='application/json')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
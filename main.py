@@ -1,24 +1,126 @@
+import argparse
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram import Dispatcher
 from app.handlers import start
 from app.handlers.admin import router as admin_router
 from app.handlers.user import router as user_router
-from app.config import BOT_TOKEN
-from app.database.models import Base
-from app.database.engine import engine
+from app.bot import create_bot
+from app.config import (
+    BOT_MODE,
+    CATALOG_NOTIFY,
+    FSM_STORAGE,
+    FSM_STATE_TTL,
+    FSM_FLUSH_INTERVAL,
+    FSM_READ_CACHE_TTL,
+    METRICS_SERVER,
+    USER_LOCKS_MAXSIZE,
+    STEPPER_DEBOUNCE,
+    POLLING_TASKS_LIMIT,
+    SALES_ROLLUP_INTERVAL
+)
+from app.database.engine import engine, async_session_maker
+from app.database.migrations import run_migrations
+from app.database.catalog_cache import listen_for_catalog_changes
+from app.database.fsm_storage import PostgresStorage
+from app.database.stats_requests import roll_up_sales_periodically
+from app.middlewares import (
+    UpdateMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    UserEventIsolation,
+    StepperDebounceMiddleware
+)
+from app.utils.send_queue import SendQueue
+from app.webhook import run_webhook, start_status_server
+
+background_tasks: list[asyncio.Task] = []
 
 
 async def on_startup():
-    """Create database tables on startup"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logging.info("Database tables created successfully")
+    """Apply pending database migrations on startup"""
+    await run_migrations()
+    logging.info("Database schema is up to date")
+
+
+async def on_dispatcher_startup(send_queue: SendQueue):
+    send_queue.start()
+    
+    # Keep the catalog cache coherent with changes made by other bot workers
+    if CATALOG_NOTIFY:
+        background_tasks.append(asyncio.create_task(listen_for_catalog_changes(engine)))
+    
+    # Checkouts only append sales deltas; fold them into the statistics aggregates
+    background_tasks.append(
+        asyncio.create_task(roll_up_sales_periodically(async_session_maker, SALES_ROLLUP_INTERVAL))
+    )
+
+
+async def on_dispatcher_shutdown(send_queue: SendQueue):
+    # Let queued notifications go out before the bot session is closed
+    await send_queue.close()
+    
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
 
+def create_fsm_storage():
+    if FSM_STORAGE == 'postgres':
+        return PostgresStorage(
+            async_session_maker,
+            state_ttl=FSM_STATE_TTL,
+            flush_interval=FSM_FLUSH_INTERVAL,
+            read_cache_ttl=FSM_READ_CACHE_TTL
+        )
+    # Default: aiogram's in-memory storage (lost on restart, not shared between workers)
+    return None
 
-async def main():
+
+def create_dispatcher(send_queue: SendQueue | None = None) -> Dispatcher:
+    # Outbound Bot API calls that may burst (notifications, status updates) go through this queue;
+    # handlers receive it as `send_queue`.
+    # Updates are handled concurrently, but those of one user are serialized (see UserEventIsolation)
+    # The dispatcher would register its FSM middleware (dp.fsm) right away; it's registered
+    # below instead, so stepper taps can be coalesced before it serializes the user's updates
+    dp = Dispatcher(
+        storage=create_fsm_storage(),
+        events_isolation=UserEventIsolation(maxsize=USER_LOCKS_MAXSIZE),
+        disable_fsm=True,
+        send_queue=send_queue or SendQueue()
+    )
+    dp.startup.register(on_dispatcher_startup)
+    dp.shutdown.register(on_dispatcher_shutdown)
+    
+    # Prometheus metrics: per update (incl. SQL statements) and per handler. The update
+    # metrics go first, so they include the debounce hold and the wait for the user's lock
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    if STEPPER_DEBOUNCE:
+        dp.update.outer_middleware(StepperDebounceMiddleware(STEPPER_DEBOUNCE))
+    dp.update.outer_middleware(dp.fsm)
+    
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    
+    # Register routers
+    dp.include_router(start.router)
+    dp.include_router(admin_router)
+    dp.include_router(user_router)
+    return dp
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MassFit Telegram bot")
+    parser.add_argument(
+        '--mode',
+        choices=('polling', 'webhook'),
+        default=BOT_MODE,
+        help="receive updates by long polling (default) or through an aiohttp webhook server"
+    )
+    return parser.parse_args()
+
+
+async def main(mode: str = 'polling'):
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -27,28 +129,34 @@ async def main():
     # Initialize database
     await on_startup()
     
-    # Initialize bot with default properties
-    bot = Bot(
-        token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
-    dp = Dispatcher()
+    # Single bot (and HTTP connection pool) shared by all handlers via dependency injection
+    bot = create_bot()
+    dp = create_dispatcher()
     
-    # Register routers
-    dp.include_router(start.router)
-    dp.include_router(admin_router)
-    dp.include_router(user_router)
+    if mode == 'webhook':
+        await run_webhook(bot, dp)
+        return
     
     # Drop pending updates to avoid flooding when bot restarts
     await bot.delete_webhook(drop_pending_updates=True)
     
+    status_runner = await start_status_server() if METRICS_SERVER else None
+    
     # Start polling
     logging.info("Bot started successfully")
-    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+    try:
+        await dp.start_polling(
+            bot,
+            allowed_updates=dp.resolve_used_update_types(),
+            tasks_concurrency_limit=POLLING_TASKS_LIMIT or None
+        )
+    finally:
+        if status_runner is not None:
+            await status_runner.cleanup()
 
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        asyncio.run(main(parse_args().mode))
     except KeyboardInterrupt:
         logging.info("Bot stopped")
@@ -0,0 +1,105 @@
+"""Baseline schema (tables previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('tg_id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=True),
+        sa.Column('first_name', sa.String(length=255), nullable=True),
+        sa.Column('last_name', sa.String(length=255), nullable=True),
+        sa.Column('full_name', sa.String(length=512), nullable=True),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tg_id')
+    )
+    op.create_table(
+        'products',
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('product_image', sa.String(length=255), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'branches',
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('image', sa.String(length=255), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('location', sa.String(length=500), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'basket_items',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'orders',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('group_message_id', sa.Integer(), nullable=True),
+        sa.Column('delivery_type', sa.String(length=50), nullable=True),
+        sa.Column('branch_id', sa.Integer(), nullable=True),
+        sa.Column('delivery_latitude', sa.Numeric(10, 7), nullable=True),
+        sa.Column('delivery_longitude', sa.Numeric(10, 7), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'order_items',
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('product_price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.drop_table('basket_items')
+    op.drop_table('branches')
+    op.drop_table('products')
+    op.drop_table('users')
@@ -0,0 +1,52 @@
+"""Indexes for the hot lookup paths and one basket row per (user, product)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Merge duplicate basket rows into the oldest one before enforcing uniqueness
+    op.execute("""
+        WITH merged AS (
+            SELECT MIN(id) AS keep_id, user_id, product_id, SUM(quantity) AS quantity
+            FROM basket_items
+            GROUP BY user_id, product_id
+            HAVING COUNT(*) > 1
+        ), updated AS (
+            UPDATE basket_items b
+            SET quantity = merged.quantity
+            FROM merged
+            WHERE b.id = merged.keep_id
+        )
+        DELETE FROM basket_items b
+        USING merged
+        WHERE b.user_id = merged.user_id
+          AND b.product_id = merged.product_id
+          AND b.id <> merged.keep_id
+    """)
+    op.create_unique_constraint('uq_basket_items_user_product', 'basket_items', ['user_id', 'product_id'])
+
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_orders_status', 'orders', ['status'])
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_products_type_created_at', 'products', ['type', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_type_created_at', table_name='products')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_status', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    op.drop_constraint('uq_basket_items_user_product', 'basket_items', type_='unique')
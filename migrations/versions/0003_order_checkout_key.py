@@ -0,0 +1,28 @@
+"""Idempotency key for checkouts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing orders keep NULL, which the unique constraint allows any number of times
+    op.add_column('orders', sa.Column('checkout_key', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('uq_orders_checkout_key', 'orders', ['checkout_key'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_orders_checkout_key', 'orders', type_='unique')
+    op.drop_column('orders', 'checkout_key')
@@ -0,0 +1,85 @@
+"""Sales aggregate tables for the admin statistics screen
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('delivery_type', sa.String(length=50), nullable=False),
+        sa.Column('orders', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'delivery_type')
+    )
+    op.create_table(
+        'sales_by_status',
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('orders', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('status')
+    )
+    op.create_table(
+        'sales_by_product',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('product_name', sa.String(length=255), nullable=False),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_table(
+        'sales_by_branch',
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('branch_id')
+    )
+
+    # Backfill from existing orders (amounts in tiyin; cancelled orders only count per status)
+    op.execute("""
+        INSERT INTO sales_daily (day, delivery_type, orders, revenue)
+        SELECT created_at::date, COALESCE(delivery_type, 'unknown'), COUNT(*), SUM(ROUND(total_price * 100))::bigint
+        FROM orders WHERE status <> 'cancelled'
+        GROUP BY 1, 2
+    """)
+    op.execute("""
+        INSERT INTO sales_by_status (status, orders, revenue)
+        SELECT status, COUNT(*), SUM(ROUND(total_price * 100))::bigint
+        FROM orders
+        GROUP BY 1
+    """)
+    op.execute("""
+        INSERT INTO sales_by_product (product_id, product_name, quantity, revenue)
+        SELECT i.product_id, (array_agg(i.product_name ORDER BY i.id DESC))[1],
+               SUM(i.quantity), SUM(ROUND(i.product_price * 100) * i.quantity)::bigint
+        FROM order_items i JOIN orders o ON o.id = i.order_id
+        WHERE o.status <> 'cancelled'
+        GROUP BY 1
+    """)
+    op.execute("""
+        INSERT INTO sales_by_branch (branch_id, orders, revenue)
+        SELECT branch_id, COUNT(*), SUM(ROUND(total_price * 100))::bigint
+        FROM orders WHERE status <> 'cancelled' AND branch_id IS NOT NULL
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('sales_by_branch')
+    op.drop_table('sales_by_product')
+    op.drop_table('sales_by_status')
+    op.drop_table('sales_daily')
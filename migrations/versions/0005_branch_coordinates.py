@@ -0,0 +1,28 @@
+"""Branch coordinates
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing branches keep NULL until an admin sends their location
+    op.add_column('branches', sa.Column('latitude', sa.Numeric(precision=10, scale=7), nullable=True))
+    op.add_column('branches', sa.Column('longitude', sa.Numeric(precision=10, scale=7), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('branches', 'longitude')
+    op.drop_column('branches', 'latitude')
@@ -0,0 +1,44 @@
+"""Delivery zones, branch notification chats and delivery fees
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'delivery_zones',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('polygon', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('delivery_fee', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('min_order', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_delivery_zones_branch_id', 'delivery_zones', ['branch_id'])
+    op.add_column('branches', sa.Column('notify_chat_id', sa.BigInteger(), nullable=True))
+    op.add_column('orders', sa.Column('delivery_fee', sa.Numeric(precision=10, scale=2), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'delivery_fee')
+    op.drop_column('branches', 'notify_chat_id')
+    op.drop_index('ix_delivery_zones_branch_id', table_name='delivery_zones')
+    op.drop_table('delivery_zones')
@@ -0,0 +1,39 @@
+"""Append-only sales deltas, rolled up into the sales aggregates
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_deltas',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('day', sa.Date(), nullable=True),
+        sa.Column('delivery_type', sa.String(length=50), nullable=True),
+        sa.Column('branch_id', sa.Integer(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('product_name', sa.String(length=255), nullable=True),
+        sa.Column('orders', sa.BigInteger(), nullable=False),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    # Deltas not rolled up yet are lost; rebuild_sales_stats recomputes the aggregates from orders
+    op.drop_table('sales_deltas')
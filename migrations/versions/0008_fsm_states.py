@@ -0,0 +1,37 @@
+"""FSM state table for PostgresStorage
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases built from an earlier 0001 already have the table; stamped ones don't
+    op.create_table(
+        'fsm_states',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('state', sa.String(length=255), nullable=True),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+        if_not_exists=True
+    )
+    op.create_index(op.f('ix_fsm_states_updated_at'), 'fsm_states', ['updated_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_fsm_states_updated_at'), table_name='fsm_states')
+    op.drop_table('fsm_states')
@@ -0,0 +1,73 @@
+"""Relationships are lazy="raise", and the hot reads load what their callers use in
+the same statement. Needs no database: statements go to a stand-in session."""
+import asyncio
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import make_transient_to_detached
+from app.database.models import Base, User, BasketItem, Order
+from app.database.requests import get_user_by_tg_id
+from app.database.order_requests import get_basket_items
+
+
+class EmptyResult:
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+    def scalar_one_or_none(self):
+        return None
+
+
+class RecordingSession:
+    """Stand-in for AsyncSession that records the SQL it is asked to run and returns no rows."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return EmptyResult()
+
+
+def run(read, *args) -> list[str]:
+    session = RecordingSession()
+    asyncio.run(read(session, *args))
+    return session.statements
+
+
+def test_every_relationship_is_lazy_raise():
+    relationships = [
+        f"{mapper.class_.__name__}.{relationship.key}"
+        for mapper in Base.registry.mappers
+        for relationship in mapper.relationships
+        if relationship.lazy != 'raise'
+    ]
+    assert relationships == []
+
+
+@pytest.mark.parametrize('instance, attribute', [
+    (User(id=1, tg_id=1), 'orders'),
+    (User(id=1, tg_id=1), 'basket_items'),
+    (BasketItem(id=1, user_id=1, product_id=1), 'product'),
+    (Order(id=1, user_id=1), 'order_items'),
+])
+def test_unloaded_relationship_raises(instance, attribute):
+    # As if loaded by a query that didn't ask for the relationship
+    make_transient_to_detached(instance)
+    with pytest.raises(InvalidRequestError):
+        getattr(instance, attribute)
+
+
+def test_get_user_by_tg_id_reads_only_users():
+    statements = run(get_user_by_tg_id, 1001)
+    assert len(statements) == 1
+    assert "JOIN" not in statements[0]
+
+
+def test_get_basket_items_joins_products():
+    statements = run(get_basket_items, 1)
+    assert len(statements) == 1
+    assert "JOIN products" in statements[0]
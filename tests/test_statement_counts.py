@@ -0,0 +1,70 @@
+"""SQL statements per read on the handlers' hot paths.
+
+Relationships are lazy="raise" (see models.py), so each query must load what its
+callers read; these counts make sure nothing slips back to a query per row.
+"""
+import os
+import pytest
+
+if not os.getenv('TEST_DATABASE_URL'):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy.exc import InvalidRequestError
+from app.database.requests import get_user_by_tg_id
+from app.database.order_requests import get_basket_items, get_order_history, get_user_order, get_order_items
+
+
+def test_get_user_by_tg_id_loads_only_the_user(seeded, count_statements):
+    async def call(session):
+        user = await get_user_by_tg_id(session, seeded.tg_id)
+        with pytest.raises(InvalidRequestError):
+            user.orders
+        with pytest.raises(InvalidRequestError):
+            user.basket_items
+        return user
+    
+    user, statements = count_statements(call)
+    assert user.id == seeded.user_id
+    assert statements == 1
+
+
+def test_get_basket_items_loads_products_in_the_same_query(seeded, count_statements):
+    async def call(session):
+        items = await get_basket_items(session, seeded.user_id)
+        return [(item.product.name, item.product.price, item.quantity) for item in items]
+    
+    lines, statements = count_statements(call)
+    assert [name for name, _, _ in lines] == ["Oats", "Protein"]
+    assert statements == 1
+
+
+def test_get_order_history_counts_items_in_the_same_query(seeded, count_statements):
+    # Replaces get_user_orders, which loaded every order with all of its items
+    async def call(session):
+        return await get_order_history(session, seeded.user_id, limit=5)
+    
+    (orders, has_newer, has_older), statements = count_statements(call)
+    assert sorted(order.item_count for order in orders) == [1, 2]
+    assert (has_newer, has_older) == (False, False)
+    assert statements == 1
+
+
+def test_get_user_order_loads_branch_but_not_items(seeded, count_statements):
+    async def call(session):
+        order = await get_user_order(session, seeded.user_id, seeded.order_id)
+        with pytest.raises(InvalidRequestError):
+            order.order_items
+        return order.branch.name
+    
+    branch_name, statements = count_statements(call)
+    assert branch_name == seeded.branch_name
+    assert statements == 1
+
+
+def test_get_order_items_is_one_query(seeded, count_statements):
+    async def call(session):
+        return [item.product_name for item in await get_order_items(session, seeded.order_id)]
+    
+    names, statements = count_statements(call)
+    assert names == ["Oats", "Protein"]
+    assert statements == 1